@@ -15,7 +15,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.config import settings
 from app.db import Base
-from app.models import task  # noqa: F401
+from app.models import idempotency, outbox, task  # noqa: F401
 
 config = context.config
 config.set_main_option("sqlalchemy.url", settings.database_url)
@@ -0,0 +1,35 @@
+"""add tasks keyset pagination index
+
+Revision ID: 20251122_0003
+Revises: 20251120_0002
+Create Date: 2025-11-22 00:03:00
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20251122_0003"
+down_revision = "20251120_0002"
+branch_labels = None
+depends_on = None
+
+
+# CONCURRENTLY не блокирует запись в большую таблицу, но не выполняется в транзакции.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_created_at_id",
+            "tasks",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_created_at_id",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
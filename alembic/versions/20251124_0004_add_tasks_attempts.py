@@ -0,0 +1,27 @@
+"""add tasks attempts column
+
+Revision ID: 20251124_0004
+Revises: 20251122_0003
+Create Date: 2025-11-24 00:04:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251124_0004"
+down_revision = "20251122_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tasks",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tasks", "attempts")
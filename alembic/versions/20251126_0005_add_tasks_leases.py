@@ -0,0 +1,41 @@
+"""add tasks lease columns
+
+Revision ID: 20251126_0005
+Revises: 20251124_0004
+Create Date: 2025-11-26 00:05:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251126_0005"
+down_revision = "20251124_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("worker_id", sa.String(length=128), nullable=True))
+    op.add_column(
+        "tasks",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Задачи, взятые в работу до появления аренды, реапер вернёт через час после старта:
+    # старые воркеры аренду не продлевают, а обрывать выполняющиеся сразу нельзя.
+    op.execute(
+        "UPDATE tasks SET lease_expires_at = COALESCE(started_at, now()) + interval '1 hour' "
+        "WHERE status = 'IN_PROGRESS'"
+    )
+    op.create_index(
+        "ix_tasks_status_lease_expires_at",
+        "tasks",
+        ["status", "lease_expires_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_status_lease_expires_at", table_name="tasks")
+    op.drop_column("tasks", "lease_expires_at")
+    op.drop_column("tasks", "worker_id")
@@ -0,0 +1,26 @@
+"""add tasks result reference columns
+
+Revision ID: 20251128_0006
+Revises: 20251126_0005
+Create Date: 2025-11-28 00:06:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251128_0006"
+down_revision = "20251126_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("result_ref", sa.String(length=255), nullable=True))
+    op.add_column("tasks", sa.Column("result_size", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("tasks", "result_size")
+    op.drop_column("tasks", "result_ref")
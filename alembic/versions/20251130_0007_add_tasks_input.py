@@ -0,0 +1,24 @@
+"""add tasks input column
+
+Revision ID: 20251130_0007
+Revises: 20251128_0006
+Create Date: 2025-11-30 00:07:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251130_0007"
+down_revision = "20251128_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("input", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("tasks", "input")
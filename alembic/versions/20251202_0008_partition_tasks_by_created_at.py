@@ -0,0 +1,83 @@
+"""partition tasks by created_at month
+
+Revision ID: 20251202_0008
+Revises: 20251130_0007
+Create Date: 2025-12-02 00:08:00
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20251202_0008"
+down_revision = "20251130_0007"
+branch_labels = None
+depends_on = None
+
+# Месячные партиции tasks_pYYYYMM по created_at (UTC). Дальнейшие партиции заранее создаёт
+# python -m app.workers.partition_runner; миграция покрывает имеющиеся данные и три месяца
+# вперёд. Данные копируются одной транзакцией — на большой таблице запускайте её в окно
+# обслуживания.
+_MONTHS_AHEAD = 3
+
+_INDEXES = {
+    "ix_tasks_status_priority": ("status", "priority"),
+    "ix_tasks_created_at_id": ("created_at", "id"),
+    "ix_tasks_status_lease_expires_at": ("status", "lease_expires_at"),
+}
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE tasks RENAME TO tasks_unpartitioned")
+    for name in _INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+    op.execute("UPDATE tasks_unpartitioned SET created_at = now() WHERE created_at IS NULL")
+    op.execute(
+        "CREATE TABLE tasks (LIKE tasks_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE tasks ALTER COLUMN created_at SET NOT NULL")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce(min(created_at), now()) AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC')
+                        + interval '{_MONTHS_AHEAD} months',
+                    interval '1 month'
+                )
+                FROM tasks_unpartitioned
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF tasks FOR VALUES FROM (%L) TO (%L)',
+                    'tasks_p' || to_char(month, 'YYYYMM'),
+                    month AT TIME ZONE 'UTC',
+                    (month + interval '1 month') AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute("INSERT INTO tasks SELECT * FROM tasks_unpartitioned")
+    op.execute("DROP TABLE tasks_unpartitioned")
+    # Ключ партиционирования обязан входить в первичный ключ.
+    op.execute("ALTER TABLE tasks ADD PRIMARY KEY (id, created_at)")
+    for name, columns in _INDEXES.items():
+        op.create_index(name, "tasks", list(columns))
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE tasks RENAME TO tasks_partitioned")
+    for name in _INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+    op.execute("ALTER INDEX tasks_pkey RENAME TO tasks_partitioned_pkey")
+    op.execute("CREATE TABLE tasks (LIKE tasks_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO tasks SELECT * FROM tasks_partitioned")
+    op.execute("DROP TABLE tasks_partitioned")
+    op.execute("ALTER TABLE tasks ADD PRIMARY KEY (id)")
+    for name, columns in _INDEXES.items():
+        op.create_index(name, "tasks", list(columns))
@@ -0,0 +1,76 @@
+"""replace tasks status indexes with list and partial indexes
+
+Revision ID: 20251204_0009
+Revises: 20251202_0008
+Create Date: 2025-12-04 00:09:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251204_0009"
+down_revision = "20251202_0008"
+branch_labels = None
+depends_on = None
+
+_ACTIVE_STATUSES = "status IN ('NEW', 'PENDING', 'IN_PROGRESS')"
+
+# Имя индекса -> (суффикс имени индекса партиции, определение). Суффиксы не должны
+# пересекаться с именами индексов партиций из 20251206_0010.
+_INDEXES = {
+    "ix_tasks_status_created_at": (
+        "status_created_at_id_idx",
+        "(status, created_at DESC, id DESC) INCLUDE (priority)",
+    ),
+    "ix_tasks_priority_created_at": (
+        "priority_created_at_id_idx",
+        "(priority, created_at DESC, id DESC) INCLUDE (status)",
+    ),
+    "ix_tasks_active_status_priority_created_at": (
+        "status_priority_created_at_id_idx",
+        f"(status, priority, created_at DESC, id DESC) WHERE {_ACTIVE_STATUSES}",
+    ),
+    "ix_tasks_in_progress_lease_expires_at": (
+        "lease_expires_at_idx",
+        "(lease_expires_at) WHERE status = 'IN_PROGRESS'",
+    ),
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX на партиционированной таблице строит индексы всех партиций под SHARE
+    # и блокирует запись. Поэтому индекс родителя создаётся пустым (ON ONLY), индексы
+    # партиций — CONCURRENTLY вне транзакции, а затем присоединяются к нему; индекс
+    # родителя становится валидным, когда присоединены все партиции.
+    with op.get_context().autocommit_block():
+        partitions = _partitions(op.get_bind())
+        for name, (suffix, definition) in _INDEXES.items():
+            op.execute(f"CREATE INDEX {name} ON ONLY tasks {definition}")
+            for partition in partitions:
+                index = f"{partition}_{suffix}"
+                op.execute(f'CREATE INDEX CONCURRENTLY "{index}" ON "{partition}" {definition}')
+                op.execute(f'ALTER INDEX {name} ATTACH PARTITION "{index}"')
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.drop_index("ix_tasks_status_priority", table_name="tasks")
+    op.drop_index("ix_tasks_status_lease_expires_at", table_name="tasks")
+
+
+def downgrade() -> None:
+    op.create_index("ix_tasks_status_lease_expires_at", "tasks", ["status", "lease_expires_at"])
+    op.create_index("ix_tasks_status_priority", "tasks", ["status", "priority"])
+    op.drop_index("ix_tasks_in_progress_lease_expires_at", table_name="tasks")
+    op.drop_index("ix_tasks_active_status_priority_created_at", table_name="tasks")
+    op.drop_index("ix_tasks_priority_created_at", table_name="tasks")
+    op.drop_index("ix_tasks_status_created_at", table_name="tasks")
+
+
+def _partitions(bind: sa.Connection) -> list[str]:
+    result = bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'tasks'::regclass ORDER BY c.relname"
+        )
+    )
+    return list(result.scalars())
@@ -0,0 +1,209 @@
+"""store tasks status/priority as native enums and JSON columns as JSONB
+
+Revision ID: 20251206_0010
+Revises: 20251204_0009
+Create Date: 2025-12-06 00:10:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251206_0010"
+down_revision = "20251204_0009"
+branch_labels = None
+depends_on = None
+
+_STATUSES = ("NEW", "PENDING", "IN_PROGRESS", "COMPLETED", "FAILED", "CANCELLED")
+_PRIORITIES = ("LOW", "MEDIUM", "HIGH")
+_ACTIVE_STATUSES = "IN ('NEW', 'PENDING', 'IN_PROGRESS')"
+_BATCH_SIZE = 5000
+
+# Колонки tasks, которые меняют тип: старая колонка -> (новая колонка, тип).
+_COLUMNS = {
+    "status": ("status_new", "task_status"),
+    "priority": ("priority_new", "task_priority"),
+    "input": ("input_new", "jsonb"),
+    "result": ("result_new", "jsonb"),
+}
+
+# Индексы, зависящие от меняющихся колонок: имя -> (суффикс имени индекса партиции,
+# определение над новыми колонками). После переименования колонок определения
+# совпадают с app.models.task.
+_INDEXES = {
+    "ix_tasks_status_created_at": (
+        "status_created_at",
+        "(status_new, created_at DESC, id DESC) INCLUDE (priority_new)",
+    ),
+    "ix_tasks_priority_created_at": (
+        "priority_created_at",
+        "(priority_new, created_at DESC, id DESC) INCLUDE (status_new)",
+    ),
+    "ix_tasks_active_status_priority_created_at": (
+        "active_status_priority_created_at",
+        f"(status_new, priority_new, created_at DESC, id DESC) WHERE status_new {_ACTIVE_STATUSES}",
+    ),
+    "ix_tasks_in_progress_lease_expires_at": (
+        "in_progress_lease_expires_at",
+        "(lease_expires_at) WHERE status_new = 'IN_PROGRESS'",
+    ),
+    "ix_tasks_result": ("result", "USING gin (result_new jsonb_path_ops)"),
+}
+
+
+# Онлайн-миграция в три шага, без перезаписи tasks под ACCESS EXCLUSIVE:
+# 1. рядом добавляются колонки новых типов (только каталог), триггер заполняет их
+#    при каждой вставке и обновлении;
+# 2. вне транзакции, по партициям и пачкам по первичному ключу, заполняются старые
+#    строки, строятся индексы (CONCURRENTLY на партициях, затем ATTACH к индексу
+#    родителя) и проверяются CHECK-ограничения NOT NULL;
+# 3. короткая транзакция удаляет старые колонки и переименовывает новые.
+# На время миграции остановите partition-maintenance: партиция, созданная посреди
+# шага 2, останется без заполненных индексов.
+def upgrade() -> None:
+    op.execute(f"CREATE TYPE task_status AS ENUM ({_quoted(_STATUSES)})")
+    op.execute(f"CREATE TYPE task_priority AS ENUM ({_quoted(_PRIORITIES)})")
+    # Outbox хранит только необработанные сообщения и мал: переводим его сразу.
+    op.execute(
+        "ALTER TABLE task_outbox ALTER COLUMN priority TYPE task_priority "
+        "USING priority::task_priority"
+    )
+    op.execute(
+        "ALTER TABLE tasks "
+        + ", ".join(f"ADD COLUMN {new} {type_}" for new, type_ in _COLUMNS.values())
+    )
+    assignments = "\n".join(
+        f"            NEW.{new} := NEW.{old}::{type_};" for old, (new, type_) in _COLUMNS.items()
+    )
+    op.execute(
+        f"""
+        CREATE FUNCTION tasks_sync_native_columns() RETURNS trigger AS $$
+        BEGIN
+{assignments}
+            RETURN NEW;
+        END $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_sync_native_columns BEFORE INSERT OR UPDATE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_sync_native_columns()"
+    )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        partitions = _partitions(bind)
+        for partition in partitions:
+            _backfill(bind, partition)
+            constraint = f"{partition}_native_not_null"
+            op.execute(
+                f'ALTER TABLE "{partition}" ADD CONSTRAINT "{constraint}" '
+                "CHECK (status_new IS NOT NULL AND priority_new IS NOT NULL) NOT VALID"
+            )
+            op.execute(f'ALTER TABLE "{partition}" VALIDATE CONSTRAINT "{constraint}"')
+        for name, (suffix, definition) in _INDEXES.items():
+            op.execute(f"CREATE INDEX {name}_new ON ONLY tasks {definition}")
+            for partition in partitions:
+                index = f"{partition}_{suffix}"
+                op.execute(f'CREATE INDEX CONCURRENTLY "{index}" ON "{partition}" {definition}')
+                op.execute(f'ALTER INDEX {name}_new ATTACH PARTITION "{index}"')
+
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("DROP TRIGGER tasks_sync_native_columns ON tasks")
+    op.execute("DROP FUNCTION tasks_sync_native_columns()")
+    # Проверенные CHECK позволяют SET NOT NULL не сканировать партиции.
+    op.execute(
+        "ALTER TABLE tasks ALTER COLUMN status_new SET NOT NULL, "
+        "ALTER COLUMN priority_new SET NOT NULL"
+    )
+    # Старые индексы по status и priority удаляются вместе с колонками.
+    op.execute("ALTER TABLE tasks " + ", ".join(f"DROP COLUMN {old}" for old in _COLUMNS))
+    for old, (new, _) in _COLUMNS.items():
+        op.execute(f"ALTER TABLE tasks RENAME COLUMN {new} TO {old}")
+    for name in _INDEXES:
+        op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+
+    with op.get_context().autocommit_block():
+        for partition in _partitions(op.get_bind()):
+            op.execute(
+                f'ALTER TABLE "{partition}" DROP CONSTRAINT IF EXISTS "{partition}_native_not_null"'
+            )
+
+
+def downgrade() -> None:
+    # Обратный перевод выполняется перезаписью таблицы: запускайте его в окно обслуживания.
+    # Индексы с условием по статусу пересоздаются, потому что их предикаты ссылаются
+    # на значения enum.
+    for name in _INDEXES:
+        op.drop_index(name, table_name="tasks")
+    op.execute(
+        "ALTER TABLE tasks "
+        "ALTER COLUMN status TYPE varchar(16) USING status::text, "
+        "ALTER COLUMN priority TYPE varchar(16) USING priority::text, "
+        "ALTER COLUMN input TYPE json USING input::json, "
+        "ALTER COLUMN result TYPE json USING result::json"
+    )
+    op.execute(
+        "ALTER TABLE task_outbox ALTER COLUMN priority TYPE varchar(16) USING priority::text"
+    )
+    op.execute("DROP TYPE task_priority")
+    op.execute("DROP TYPE task_status")
+    op.create_index(
+        "ix_tasks_status_created_at",
+        "tasks",
+        ["status", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_include=["priority"],
+    )
+    op.create_index(
+        "ix_tasks_priority_created_at",
+        "tasks",
+        ["priority", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_include=["status"],
+    )
+    op.create_index(
+        "ix_tasks_active_status_priority_created_at",
+        "tasks",
+        ["status", "priority", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text(f"status {_ACTIVE_STATUSES}"),
+    )
+    op.create_index(
+        "ix_tasks_in_progress_lease_expires_at",
+        "tasks",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status = 'IN_PROGRESS'"),
+    )
+
+
+def _quoted(values: tuple[str, ...]) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def _partitions(bind: sa.Connection) -> list[str]:
+    result = bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'tasks'::regclass ORDER BY c.relname"
+        )
+    )
+    return list(result.scalars())
+
+
+def _backfill(bind: sa.Connection, partition: str) -> None:
+    # Пачки идут по первичному ключу партиции и фиксируются по одной: строки блокируются
+    # ненадолго, а конкурентные записи заполняет триггер.
+    assignments = ", ".join(f"{new} = t.{old}::{type_}" for old, (new, type_) in _COLUMNS.items())
+    last_id = None
+    while True:
+        after = "" if last_id is None else "WHERE id > :last_id"
+        result = bind.execute(
+            sa.text(
+                f"WITH batch AS (SELECT id FROM \"{partition}\" {after} ORDER BY id LIMIT :limit) "
+                f'UPDATE "{partition}" AS t SET {assignments} '
+                "FROM batch WHERE t.id = batch.id RETURNING t.id"
+            ),
+            {"limit": _BATCH_SIZE, **({} if last_id is None else {"last_id": last_id})},
+        )
+        ids = list(result.scalars())
+        if not ids:
+            return
+        last_id = max(ids)
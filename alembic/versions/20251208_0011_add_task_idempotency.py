@@ -0,0 +1,61 @@
+"""add idempotency keys table and tasks content hash
+
+Revision ID: 20251208_0011
+Revises: 20251206_0010
+Create Date: 2025-12-08 00:11:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20251208_0011"
+down_revision = "20251206_0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_idempotency_keys",
+        sa.Column("key", sa.String(length=255), primary_key=True),
+        sa.Column("task_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_task_idempotency_keys_created_at",
+        "task_idempotency_keys",
+        ["created_at"],
+    )
+    # Колонка без значения по умолчанию добавляется мгновенно, без перезаписи партиций.
+    op.add_column("tasks", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    # Индекс строится на каждой партиции CONCURRENTLY и присоединяется к индексу родителя,
+    # как в миграции 20251206_0010.
+    definition = "(content_hash) WHERE content_hash IS NOT NULL"
+    with op.get_context().autocommit_block():
+        op.execute(f"CREATE INDEX ix_tasks_content_hash ON ONLY tasks {definition}")
+        result = op.get_bind().execute(
+            sa.text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'tasks'::regclass ORDER BY c.relname"
+            )
+        )
+        for partition in result.scalars().all():
+            index = f"{partition}_content_hash"
+            op.execute(f'CREATE INDEX CONCURRENTLY "{index}" ON "{partition}" {definition}')
+            op.execute(f'ALTER INDEX ix_tasks_content_hash ATTACH PARTITION "{index}"')
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_content_hash", table_name="tasks")
+    op.drop_column("tasks", "content_hash")
+    op.drop_index("ix_task_idempotency_keys_created_at", table_name="task_idempotency_keys")
+    op.drop_table("task_idempotency_keys")
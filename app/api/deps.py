@@ -1,10 +1,14 @@
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import TaskCache
+from app.core.config import settings
 from app.db import get_async_session
+from app.events import TaskEventHub
 from app.mq import TaskPublisherProtocol
-from app.repositories import TaskRepository
+from app.repositories import OutboxRepository, TaskRepository
 from app.services.task_service import TaskService
+from app.storage import BlobStore
 
 
 async def get_publisher(request: Request) -> TaskPublisherProtocol | None:
@@ -12,10 +16,32 @@ async def get_publisher(request: Request) -> TaskPublisherProtocol | None:
     return publisher
 
 
+async def get_task_cache(request: Request) -> TaskCache | None:
+    cache: TaskCache | None = getattr(request.app.state, "task_cache", None)
+    return cache
+
+
+async def get_task_events(request: Request) -> TaskEventHub | None:
+    events: TaskEventHub | None = getattr(request.app.state, "task_events", None)
+    return events
+
+
+async def get_blob_store(request: Request) -> BlobStore | None:
+    blob_store: BlobStore | None = getattr(request.app.state, "blob_store", None)
+    return blob_store
+
+
 async def get_task_service(
     session: AsyncSession = Depends(get_async_session),
     publisher: TaskPublisherProtocol | None = Depends(get_publisher),
+    cache: TaskCache | None = Depends(get_task_cache),
 ) -> TaskService:
-    repository = TaskRepository(session)
-    return TaskService(session=session, repository=repository, publisher=publisher)
+    repository = TaskRepository(session, cache=cache)
+    outbox = OutboxRepository(session) if settings.task_publish_mode == "outbox" else None
+    return TaskService(
+        session=session,
+        repository=repository,
+        publisher=publisher,
+        outbox=outbox,
+    )
 
@@ -1,22 +1,44 @@
 from __future__ import annotations
 
+import json
+import re
 import uuid
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic_core import to_json
+from starlette.background import BackgroundTask
 
-from app.api.deps import get_task_service
+from app.api.deps import get_blob_store, get_task_events, get_task_service
 from app.core.config import settings
-from app.models import TaskPriority, TaskStatus
-from app.schemas import TaskCreate, TaskList, TaskRead, TaskStatusSchema
-from app.services.task_service import TaskService
+from app.events import TaskEvent, TaskEventHub, TaskEventSubscription
+from app.models import TERMINAL_TASK_STATUSES, TaskPriority, TaskStatus
+from app.schemas import (
+    TASK_LIST_FIELDS,
+    TaskBatchCreate,
+    TaskBatchItemResult,
+    TaskBatchResult,
+    TaskCreate,
+    TaskList,
+    TaskRead,
+    TaskStatusSchema,
+)
+from app.services.task_service import TaskCountMode, TaskService
 from app.services.exceptions import (
+    IdempotencyKeyMismatchError,
+    InvalidCursorError,
     PublisherUnavailableError,
     TaskConflictError,
     TaskNotFoundError,
 )
+from app.storage import BlobStore
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+_RESULT_FILTER_PREFIX = "result."
+
 
 @router.post(
     "",
@@ -25,20 +47,62 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 )
 async def create_task(
     payload: TaskCreate,
+    idempotency_key: str | None = Header(
+        None,
+        alias="Idempotency-Key",
+        min_length=1,
+        max_length=255,
+    ),
     service: TaskService = Depends(get_task_service),
 ) -> TaskRead:
     try:
-        task = await service.create_task(payload)
+        task = await service.create_task(payload, idempotency_key=idempotency_key)
     except PublisherUnavailableError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=str(exc),
         ) from exc
+    except IdempotencyKeyMismatchError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    except TaskConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     return TaskRead.model_validate(task)
 
 
+@router.post(
+    "/batch",
+    response_model=TaskBatchResult,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_tasks_batch(
+    payload: TaskBatchCreate,
+    service: TaskService = Depends(get_task_service),
+) -> TaskBatchResult:
+    try:
+        results = await service.create_tasks(payload.items)
+    except PublisherUnavailableError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+        ) from exc
+    items = [
+        TaskBatchItemResult(
+            index=index,
+            task=TaskRead.model_validate(task),
+            error=error,
+        )
+        for index, (task, error) in enumerate(results)
+    ]
+    succeeded = sum(1 for item in items if item.error is None)
+    return TaskBatchResult(items=items, succeeded=succeeded, failed=len(items) - succeeded)
+
+
 @router.get("", response_model=TaskList)
 async def list_tasks(
+    request: Request,
     status_filter: TaskStatus | None = Query(None, alias="status"),
     priority_filter: TaskPriority | None = Query(None, alias="priority"),
     limit: int = Query(
@@ -47,32 +111,155 @@ async def list_tasks(
         le=settings.max_page_size,
     ),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(None),
+    count: TaskCountMode = Query("none"),
+    fields: str | None = Query(None),
     service: TaskService = Depends(get_task_service),
-) -> TaskList:
-    tasks, total = await service.list_tasks(
-        status=status_filter,
-        priority=priority_filter,
-        limit=limit,
-        offset=offset,
-    )
-    return TaskList(
-        items=[TaskRead.model_validate(task) for task in tasks],
-        total=total,
-        limit=limit,
-        offset=offset,
+) -> Response:
+    selected = _parse_fields(fields)
+    result_filter = _parse_result_filter(request)
+    try:
+        items, total, next_cursor = await service.list_tasks(
+            status=status_filter,
+            priority=priority_filter,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            count=count,
+            fields=selected,
+            result_filter=result_filter,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Строки проекции уже содержат только поля TaskSummary: сериализуем их напрямую,
+    # без построения pydantic-модели на каждую строку.
+    page = {
+        "items": items,
+        "total": total,
+        "limit": limit,
+        "offset": offset if cursor is None else 0,
+        "next_cursor": next_cursor,
+    }
+    return Response(content=to_json(page), media_type="application/json")
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    if fields is None:
+        return TASK_LIST_FIELDS
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in TASK_LIST_FIELDS]
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested",
+        )
+    return selected
+
+
+def _parse_result_filter(request: Request) -> dict | None:
+    # ?result.key=value и ?result.a.b=value собираются в один документ для сравнения
+    # через @> (GIN-индекс ix_tasks_result). Задачи с результатом во внешнем
+    # хранилище по нему не находятся.
+    result_filter: dict = {}
+    for name, raw in request.query_params.multi_items():
+        if not name.startswith(_RESULT_FILTER_PREFIX):
+            continue
+        *parents, key = name[len(_RESULT_FILTER_PREFIX):].split(".")
+        node = result_filter
+        for part in parents:
+            node = node.setdefault(part, {}) if isinstance(node, dict) else None
+        if not key or not all(parents) or not isinstance(node, dict) or key in node:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid result filter: {name}",
+            )
+        node[key] = _parse_result_value(raw)
+    return result_filter or None
+
+
+def _parse_result_value(raw: str) -> str | int | float | bool:
+    # Числа и true/false сравниваются как JSON-значения; строку из цифр можно
+    # запросить в кавычках: ?result.code="42".
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    return value if isinstance(value, (str, int, float, bool)) else raw
+
+
+@router.get("/events")
+async def stream_task_events(
+    task_ids: list[uuid.UUID] | None = Query(None, alias="task_id"),
+    service: TaskService = Depends(get_task_service),
+    events: TaskEventHub | None = Depends(get_task_events),
+) -> StreamingResponse:
+    if events is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Task events are not available",
+        )
+    # Подписка оформляется до снимка статусов, чтобы не пропустить переход между ними;
+    # если снимок не удался, подписку сразу закрываем, иначе она осталась бы в хабе.
+    subscription = events.subscribe(task_ids)
+    snapshot: list[TaskEvent] = []
+    pending: set[uuid.UUID] | None = None
+    try:
+        if task_ids:
+            statuses = await service.get_task_statuses(task_ids)
+            snapshot = [
+                TaskEvent(task_id, task_status) for task_id, task_status in statuses.items()
+            ]
+            pending = {
+                task_id
+                for task_id, task_status in statuses.items()
+                if task_status not in TERMINAL_TASK_STATUSES
+            }
+    except BaseException:
+        subscription.close()
+        raise
+    # Фоновая задача закрывает подписку и тогда, когда генератор потока так и не запустился
+    # (клиент ушёл до начала ответа); повторное закрытие безопасно.
+    return StreamingResponse(
+        _event_stream(subscription, snapshot, pending),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close),
     )
 
 
+async def _event_stream(
+    subscription: TaskEventSubscription,
+    snapshot: list[TaskEvent],
+    pending: set[uuid.UUID] | None,
+) -> AsyncIterator[str]:
+    # Поток с фильтром по task_id закрывается, когда все задачи дошли до терминального статуса.
+    with subscription:
+        for event in snapshot:
+            yield _format_event(event)
+        while pending is None or pending:
+            event = await subscription.get(timeout=settings.task_events_heartbeat_interval)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_event(event)
+            if pending is not None and event.status in TERMINAL_TASK_STATUSES:
+                pending.discard(event.task_id)
+
+
+def _format_event(event: TaskEvent) -> str:
+    data = json.dumps({"task_id": str(event.task_id), "status": event.status.value})
+    return f"event: status\ndata: {data}\n\n"
+
+
 @router.get("/{task_id}", response_model=TaskRead)
 async def get_task(
     task_id: uuid.UUID,
     service: TaskService = Depends(get_task_service),
 ) -> TaskRead:
     try:
-        task = await service.get_task(task_id)
+        return await service.get_task_view(task_id)
     except TaskNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found") from exc
-    return TaskRead.model_validate(task)
 
 
 @router.delete("/{task_id}", response_model=TaskRead)
@@ -89,14 +276,102 @@ async def cancel_task(
     return TaskRead.model_validate(task)
 
 
+@router.get("/{task_id}/wait", response_model=TaskRead)
+async def wait_for_task(
+    task_id: uuid.UUID,
+    timeout: float = Query(default=30.0, ge=0, le=settings.task_wait_max_timeout),
+    service: TaskService = Depends(get_task_service),
+    events: TaskEventHub | None = Depends(get_task_events),
+) -> TaskRead:
+    if events is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Task events are not available",
+        )
+    try:
+        return await service.wait_for_task(task_id, timeout=timeout, events=events)
+    except TaskNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found") from exc
+
+
 @router.get("/{task_id}/status", response_model=TaskStatusSchema)
 async def get_task_status(
     task_id: uuid.UUID,
     service: TaskService = Depends(get_task_service),
 ) -> TaskStatusSchema:
+    try:
+        task_status = await service.get_task_status(task_id)
+    except TaskNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found") from exc
+    return TaskStatusSchema(status=task_status)
+
+
+@router.get("/{task_id}/result")
+async def get_task_result(
+    task_id: uuid.UUID,
+    range_header: str | None = Header(None, alias="Range"),
+    service: TaskService = Depends(get_task_service),
+    blob_store: BlobStore | None = Depends(get_blob_store),
+) -> Response:
     try:
         task = await service.get_task(task_id)
     except TaskNotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found") from exc
-    return TaskStatusSchema(status=task.status)
+    if task.result_ref is None:
+        if task.result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task result is not available",
+            )
+        return JSONResponse(task.result)
+    if blob_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Result storage is not available",
+        )
+    size = await blob_store.size(task.result_ref)
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task result is not available",
+        )
+    byte_range = _parse_range(range_header, size)
+    headers = {"Accept-Ranges": "bytes"}
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            blob_store.read(task.result_ref),
+            media_type="application/json",
+            headers=headers,
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.read(task.result_ref, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/json",
+        headers=headers,
+    )
 
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    # Поддерживается один диапазон; непонятный заголовок игнорируется (RFC 9110),
+    # а диапазон за пределами результата даёт 416.
+    match = _RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
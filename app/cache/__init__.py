@@ -0,0 +1,4 @@
+from .backend import CacheBackend, InMemoryCacheBackend
+from .task_cache import TaskCache, build_task_cache
+
+__all__ = ["CacheBackend", "InMemoryCacheBackend", "TaskCache", "build_task_cache"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+
+from app.cache.backend import CacheBackend, InMemoryCacheBackend
+from app.core.config import settings
+from app.models import TERMINAL_TASK_STATUSES, TaskStatus
+
+
+class TaskCache:
+    def __init__(self, backend: CacheBackend, ttl: float | None = None) -> None:
+        self.backend = backend
+        self.ttl = ttl or settings.task_cache_ttl
+
+    async def get_task(self, task_id: uuid.UUID) -> dict | None:
+        return await self.backend.get(self._task_key(task_id))
+
+    async def set_task(self, task_id: uuid.UUID, data: dict, status: TaskStatus) -> None:
+        await self.backend.set(self._task_key(task_id), data, self._ttl_for(status))
+
+    async def get_status(self, task_id: uuid.UUID) -> TaskStatus | None:
+        value = await self.backend.get(self._status_key(task_id))
+        return TaskStatus(value) if value is not None else None
+
+    async def set_status(self, task_id: uuid.UUID, status: TaskStatus) -> None:
+        await self.backend.set(self._status_key(task_id), status.value, self._ttl_for(status))
+
+    async def invalidate(self, task_ids: Iterable[uuid.UUID]) -> None:
+        keys = [key for task_id in task_ids for key in self._keys(task_id)]
+        if keys:
+            await self.backend.delete(*keys)
+
+    def _ttl_for(self, status: TaskStatus) -> float | None:
+        # Терминальные статусы больше не меняются, поэтому кэшируются бессрочно. Остальные
+        # живут ttl секунд: процесс воркера может не иметь доступа к кэшу API.
+        return None if status in TERMINAL_TASK_STATUSES else self.ttl
+
+    def _keys(self, task_id: uuid.UUID) -> tuple[str, str]:
+        return self._task_key(task_id), self._status_key(task_id)
+
+    @staticmethod
+    def _task_key(task_id: uuid.UUID) -> str:
+        return f"task:{task_id}"
+
+    @staticmethod
+    def _status_key(task_id: uuid.UUID) -> str:
+        return f"task-status:{task_id}"
+
+
+def build_task_cache() -> TaskCache | None:
+    if settings.task_cache_backend == "none":
+        return None
+    return TaskCache(InMemoryCacheBackend(max_entries=settings.task_cache_max_entries))
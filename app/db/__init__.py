@@ -1,4 +1,4 @@
-from .session import async_session_factory, get_async_session, Base
+from .session import async_session_factory, engine, get_async_session, Base
 
-__all__ = ["async_session_factory", "get_async_session", "Base"]
+__all__ = ["async_session_factory", "engine", "get_async_session", "Base"]
 
@@ -1,19 +1,33 @@
+import time
 from collections.abc import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.metrics import DB_POOL_CHECKOUT_WAIT
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # У пула нет события «до выдачи соединения», поэтому ожидание меряем вокруг _do_get.
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.database_echo,
     pool_pre_ping=True,
+    **({"poolclass": InstrumentedQueuePool} if settings.metrics_enabled else {}),
 )
 
 async_session_factory = async_sessionmaker(
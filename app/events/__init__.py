@@ -0,0 +1,4 @@
+from .hub import TaskEvent, TaskEventHub, TaskEventSubscription
+from .listener import PostgresTaskEventListener
+
+__all__ = ["PostgresTaskEventListener", "TaskEvent", "TaskEventHub", "TaskEventSubscription"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from app.models import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    task_id: uuid.UUID
+    status: TaskStatus
+
+
+class TaskEventSubscription:
+    def __init__(
+        self,
+        hub: TaskEventHub,
+        task_ids: frozenset[uuid.UUID] | None,
+        max_queue: int,
+    ) -> None:
+        self.hub = hub
+        self.task_ids = task_ids
+        self.queue: asyncio.Queue[TaskEvent] = asyncio.Queue(maxsize=max_queue)
+
+    async def get(self, timeout: float | None = None) -> TaskEvent | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+    def __enter__(self) -> TaskEventSubscription:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class TaskEventHub:
+    def __init__(self, max_queue: int = 1000) -> None:
+        self.max_queue = max_queue
+        self._by_task: dict[uuid.UUID, set[TaskEventSubscription]] = {}
+        self._wildcard: set[TaskEventSubscription] = set()
+
+    def subscribe(self, task_ids: Iterable[uuid.UUID] | None = None) -> TaskEventSubscription:
+        ids = frozenset(task_ids) if task_ids is not None else None
+        subscription = TaskEventSubscription(self, ids, self.max_queue)
+        if ids is None:
+            self._wildcard.add(subscription)
+        else:
+            for task_id in ids:
+                self._by_task.setdefault(task_id, set()).add(subscription)
+        return subscription
+
+    def publish(self, event: TaskEvent) -> None:
+        for subscription in (*self._by_task.get(event.task_id, ()), *self._wildcard):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning("Dropping task event for slow subscriber: %s", event.task_id)
+
+    def _unsubscribe(self, subscription: TaskEventSubscription) -> None:
+        if subscription.task_ids is None:
+            self._wildcard.discard(subscription)
+            return
+        for task_id in subscription.task_ids:
+            subscribers = self._by_task.get(task_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_task[task_id]
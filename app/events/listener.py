@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+
+import asyncpg
+
+from app.cache import TaskCache
+from app.core.config import settings
+from app.events.hub import TaskEvent, TaskEventHub
+from app.models import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresTaskEventListener:
+    def __init__(
+        self,
+        hub: TaskEventHub,
+        cache: TaskCache | None = None,
+        dsn: str | None = None,
+        channel: str | None = None,
+    ) -> None:
+        self.hub = hub
+        self.cache = cache
+        self.dsn = dsn or settings.database_url.replace("postgresql+asyncpg://", "postgresql://")
+        self.channel = channel or settings.task_events_channel
+        self._runner: asyncio.Task | None = None
+        self._invalidations: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    async def _run(self) -> None:
+        # Одно соединение LISTEN на процесс API; при обрыве переподключаемся. Уведомления,
+        # пропущенные во время обрыва, ожидающие подхватывают периодической перепроверкой БД.
+        while True:
+            connection: asyncpg.Connection | None = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Task event listener disconnected: %s", exc)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(1)
+
+    def _on_notification(self, connection: object, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            event = TaskEvent(task_id=uuid.UUID(data["task_id"]), status=TaskStatus(data["status"]))
+        except (ValueError, KeyError) as exc:
+            logger.error("Invalid task event payload: %s", exc)
+            return
+        if self.cache is not None:
+            # Переходы, сделанные воркером, заодно сбрасывают in-memory кэш этого процесса.
+            task = asyncio.get_running_loop().create_task(self.cache.invalidate([event.task_id]))
+            self._invalidations.add(task)
+            task.add_done_callback(self._invalidations.discard)
+        self.hub.publish(event)
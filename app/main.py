@@ -1,23 +1,78 @@
 from __future__ import annotations
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.api import api_router
+from app.cache import build_task_cache
 from app.core.config import settings
-from app.mq import TaskQueuePublisher
+from app.db import async_session_factory
+from app.events import PostgresTaskEventListener, TaskEventHub
+from app.metrics.http import instrument_app, metrics_router
+from app.mq import InMemoryTaskBroker, OutboxRelay, TaskQueuePublisher
+from app.storage import build_blob_store
+from app.workers import QueueWorker
+from app.workers.reaper import LeaseReaper
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    publisher = TaskQueuePublisher()
-    await publisher.connect()
-    app.state.publisher = publisher
+    app.state.task_cache = build_task_cache()
+    app.state.task_events = TaskEventHub()
+    app.state.blob_store = build_blob_store()
+    # Один LISTEN на процесс API; уведомления раздаются ожидающим из памяти.
+    listener: PostgresTaskEventListener | None = None
+    try:
+        if settings.database_url.startswith("postgresql"):
+            listener = PostgresTaskEventListener(
+                app.state.task_events,
+                cache=app.state.task_cache,
+            )
+            await listener.start()
+        if settings.broker_backend == "memory":
+            async with _embedded_broker(app):
+                yield
+        else:
+            publisher: TaskQueuePublisher | None = None
+            # В режиме outbox публикацией занимается отдельный релей, API брокер не нужен.
+            if settings.task_publish_mode == "direct":
+                publisher = TaskQueuePublisher()
+                await publisher.connect()
+                app.state.publisher = publisher
+            try:
+                yield
+            finally:
+                if publisher is not None:
+                    await publisher.close()
+    finally:
+        if listener is not None:
+            await listener.stop()
+
+
+@asynccontextmanager
+async def _embedded_broker(app: FastAPI):
+    # Очередь в памяти видна только этому процессу, поэтому воркер, реапер (и релей outbox)
+    # запускаются здесь же; кэш у них с API общий.
+    broker = InMemoryTaskBroker()
+    worker = QueueWorker(consumer=broker, cache=app.state.task_cache)
+    reaper = LeaseReaper(async_session_factory, broker)
+    background = [asyncio.create_task(worker.start()), asyncio.create_task(reaper.run())]
+    relay: OutboxRelay | None = None
+    if settings.task_publish_mode == "outbox":
+        relay = OutboxRelay(async_session_factory, broker)
+        background.append(asyncio.create_task(relay.run()))
+    else:
+        app.state.publisher = broker
     try:
         yield
     finally:
-        await publisher.close()
+        if relay is not None:
+            relay.stop()
+        reaper.stop()
+        await worker.drain()
+        await asyncio.gather(*background, return_exceptions=True)
 
 
 app = FastAPI(
@@ -26,4 +81,7 @@ app = FastAPI(
     lifespan=lifespan,
 )
 app.include_router(api_router)
+if settings.metrics_enabled:
+    instrument_app(app)
+    app.include_router(metrics_router)
 
@@ -0,0 +1,35 @@
+from .registry import (
+    DB_POOL_CHECKOUT_WAIT,
+    HTTP_REQUEST_DURATION,
+    LEASES_RECLAIMED,
+    PUBLISH_CONFIRMS,
+    PUBLISH_DURATION,
+    PUBLISH_FAILURES,
+    PUBLISH_IN_FLIGHT,
+    PUBLISH_WINDOW_WAIT,
+    TASKS_DEDUPLICATED,
+    TASK_PARTITIONS,
+    TASK_QUEUE_WAIT,
+    TASK_RUN_DURATION,
+    WORKER_CONCURRENCY_LIMIT,
+    WORKER_IN_FLIGHT,
+    render_latest,
+)
+
+__all__ = [
+    "DB_POOL_CHECKOUT_WAIT",
+    "HTTP_REQUEST_DURATION",
+    "LEASES_RECLAIMED",
+    "PUBLISH_CONFIRMS",
+    "PUBLISH_DURATION",
+    "PUBLISH_FAILURES",
+    "PUBLISH_IN_FLIGHT",
+    "PUBLISH_WINDOW_WAIT",
+    "TASKS_DEDUPLICATED",
+    "TASK_PARTITIONS",
+    "TASK_QUEUE_WAIT",
+    "TASK_RUN_DURATION",
+    "WORKER_CONCURRENCY_LIMIT",
+    "WORKER_IN_FLIGHT",
+    "render_latest",
+]
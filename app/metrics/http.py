@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+
+from fastapi import APIRouter, FastAPI, Request, Response
+
+from app.metrics.registry import HTTP_REQUEST_DURATION, render_latest
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+def instrument_app(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def record_request_duration(request: Request, call_next):
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                method=request.method,
+                route=_route_template(request),
+                status=str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+def _route_template(request: Request) -> str:
+    # Шаблон маршрута вместо фактического пути, чтобы UUID не раздували кардинальность.
+    # route.path вложенного роутера не содержит префиксов, поэтому восстанавливаем
+    # шаблон из пути запроса и значений path-параметров.
+    if request.scope.get("route") is None:
+        return "unmatched"
+    path = request.url.path
+    for name, value in request.path_params.items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Бакеты покрывают диапазон от долей миллисекунды (пул БД) до минут (ожидание в очереди).
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=FAST_BUCKETS,
+)
+PUBLISH_DURATION = Histogram(
+    "task_publish_duration_seconds",
+    "Time to publish task messages to RabbitMQ including broker confirms",
+    ["mode"],
+    buckets=FAST_BUCKETS,
+)
+PUBLISH_FAILURES = Counter(
+    "task_publish_failures_total",
+    "Task messages the broker did not confirm",
+)
+PUBLISH_CONFIRMS = Counter(
+    "task_publish_confirms_total",
+    "Task messages confirmed by the broker",
+)
+PUBLISH_IN_FLIGHT = Gauge(
+    "task_publish_in_flight",
+    "Publishes awaiting a broker confirm",
+)
+PUBLISH_WINDOW_WAIT = Histogram(
+    "task_publish_window_wait_seconds",
+    "Time a publish waited for a free slot in the in-flight window",
+    buckets=FAST_BUCKETS,
+)
+TASK_QUEUE_WAIT = Histogram(
+    "task_queue_wait_seconds",
+    "Time between task creation and the start of processing",
+    ["priority"],
+    buckets=SLOW_BUCKETS,
+)
+TASK_RUN_DURATION = Histogram(
+    "task_run_duration_seconds",
+    "Task processing time by priority and outcome",
+    ["priority", "status"],
+    buckets=SLOW_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=FAST_BUCKETS,
+)
+LEASES_RECLAIMED = Counter(
+    "task_leases_reclaimed_total",
+    "IN_PROGRESS tasks with an expired lease taken back by the reaper",
+    ["outcome"],
+)
+TASKS_DEDUPLICATED = Counter(
+    "tasks_deduplicated_total",
+    "POST /tasks requests answered with an existing task instead of creating a new one",
+    ["reason"],
+)
+TASK_PARTITIONS = Counter(
+    "task_partitions_total",
+    "Partitions of the tasks table created or archived by the maintenance job",
+    ["action"],
+)
+WORKER_IN_FLIGHT = Gauge(
+    "worker_in_flight_tasks",
+    "Deliveries currently being processed by the worker",
+)
+WORKER_CONCURRENCY_LIMIT = Gauge(
+    "worker_concurrency_limit",
+    "Current worker concurrency limit",
+)
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
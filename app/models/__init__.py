@@ -1,4 +1,12 @@
-from .task import Task, TaskPriority, TaskStatus
-
-__all__ = ["Task", "TaskPriority", "TaskStatus"]
+from .idempotency import TaskIdempotencyKey
+from .outbox import TaskOutbox
+from .task import TERMINAL_TASK_STATUSES, Task, TaskPriority, TaskStatus
 
+__all__ = [
+    "TERMINAL_TASK_STATUSES",
+    "Task",
+    "TaskIdempotencyKey",
+    "TaskOutbox",
+    "TaskPriority",
+    "TaskStatus",
+]
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+
+class TaskIdempotencyKey(Base):
+    # Отдельная непартиционированная таблица: уникальный индекс на партиционированной
+    # tasks обязан включать created_at, и уникальность ключа там не выразить.
+    __tablename__ = "task_idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(length=255), primary_key=True)
+    task_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # Хеш тела запроса: повтор с тем же ключом, но другим телом отклоняется.
+    request_hash: Mapped[str] = mapped_column(String(length=64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
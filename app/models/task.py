@@ -1,9 +1,9 @@
 import enum
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Enum, Index, JSON, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DateTime, Enum, Index, Integer, JSON, String, Text, desc, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db import Base
@@ -24,10 +24,71 @@ class TaskStatus(str, enum.Enum):
     CANCELLED = "CANCELLED"
 
 
+TERMINAL_TASK_STATUSES = frozenset(
+    {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED}
+)
+
+
+_JSON_TYPE = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
 class Task(Base):
+    # В PostgreSQL таблица партиционирована по месяцам created_at, первичный ключ
+    # (id, created_at) — см. миграцию 20251202_0008 и app.workers.partitions.
     __tablename__ = "tasks"
     __table_args__ = (
-        Index("ix_tasks_status_priority", "status", "priority"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Индексы под фильтры списка задач: порядок совпадает с ORDER BY created_at DESC,
+        # id DESC, так что страница читается из индекса без сортировки. INCLUDE позволяет
+        # отдавать ?fields=id,status,priority,created_at сканированием только индекса.
+        Index(
+            "ix_tasks_status_created_at",
+            "status",
+            desc("created_at"),
+            desc("id"),
+            postgresql_include=["priority"],
+        ),
+        Index(
+            "ix_tasks_priority_created_at",
+            "priority",
+            desc("created_at"),
+            desc("id"),
+            postgresql_include=["status"],
+        ),
+        # Большинство строк завершены; частичный индекс по активным статусам остаётся
+        # маленьким и обслуживает выборки вида status=PENDING&priority=HIGH.
+        Index(
+            "ix_tasks_active_status_priority_created_at",
+            "status",
+            "priority",
+            desc("created_at"),
+            desc("id"),
+            postgresql_where=text("status IN ('NEW', 'PENDING', 'IN_PROGRESS')"),
+        ),
+        # Реапер просматривает только диапазон IN_PROGRESS с истёкшей арендой.
+        Index(
+            "ix_tasks_in_progress_lease_expires_at",
+            "lease_expires_at",
+            postgresql_where=text("status = 'IN_PROGRESS'"),
+        ),
+        # Поиск незавершённой задачи с тем же содержимым (TASK_DEDUP_IN_FLIGHT).
+        Index(
+            "ix_tasks_content_hash",
+            "content_hash",
+            postgresql_where=text("content_hash IS NOT NULL"),
+        ),
+        # Фильтры ?result.key=value в списке задач: jsonb_path_ops обслуживает только @>,
+        # зато индекс заметно меньше обычного GIN по jsonb.
+        Index(
+            "ix_tasks_result",
+            "result",
+            postgresql_using="gin",
+            postgresql_ops={"result": "jsonb_path_ops"},
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -37,22 +98,43 @@ class Task(Base):
     )
     title: Mapped[str] = mapped_column(String(length=255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # В PostgreSQL статус и приоритет — нативные enum-типы (4 байта вместо строки),
+    # JSON-колонки — JSONB (миграция 20251206_0010). SQLite в тестах хранит строки и JSON.
     priority: Mapped[TaskPriority] = mapped_column(
-        Enum(TaskPriority, name="task_priority", native_enum=False),
+        Enum(TaskPriority, name="task_priority"),
         nullable=False,
     )
     status: Mapped[TaskStatus] = mapped_column(
-        Enum(TaskStatus, name="task_status", native_enum=False),
+        Enum(TaskStatus, name="task_status"),
         nullable=False,
         default=TaskStatus.NEW,
     )
+    # Время проставляется приложением, чтобы формат created_at совпадал с параметрами
+    # keyset-курсора на всех диалектах (SQLite хранит func.now() без микросекунд).
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        default=_utcnow,
         server_default=func.now(),
         nullable=False,
     )
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Входные данные задачи; вместе с остальными полями уходят в сообщение очереди.
+    input: Mapped[dict | None] = mapped_column(_JSON_TYPE, nullable=True)
+    result: Mapped[dict | None] = mapped_column(_JSON_TYPE, nullable=True)
+    # Ключ результата во внешнем хранилище; при нём result пуст.
+    result_ref: Mapped[str | None] = mapped_column(String(length=255), nullable=True)
+    result_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # SHA-256 содержимого задачи; заполняется, только если включена дедупликация.
+    content_hash: Mapped[str | None] = mapped_column(String(length=64), nullable=True)
+    # Число начатых запусков: увеличивается при каждом захвате задачи воркером.
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Аренда задачи воркером: продлевается, пока задача выполняется, и по истечении
+    # позволяет реаперу вернуть задачу в очередь.
+    worker_id: Mapped[str | None] = mapped_column(String(length=128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
+    @property
+    def result_offloaded(self) -> bool:
+        return self.result_ref is not None
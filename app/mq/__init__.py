@@ -1,4 +1,19 @@
-from .publisher import TaskQueuePublisher, TaskPublisherProtocol
-
-__all__ = ["TaskQueuePublisher", "TaskPublisherProtocol"]
+from .codec import TaskMessage, decode_task_message, encode_task_message
+from .consumer import RabbitMQTaskConsumer, TaskConsumerProtocol, TaskDelivery
+from .memory import InMemoryTaskBroker
+from .outbox_relay import OutboxRelay
+from .publisher import PublisherStats, TaskQueuePublisher, TaskPublisherProtocol
 
+__all__ = [
+    "InMemoryTaskBroker",
+    "OutboxRelay",
+    "PublisherStats",
+    "RabbitMQTaskConsumer",
+    "TaskConsumerProtocol",
+    "TaskDelivery",
+    "TaskMessage",
+    "TaskQueuePublisher",
+    "TaskPublisherProtocol",
+    "decode_task_message",
+    "encode_task_message",
+]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Literal
+
+import msgpack
+
+from app.models import Task, TaskPriority, TaskStatus
+
+MessageFormat = Literal["json", "msgpack"]
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+CONTENT_TYPES: dict[str, str] = {
+    "json": JSON_CONTENT_TYPE,
+    "msgpack": MSGPACK_CONTENT_TYPE,
+}
+
+
+@dataclass(frozen=True)
+class TaskMessage:
+    task_id: uuid.UUID
+    priority: TaskPriority | None = None
+    title: str | None = None
+    description: str | None = None
+    input: dict | None = None
+    created_at: datetime | None = None
+
+    @classmethod
+    def from_task(cls, task: Task) -> TaskMessage:
+        return cls(
+            task_id=task.id,
+            priority=task.priority,
+            title=task.title,
+            description=task.description,
+            input=task.input,
+            created_at=task.created_at,
+        )
+
+    @property
+    def authoritative(self) -> bool:
+        # Поля задачи после создания не меняются, поэтому сообщение, собранное из полной
+        # задачи, заменяет воркеру чтение строки. Сообщения только с task_id (outbox,
+        # повторы, старые продюсеры) воркер дополняет из БД.
+        return self.priority is not None and self.title is not None and self.created_at is not None
+
+    def to_task(self, *, attempts: int, started_at: datetime, worker_id: str | None) -> Task:
+        # Объект не добавляется в сессию: итоговый статус пишется bulk UPDATE по id.
+        return Task(
+            id=self.task_id,
+            title=self.title,
+            description=self.description,
+            priority=self.priority,
+            input=self.input,
+            status=TaskStatus.IN_PROGRESS,
+            created_at=self.created_at,
+            started_at=started_at,
+            attempts=attempts,
+            worker_id=worker_id,
+        )
+
+
+def encode_task_message(message: TaskMessage, message_format: MessageFormat) -> bytes:
+    if message_format == "msgpack":
+        # Короткие ключи, UUID в 16 байтах и время в расширении Timestamp.
+        return msgpack.packb(
+            {
+                "id": message.task_id.bytes,
+                "p": message.priority.value if message.priority is not None else None,
+                "t": message.title,
+                "d": message.description,
+                "i": message.input,
+                "c": _aware(message.created_at),
+            },
+            datetime=True,
+        )
+    return json.dumps(
+        {
+            "task_id": str(message.task_id),
+            "priority": message.priority.value if message.priority is not None else None,
+            "title": message.title,
+            "description": message.description,
+            "input": message.input,
+            "created_at": message.created_at.isoformat() if message.created_at else None,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def decode_task_message(body: bytes, content_type: str | None) -> TaskMessage:
+    # Формат определяется content_type каждого сообщения, поэтому воркер читает и JSON,
+    # и msgpack, пока продюсеры переключаются между ними.
+    try:
+        if content_type == MSGPACK_CONTENT_TYPE:
+            data = msgpack.unpackb(body, timestamp=3)
+            task_id = uuid.UUID(bytes=data["id"])
+            created_at = data.get("c")
+            priority, title, description, task_input = (data.get(key) for key in "ptdi")
+        else:
+            data = json.loads(body.decode("utf-8"))
+            task_id = uuid.UUID(data["task_id"])
+            created_at = data.get("created_at")
+            if created_at is not None:
+                created_at = datetime.fromisoformat(created_at)
+            priority, title, description, task_input = (
+                data.get(key) for key in ("priority", "title", "description", "input")
+            )
+        return TaskMessage(
+            task_id=task_id,
+            priority=TaskPriority(priority) if priority is not None else None,
+            title=title,
+            description=description,
+            input=task_input,
+            created_at=_aware(created_at),
+        )
+    except (KeyError, TypeError, AttributeError) as exc:
+        raise ValueError(f"Malformed task message: {exc!r}") from exc
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # SQLite отдаёт naive-datetime; msgpack Timestamp требует явного часового пояса.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
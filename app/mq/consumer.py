@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Protocol
+
+import aio_pika
+from aio_pika import Message, RobustChannel, RobustConnection
+from aio_pika.abc import AbstractQueue
+
+from app.core.config import settings
+from app.models import TaskPriority
+from app.mq.publisher import TaskQueuePublisher
+from app.mq.topology import (
+    dead_letter_queue_name,
+    declared_queues,
+    queue_arguments,
+    retry_queue_name,
+    routing_key,
+)
+
+
+class TaskDelivery(Protocol):
+    body: bytes
+    content_type: str | None
+    delivery_tag: int
+
+    def process(self, requeue: bool = False) -> AbstractAsyncContextManager[Any]:
+        ...
+
+    async def ack(self, multiple: bool = False) -> None:
+        ...
+
+    async def reject(self, requeue: bool = False) -> None:
+        ...
+
+
+DeliveryCallback = Callable[[TaskDelivery], Awaitable[Any]]
+
+
+class TaskConsumerProtocol(Protocol):
+    async def connect(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+    async def set_prefetch(self, count: int) -> None:
+        ...
+
+    async def consume(
+        self,
+        callback: DeliveryCallback,
+        priority: TaskPriority | None = None,
+    ) -> str:
+        ...
+
+    async def cancel(self, consumer_tag: str) -> None:
+        ...
+
+    async def schedule_retry(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempt: int,
+        delay: float,
+    ) -> None:
+        ...
+
+    async def dead_letter(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempts: int,
+        error: str,
+    ) -> None:
+        ...
+
+
+def dead_letter_body(
+    task_id: uuid.UUID,
+    priority: TaskPriority,
+    attempts: int,
+    error: str,
+) -> bytes:
+    return json.dumps(
+        {
+            "task_id": str(task_id),
+            "priority": priority.value,
+            "attempts": attempts,
+            "error": error,
+        }
+    ).encode("utf-8")
+
+
+class RabbitMQTaskConsumer(TaskConsumerProtocol):
+    def __init__(
+        self,
+        queue_name: str | None = None,
+        url: str | None = None,
+        topology: str | None = None,
+    ) -> None:
+        self.queue_name = queue_name or settings.rabbitmq_queue
+        self.url = url or settings.rabbitmq_url
+        self.topology = topology or settings.rabbitmq_queue_topology
+        self._connection: RobustConnection | None = None
+        self._channel: RobustChannel | None = None
+        self._queues: dict[TaskPriority | None, AbstractQueue] = {}
+        self._consumer_queues: dict[str, AbstractQueue] = {}
+        self._retry_queues: set[str] = set()
+
+    async def connect(self) -> None:
+        if self._connection and not self._connection.is_closed:
+            return
+        self._connection = await aio_pika.connect_robust(self.url)
+        # Подтверждения нужны для публикаций повторов и dead-letter с этого же канала.
+        self._channel = await self._connection.channel(publisher_confirms=True)
+        self._queues = {
+            priority: await self._channel.declare_queue(
+                name,
+                durable=True,
+                arguments=queue_arguments(self.topology),
+            )
+            for priority, name in declared_queues(self.queue_name, self.topology).items()
+        }
+        await self._channel.declare_queue(dead_letter_queue_name(self.queue_name), durable=True)
+
+    async def close(self) -> None:
+        if self._channel and not self._channel.is_closed:
+            await self._channel.close()
+        if self._connection and not self._connection.is_closed:
+            await self._connection.close()
+        self._channel = None
+        self._connection = None
+        self._queues = {}
+        self._retry_queues = set()
+
+    async def set_prefetch(self, count: int) -> None:
+        if self._channel is not None and not self._channel.is_closed:
+            await self._channel.set_qos(prefetch_count=count)
+
+    async def consume(
+        self,
+        callback: DeliveryCallback,
+        priority: TaskPriority | None = None,
+    ) -> str:
+        queue = self._queues.get(priority)
+        if queue is None:
+            raise RuntimeError(f"RabbitMQ queue for priority {priority} is not declared")
+        consumer_tag = await queue.consume(callback)
+        self._consumer_queues[consumer_tag] = queue
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str) -> None:
+        queue = self._consumer_queues.pop(consumer_tag, None)
+        # После закрытия канала брокер уже снял подписку сам.
+        if queue is not None and self._channel is not None and not self._channel.is_closed:
+            await queue.cancel(consumer_tag)
+
+    async def schedule_retry(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempt: int,
+        delay: float,
+    ) -> None:
+        channel = self._require_channel()
+        target = routing_key(priority, self.queue_name, self.topology)
+        name = retry_queue_name(target, attempt)
+        if name not in self._retry_queues:
+            # Истёкшие по TTL сообщения RabbitMQ сам перекладывает в рабочую очередь.
+            await channel.declare_queue(
+                name,
+                durable=True,
+                arguments={"x-dead-letter-exchange": "", "x-dead-letter-routing-key": target},
+            )
+            self._retry_queues.add(name)
+        await channel.default_exchange.publish(
+            Message(
+                body=json.dumps({"task_id": str(task_id)}).encode("utf-8"),
+                priority=TaskQueuePublisher.PRIORITY_MAP.get(priority, 5),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                content_type="application/json",
+                expiration=delay,
+            ),
+            routing_key=name,
+        )
+
+    async def dead_letter(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempts: int,
+        error: str,
+    ) -> None:
+        await self._require_channel().default_exchange.publish(
+            Message(
+                body=dead_letter_body(task_id, priority, attempts, error),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                content_type="application/json",
+            ),
+            routing_key=dead_letter_queue_name(self.queue_name),
+        )
+
+    def _require_channel(self) -> RobustChannel:
+        if self._channel is None or self._channel.is_closed:
+            raise RuntimeError("RabbitMQ consumer is not connected")
+        return self._channel
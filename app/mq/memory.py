@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.models import TaskPriority
+from app.mq.codec import (
+    CONTENT_TYPES,
+    JSON_CONTENT_TYPE,
+    MessageFormat,
+    TaskMessage,
+    encode_task_message,
+)
+from app.mq.consumer import DeliveryCallback, TaskConsumerProtocol, dead_letter_body
+from app.mq.publisher import TaskPublisherProtocol, TaskQueuePublisher
+from app.mq.topology import declared_queues
+
+
+class InMemoryDelivery:
+    def __init__(
+        self,
+        broker: InMemoryTaskBroker,
+        queue: TaskPriority | None,
+        priority: int,
+        body: bytes,
+        content_type: str | None,
+    ) -> None:
+        self.broker = broker
+        # Номер присваивается при выдаче потребителю, как в AMQP: порядок номеров совпадает
+        # с порядком доставок, и ack(multiple=True) не задевает ещё не выданные сообщения.
+        self.delivery_tag = 0
+        self.queue = queue
+        self.priority = priority
+        self.body = body
+        self.content_type = content_type
+        self.consumer_tag: str | None = None
+        self.settled = False
+
+    @asynccontextmanager
+    async def process(self, requeue: bool = False) -> AsyncIterator[None]:
+        try:
+            yield
+        except BaseException:
+            self.broker._settle(self, requeue=requeue)
+            raise
+        self.broker._settle(self, requeue=False)
+
+    async def ack(self, multiple: bool = False) -> None:
+        if multiple:
+            self.broker._ack_up_to(self.delivery_tag)
+        else:
+            self.broker._settle(self, requeue=False)
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.broker._settle(self, requeue=requeue)
+
+
+class InMemoryTaskBroker(TaskPublisherProtocol, TaskConsumerProtocol):
+    # Брокер в памяти процесса для однонодовых развёртываний, тестов и бенчмарков:
+    # API и воркер делят один экземпляр, сообщения не переживают рестарт процесса.
+    def __init__(
+        self,
+        prefetch_count: int | None = None,
+        topology: str | None = None,
+        message_format: MessageFormat | None = None,
+    ) -> None:
+        self.prefetch_count = prefetch_count or settings.worker_prefetch_count
+        self.topology = topology or settings.rabbitmq_queue_topology
+        # Сообщения кодируются так же, как для RabbitMQ, чтобы воркер шёл тем же путём.
+        self.message_format = message_format or settings.rabbitmq_message_format
+        # Та же топология, что и у RabbitMQ: ключ None — общая очередь, иначе по приоритету.
+        self._queues: dict[TaskPriority | None, asyncio.PriorityQueue] = {
+            key: asyncio.PriorityQueue() for key in declared_queues(topology=self.topology)
+        }
+        self._sequence = itertools.count()
+        self._tags = itertools.count(1)
+        self._unacked: dict[int, InMemoryDelivery] = {}
+        self._unacked_by_consumer: dict[str, int] = {}
+        self._released = asyncio.Event()
+        self._consumers: dict[str, asyncio.Task] = {}
+        self._retries: set[asyncio.TimerHandle] = set()
+        self.dead_letters: list[bytes] = []
+
+    @property
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    @property
+    def unacked(self) -> int:
+        return len(self._unacked)
+
+    async def connect(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        for consumer_tag in list(self._consumers):
+            await self.cancel(consumer_tag)
+        # Как при закрытии канала RabbitMQ: неподтверждённое возвращается в очередь.
+        for delivery in list(self._unacked.values()):
+            self._settle(delivery, requeue=True)
+        self._unacked_by_consumer.clear()
+
+    @property
+    def scheduled_retries(self) -> int:
+        return len(self._retries)
+
+    async def publish_task(self, message: TaskMessage) -> None:
+        self._enqueue_task(message)
+
+    async def schedule_retry(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempt: int,
+        delay: float,
+    ) -> None:
+        # Таймер вместо очереди с TTL: повтор в памяти не переживает рестарт, как и остальное.
+        def fire() -> None:
+            self._retries.discard(handle)
+            self._enqueue(
+                self._queue_for(priority),
+                TaskQueuePublisher.PRIORITY_MAP.get(priority, 5),
+                json.dumps({"task_id": str(task_id)}).encode("utf-8"),
+                JSON_CONTENT_TYPE,
+            )
+
+        handle = asyncio.get_running_loop().call_later(delay, fire)
+        self._retries.add(handle)
+
+    async def dead_letter(
+        self,
+        task_id: uuid.UUID,
+        priority: TaskPriority,
+        attempts: int,
+        error: str,
+    ) -> None:
+        self.dead_letters.append(dead_letter_body(task_id, priority, attempts, error))
+
+    async def publish_tasks(self, messages: Sequence[TaskMessage]) -> list[BaseException | None]:
+        for message in messages:
+            await self.publish_task(message)
+        return [None] * len(messages)
+
+    async def set_prefetch(self, count: int) -> None:
+        self.prefetch_count = count
+        self._released.set()
+
+    async def consume(
+        self,
+        callback: DeliveryCallback,
+        priority: TaskPriority | None = None,
+    ) -> str:
+        if priority not in self._queues:
+            raise RuntimeError(f"In-memory queue for priority {priority} is not declared")
+        consumer_tag = f"memory-{uuid.uuid4().hex[:12]}"
+        self._unacked_by_consumer[consumer_tag] = 0
+        self._consumers[consumer_tag] = asyncio.create_task(
+            self._dispatch(consumer_tag, self._queues[priority], callback)
+        )
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str) -> None:
+        dispatcher = self._consumers.pop(consumer_tag, None)
+        if dispatcher is not None:
+            dispatcher.cancel()
+            await asyncio.gather(dispatcher, return_exceptions=True)
+        # Неподтверждённые доставки отменённого потребителя остаются за ним до close().
+
+    async def _dispatch(
+        self,
+        consumer_tag: str,
+        queue: asyncio.PriorityQueue,
+        callback: DeliveryCallback,
+    ) -> None:
+        while True:
+            # Аналог basic.qos: не больше prefetch_count неподтверждённых доставок на потребителя.
+            while self._unacked_by_consumer[consumer_tag] >= self.prefetch_count:
+                self._released.clear()
+                await self._released.wait()
+            _, _, delivery = await queue.get()
+            delivery.delivery_tag = next(self._tags)
+            delivery.consumer_tag = consumer_tag
+            self._unacked[delivery.delivery_tag] = delivery
+            self._unacked_by_consumer[consumer_tag] += 1
+            await callback(delivery)
+
+    def _enqueue_task(self, message: TaskMessage) -> None:
+        self._enqueue(
+            self._queue_for(message.priority),
+            TaskQueuePublisher.PRIORITY_MAP.get(message.priority, 5),
+            encode_task_message(message, self.message_format),
+            CONTENT_TYPES[self.message_format],
+        )
+
+    def _queue_for(self, priority: TaskPriority | None) -> TaskPriority | None:
+        return priority if priority in self._queues else None
+
+    def _enqueue(
+        self,
+        queue: TaskPriority | None,
+        priority: int,
+        body: bytes,
+        content_type: str | None,
+    ) -> None:
+        delivery = InMemoryDelivery(self, queue, priority, body, content_type)
+        # PriorityQueue отдаёт наименьший ключ: больший приоритет первым, внутри — FIFO.
+        self._queues[queue].put_nowait((-priority, next(self._sequence), delivery))
+
+    def _release(self, delivery: InMemoryDelivery) -> None:
+        delivery.settled = True
+        if delivery.consumer_tag in self._unacked_by_consumer:
+            self._unacked_by_consumer[delivery.consumer_tag] -= 1
+
+    def _settle(self, delivery: InMemoryDelivery, *, requeue: bool) -> None:
+        if delivery.settled:
+            return
+        self._unacked.pop(delivery.delivery_tag, None)
+        self._release(delivery)
+        if requeue:
+            self._enqueue(delivery.queue, delivery.priority, delivery.body, delivery.content_type)
+        self._released.set()
+
+    def _ack_up_to(self, delivery_tag: int) -> None:
+        for tag in [tag for tag in self._unacked if tag <= delivery_tag]:
+            self._release(self._unacked.pop(tag))
+        self._released.set()
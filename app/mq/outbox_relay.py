@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.mq.codec import TaskMessage
+from app.mq.publisher import TaskPublisherProtocol
+from app.repositories import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: TaskPublisherProtocol,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_interval = poll_interval or settings.outbox_poll_interval
+        self._stopping = asyncio.Event()
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as session:
+            outbox = OutboxRepository(session)
+            entries = await outbox.claim_batch(self.batch_size)
+            if not entries:
+                await session.commit()
+                return 0
+            try:
+                # Outbox хранит только id и приоритет: такие сообщения воркер дополняет из БД.
+                errors = await self.publisher.publish_tasks(
+                    [TaskMessage(entry.task_id, entry.priority) for entry in entries]
+                )
+            except Exception as exc:
+                logger.warning("Outbox relay failed to publish batch: %s", exc)
+                await session.rollback()
+                return 0
+            # Неподтверждённые записи остаются в outbox и будут опубликованы повторно.
+            published_ids = [entry.id for entry, error in zip(entries, errors) if error is None]
+            await outbox.delete_many(published_ids)
+            await session.commit()
+            return len(published_ids)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                published = await self.run_once()
+            except Exception as exc:
+                logger.exception("Outbox relay iteration failed: %s", exc)
+                published = 0
+            if published < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self) -> None:
+        self._stopping.set()
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-import json
-import uuid
+import asyncio
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
 from typing import Protocol
 
 import aio_pika
 from aio_pika import Message, RobustChannel, RobustConnection
 
 from app.core.config import settings
+from app.metrics import (
+    PUBLISH_CONFIRMS,
+    PUBLISH_DURATION,
+    PUBLISH_FAILURES,
+    PUBLISH_IN_FLIGHT,
+    PUBLISH_WINDOW_WAIT,
+)
 from app.models import TaskPriority
+from app.mq.codec import CONTENT_TYPES, MessageFormat, TaskMessage, encode_task_message
+from app.mq.topology import declared_queues, queue_arguments, routing_key
 from app.services.exceptions import PublisherUnavailableError
 
 
@@ -19,9 +30,25 @@ class TaskPublisherProtocol(Protocol):
     async def close(self) -> None:
         ...
 
-    async def publish_task(self, task_id: uuid.UUID, priority: TaskPriority) -> None:
+    async def publish_task(self, message: TaskMessage) -> None:
         ...
 
+    async def publish_tasks(self, messages: Sequence[TaskMessage]) -> list[BaseException | None]:
+        ...
+
+
+@dataclass
+class PublisherStats:
+    published: int = 0
+    confirmed: int = 0
+    failed: int = 0
+    in_flight: int = 0
+
+    @property
+    def confirm_rate(self) -> float:
+        settled = self.confirmed + self.failed
+        return self.confirmed / settled if settled else 1.0
+
 
 class TaskQueuePublisher(TaskPublisherProtocol):
     PRIORITY_MAP = {
@@ -35,41 +62,114 @@ class TaskQueuePublisher(TaskPublisherProtocol):
         url: str | None = None,
         queue_name: str | None = None,
         max_priority: int | None = None,
+        publish_window: int | None = None,
+        topology: str | None = None,
+        channels: int | None = None,
+        message_format: MessageFormat | None = None,
     ) -> None:
         self.url = url or settings.rabbitmq_url
         self.queue_name = queue_name or settings.rabbitmq_queue
+        self.topology = topology or settings.rabbitmq_queue_topology
         self.max_priority = max_priority or settings.rabbitmq_max_priority
+        self.publish_window = publish_window or settings.rabbitmq_publish_window
+        self.channel_count = channels or settings.rabbitmq_publisher_channels
+        self.message_format = message_format or settings.rabbitmq_message_format
+        self.stats = PublisherStats()
         self._connection: RobustConnection | None = None
-        self._channel: RobustChannel | None = None
+        self._channels: list[RobustChannel] = []
+        self._channel_load: list[int] = []
+        # Общее на все запросы окно неподтверждённых публикаций: когда брокер не успевает
+        # подтверждать, новые публикации ждут слот, а не копятся без ограничений.
+        self._window = asyncio.Semaphore(self.publish_window)
 
     async def connect(self) -> None:
         if self._connection and not self._connection.is_closed:
             return
         self._connection = await aio_pika.connect_robust(self.url)
-        self._channel = await self._connection.channel()
-        await self._channel.set_qos(prefetch_count=1)
-        await self._channel.declare_queue(
-            self.queue_name,
-            durable=True,
-            arguments={"x-max-priority": self.max_priority},
-        )
+        # Подтверждения приходят по каналу, поэтому конкурентные запросы API
+        # раскладываются по нескольким каналам вместо очереди на одном.
+        self._channels = [
+            await self._connection.channel(publisher_confirms=True)
+            for _ in range(self.channel_count)
+        ]
+        self._channel_load = [0] * len(self._channels)
+        for name in declared_queues(self.queue_name, self.topology).values():
+            await self._channels[0].declare_queue(
+                name,
+                durable=True,
+                arguments=queue_arguments(self.topology, self.max_priority),
+            )
 
     async def close(self) -> None:
-        if self._channel and not self._channel.is_closed:
-            await self._channel.close()
+        for channel in self._channels:
+            if not channel.is_closed:
+                await channel.close()
         if self._connection and not self._connection.is_closed:
             await self._connection.close()
-        self._channel = None
+        self._channels = []
+        self._channel_load = []
         self._connection = None
 
-    async def publish_task(self, task_id: uuid.UUID, priority: TaskPriority) -> None:
-        if self._channel is None:
+    async def publish_task(self, message: TaskMessage) -> None:
+        if not self._channels:
+            raise PublisherUnavailableError("RabbitMQ channel is not available")
+        started = time.perf_counter()
+        try:
+            await self._publish(message)
+        finally:
+            PUBLISH_DURATION.labels(mode="single").observe(time.perf_counter() - started)
+
+    async def publish_tasks(self, messages: Sequence[TaskMessage]) -> list[BaseException | None]:
+        if not self._channels:
             raise PublisherUnavailableError("RabbitMQ channel is not available")
-        message = Message(
-            body=json.dumps({"task_id": str(task_id)}).encode("utf-8"),
-            priority=self.PRIORITY_MAP.get(priority, 5),
+        # Публикуем конвейером: подтверждения окна ждём вместе, а не по одному.
+        # Пачка нарезается по publish_window, чтобы не создавать тысячи корутин разом.
+        started = time.perf_counter()
+        results: list[BaseException | None] = []
+        for start in range(0, len(messages), self.publish_window):
+            window = messages[start:start + self.publish_window]
+            outcomes = await asyncio.gather(
+                *(self._publish(message) for message in window),
+                return_exceptions=True,
+            )
+            results.extend(
+                outcome if isinstance(outcome, BaseException) else None for outcome in outcomes
+            )
+        PUBLISH_DURATION.labels(mode="batch").observe(time.perf_counter() - started)
+        return results
+
+    async def _publish(self, message: TaskMessage) -> None:
+        waited = time.perf_counter()
+        async with self._window:
+            PUBLISH_WINDOW_WAIT.observe(time.perf_counter() - waited)
+            index = min(range(len(self._channel_load)), key=self._channel_load.__getitem__)
+            self._channel_load[index] += 1
+            self.stats.published += 1
+            self.stats.in_flight += 1
+            PUBLISH_IN_FLIGHT.inc()
+            try:
+                await self._channels[index].default_exchange.publish(
+                    self._build_message(message),
+                    routing_key=routing_key(message.priority, self.queue_name, self.topology),
+                )
+            except Exception:
+                self.stats.failed += 1
+                PUBLISH_FAILURES.inc()
+                raise
+            finally:
+                if index < len(self._channel_load):
+                    self._channel_load[index] -= 1
+                self.stats.in_flight -= 1
+                PUBLISH_IN_FLIGHT.dec()
+            self.stats.confirmed += 1
+            PUBLISH_CONFIRMS.inc()
+
+    def _build_message(self, message: TaskMessage) -> Message:
+        # Сообщение несёт все поля задачи, чтобы воркеру не нужно было читать строку из БД.
+        return Message(
+            body=encode_task_message(message, self.message_format),
+            priority=self.PRIORITY_MAP.get(message.priority, 5),
             delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            content_type="application/json",
+            content_type=CONTENT_TYPES[self.message_format],
         )
-        await self._channel.default_exchange.publish(message, routing_key=self.queue_name)
 
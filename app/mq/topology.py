@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from app.core.config import settings
+from app.models import TaskPriority
+
+
+def priority_queue_name(queue_name: str, priority: TaskPriority) -> str:
+    return f"{queue_name}.{priority.value.lower()}"
+
+
+def declared_queues(
+    queue_name: str | None = None,
+    topology: str | None = None,
+) -> dict[TaskPriority | None, str]:
+    # single — одна приоритетная очередь (ключ None), per_priority — по очереди на TaskPriority.
+    queue_name = queue_name or settings.rabbitmq_queue
+    topology = topology or settings.rabbitmq_queue_topology
+    if topology == "per_priority":
+        return {priority: priority_queue_name(queue_name, priority) for priority in TaskPriority}
+    return {None: queue_name}
+
+
+def queue_arguments(topology: str | None = None, max_priority: int | None = None) -> dict:
+    # Отдельным очередям x-max-priority не нужен: порядок задаёт планировщик воркера.
+    if (topology or settings.rabbitmq_queue_topology) == "per_priority":
+        return {}
+    return {"x-max-priority": max_priority or settings.rabbitmq_max_priority}
+
+
+def routing_key(
+    priority: TaskPriority,
+    queue_name: str | None = None,
+    topology: str | None = None,
+) -> str:
+    queues = declared_queues(queue_name, topology)
+    return queues.get(priority) or queues[None]
+
+
+def retry_queue_name(target_queue: str, attempt: int) -> str:
+    # Очередь задержки на каждую попытку: TTL сообщений в ней одного порядка,
+    # поэтому истёкшее сообщение не застревает за головой с гораздо большим TTL.
+    return f"{target_queue}.retry.{attempt}"
+
+
+def dead_letter_queue_name(queue_name: str | None = None) -> str:
+    return f"{queue_name or settings.rabbitmq_queue}.dead"
@@ -1,4 +1,5 @@
+from .idempotency_repository import IdempotencyRepository
+from .outbox_repository import OutboxRepository
 from .task_repository import TaskRepository
 
-__all__ = ["TaskRepository"]
-
+__all__ = ["IdempotencyRepository", "OutboxRepository", "TaskRepository"]
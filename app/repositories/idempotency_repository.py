@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TaskIdempotencyKey
+
+
+class IdempotencyRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, key: str) -> TaskIdempotencyKey | None:
+        return await self.session.get(TaskIdempotencyKey, key)
+
+    async def add(self, *, key: str, task_id: uuid.UUID, request_hash: str) -> bool:
+        # Вставка в точке сохранения: параллельный запрос с тем же ключом ждёт на
+        # уникальном индексе коммита первого и получает конфликт, не откатывая всю транзакцию.
+        try:
+            async with self.session.begin_nested():
+                self.session.add(
+                    TaskIdempotencyKey(key=key, task_id=task_id, request_hash=request_hash)
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    async def delete(self, key: str) -> None:
+        await self.session.execute(delete(TaskIdempotencyKey).where(TaskIdempotencyKey.key == key))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TaskOutbox, TaskPriority
+
+
+class OutboxRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, *, task_id: uuid.UUID, priority: TaskPriority) -> None:
+        self.session.add(TaskOutbox(task_id=task_id, priority=priority))
+        await self.session.flush()
+
+    async def add_many(self, entries: Sequence[tuple[uuid.UUID, TaskPriority]]) -> None:
+        if not entries:
+            return
+        await self.session.execute(
+            insert(TaskOutbox),
+            [{"task_id": task_id, "priority": priority} for task_id, priority in entries],
+        )
+
+    async def claim_batch(self, limit: int) -> list[TaskOutbox]:
+        # SKIP LOCKED позволяет нескольким релеям разбирать outbox параллельно,
+        # не блокируя друг друга на одних и тех же строках.
+        stmt = (
+            select(TaskOutbox)
+            .order_by(TaskOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.scalars(stmt)
+        return list(result.all())
+
+    async def delete_many(self, entry_ids: Sequence[int]) -> None:
+        if not entry_ids:
+            return
+        await self.session.execute(delete(TaskOutbox).where(TaskOutbox.id.in_(entry_ids)))
@@ -1,20 +1,59 @@
 from __future__ import annotations
 
+import json
 import uuid
+from collections.abc import Sequence
+from datetime import datetime
 from typing import cast
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import (
+    BindParameter,
+    ColumnElement,
+    Select,
+    Text,
+    Update,
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Task, TaskPriority, TaskStatus
+from app.cache import TaskCache
+from app.core.config import settings
+from app.models import TERMINAL_TASK_STATUSES, Task, TaskPriority, TaskStatus
 
 
 _UNSET = object()
 
+# Колонки проекции списка задач по полям TaskSummary.
+_LIST_COLUMNS = {
+    "id": Task.id,
+    "title": Task.title,
+    "description": Task.description,
+    "priority": Task.priority,
+    "status": Task.status,
+    "created_at": Task.created_at,
+    "started_at": Task.started_at,
+    "finished_at": Task.finished_at,
+    "error": Task.error,
+    "attempts": Task.attempts,
+    "result_size": Task.result_size,
+    "result_offloaded": Task.result_ref.is_not(None),
+}
+
 
 class TaskRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: TaskCache | None = None):
         self.session = session
+        self.cache = cache
 
     async def add(
         self,
@@ -22,46 +61,178 @@ class TaskRepository:
         title: str,
         description: str | None,
         priority: TaskPriority,
+        status: TaskStatus = TaskStatus.NEW,
+        input: dict | None = None,
+        content_hash: str | None = None,
     ) -> Task:
         task = Task(
             title=title,
             description=description,
             priority=priority,
-            status=TaskStatus.NEW,
+            status=status,
+            input=input,
+            content_hash=content_hash,
         )
         self.session.add(task)
         await self.session.flush()
         return task
 
+    async def add_many(
+        self,
+        items: Sequence[dict],
+        *,
+        status: TaskStatus = TaskStatus.NEW,
+    ) -> list[Task]:
+        if not items:
+            return []
+        # Один многострочный INSERT ... RETURNING вместо flush на каждую задачу.
+        stmt = insert(Task).returning(Task)
+        result = await self.session.scalars(
+            stmt,
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "title": item["title"],
+                    "description": item.get("description"),
+                    "priority": item["priority"],
+                    "input": item.get("input"),
+                    "status": status,
+                }
+                for item in items
+            ],
+        )
+        return list(result.all())
+
     async def get(self, task_id: uuid.UUID) -> Task | None:
         return await self.session.get(Task, task_id)
 
+    async def find_in_flight(self, content_hash: str) -> Task | None:
+        if self.session.get_bind().dialect.name == "postgresql":
+            # Уникальный индекс по хешу на партиционированной таблице невозможен, поэтому
+            # одинаковые создания сериализуются транзакционной advisory-блокировкой: второй
+            # запрос ждёт коммита первого и затем находит его задачу.
+            await self.session.execute(
+                text("SELECT pg_advisory_xact_lock(hashtextextended(:content_hash, 0))"),
+                {"content_hash": content_hash},
+            )
+        stmt = (
+            select(Task)
+            .where(
+                Task.content_hash == content_hash,
+                Task.status.in_((TaskStatus.NEW, TaskStatus.PENDING, TaskStatus.IN_PROGRESS)),
+            )
+            .limit(1)
+        )
+        result = await self.session.scalars(stmt)
+        return result.first()
+
+    async def get_status(self, task_id: uuid.UUID) -> TaskStatus | None:
+        result = await self.session.execute(select(Task.status).where(Task.id == task_id))
+        return result.scalar_one_or_none()
+
+    async def get_statuses(self, task_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, TaskStatus]:
+        if not task_ids:
+            return {}
+        result = await self.session.execute(
+            select(Task.id, Task.status).where(Task.id.in_(task_ids))
+        )
+        return {task_id: task_status for task_id, task_status in result.all()}
+
     async def get_for_update(self, task_id: uuid.UUID) -> Task | None:
-        stmt = select(Task).where(Task.id == task_id)
+        stmt = select(Task).where(Task.id == task_id).with_for_update(skip_locked=True)
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def claim(
+        self,
+        task_id: uuid.UUID,
+        *,
+        started_at: datetime,
+        worker_id: str | None = None,
+        lease_expires_at: datetime | None = None,
+    ) -> Task | None:
+        # Условный UPDATE выигрывает ровно один из конкурирующих воркеров, без ожидания блокировок.
+        stmt = self._claim_statement(
+            [task_id],
+            started_at=started_at,
+            worker_id=worker_id,
+            lease_expires_at=lease_expires_at,
+        ).returning(Task)
+        result = await self.session.scalars(
+            stmt,
+            execution_options={"synchronize_session": False},
+        )
+        await self._invalidate([task_id])
+        return result.one_or_none()
+
     async def list(
         self,
         *,
+        fields: Sequence[str],
         status: TaskStatus | None,
         priority: TaskPriority | None,
         limit: int,
-        offset: int,
-    ) -> tuple[list[Task], int]:
-        stmt = self._apply_filters(select(Task), status=status, priority=priority)
-        stmt = stmt.order_by(Task.created_at.desc()).limit(limit).offset(offset)
-        items_result = await self.session.execute(stmt)
-        items = items_result.scalars().all()
-
-        count_stmt = self._apply_filters(
+        offset: int = 0,
+        after: tuple[datetime, uuid.UUID] | None = None,
+        result_filter: dict | None = None,
+    ) -> list[dict]:
+        # Выборка только нужных колонок в обычные словари: без ORM-объектов, identity map
+        # и чтения result. created_at и id читаются всегда — по ним строится курсор.
+        stmt = self._list_statement(
+            fields,
+            status=status,
+            priority=priority,
+            limit=limit,
+            offset=offset,
+            after=after,
+            result_filter=result_filter,
+        )
+        result = await self.session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+    async def count(
+        self,
+        *,
+        status: TaskStatus | None,
+        priority: TaskPriority | None,
+        result_filter: dict | None = None,
+    ) -> int:
+        stmt = self._apply_filters(
             select(func.count(Task.id)),
             status=status,
             priority=priority,
+            result_filter=result_filter,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one() or 0
+
+    async def estimate_count(
+        self,
+        *,
+        status: TaskStatus | None,
+        priority: TaskPriority | None,
+        result_filter: dict | None = None,
+    ) -> int:
+        bind = self.session.get_bind()
+        if bind.dialect.name != "postgresql":
+            return await self.count(status=status, priority=priority, result_filter=result_filter)
+        if status is None and priority is None and not result_filter:
+            result = await self.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'tasks'::regclass")
+            )
+            estimate = result.scalar_one_or_none()
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+        # Для отфильтрованных выборок берём оценку числа строк из плана запроса.
+        stmt = self._apply_filters(
+            select(Task.id),
+            status=status,
+            priority=priority,
+            result_filter=result_filter,
         )
-        count_result = await self.session.execute(count_stmt)
-        total = count_result.scalar_one() or 0
-        return items, total
+        compiled = stmt.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+        result = await self.session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+        return _plan_rows(result.scalar_one())
 
     async def mark_status(
         self,
@@ -72,6 +243,8 @@ class TaskRepository:
         finished_at=None,
         result: dict | None | object = _UNSET,
         error: str | None | object = _UNSET,
+        result_ref: str | None | object = _UNSET,
+        result_size: int | None | object = _UNSET,
     ) -> Task:
         task.status = status
         if started_at is not None:
@@ -80,21 +253,316 @@ class TaskRepository:
             task.finished_at = finished_at
         if result is not _UNSET:
             task.result = cast(dict | None, result)
+        if result_ref is not _UNSET:
+            task.result_ref = cast(str | None, result_ref)
+        if result_size is not _UNSET:
+            task.result_size = cast(int | None, result_size)
         if error is not _UNSET:
             task.error = cast(str | None, error)
         await self.session.flush()
+        await self._invalidate([task.id])
+        await self._notify([(task.id, status)])
         return task
 
+    async def mark_many_status(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        status: TaskStatus,
+        expected_status: TaskStatus | None = None,
+        finished_at: datetime | None = None,
+        error: str | None | object = _UNSET,
+    ) -> int:
+        if not task_ids:
+            return 0
+        values: dict = {"status": status}
+        if finished_at is not None:
+            values["finished_at"] = finished_at
+        if error is not _UNSET:
+            values["error"] = error
+        stmt = update(Task).where(Task.id.in_(task_ids)).values(**values)
+        if expected_status is not None:
+            stmt = stmt.where(Task.status == expected_status)
+        result = await self.session.execute(
+            stmt.returning(Task.id),
+            execution_options={"synchronize_session": "fetch"},
+        )
+        updated_ids = list(result.scalars().all())
+        await self._invalidate(updated_ids)
+        await self._notify([(task_id, status) for task_id in updated_ids])
+        return len(updated_ids)
+
+    async def claim_many(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        started_at: datetime,
+        worker_id: str | None = None,
+        lease_expires_at: datetime | None = None,
+    ) -> list[Task]:
+        if not task_ids:
+            return []
+        # Атомарно забираем все ещё не взятые в работу задачи одним UPDATE ... RETURNING.
+        stmt = self._claim_statement(
+            task_ids,
+            started_at=started_at,
+            worker_id=worker_id,
+            lease_expires_at=lease_expires_at,
+        ).returning(Task)
+        result = await self.session.scalars(
+            stmt,
+            execution_options={"synchronize_session": False},
+        )
+        await self._invalidate(task_ids)
+        return list(result.all())
+
+    async def claim_attempts(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        started_at: datetime,
+        worker_id: str | None = None,
+        lease_expires_at: datetime | None = None,
+    ) -> dict[uuid.UUID, int]:
+        if not task_ids:
+            return {}
+        # Тот же захват, но RETURNING только id и attempts: поля задачи воркер уже получил
+        # в сообщении, и строка с description и input по сети не передаётся.
+        stmt = self._claim_statement(
+            task_ids,
+            started_at=started_at,
+            worker_id=worker_id,
+            lease_expires_at=lease_expires_at,
+        ).returning(Task.id, Task.attempts)
+        result = await self.session.execute(
+            stmt,
+            execution_options={"synchronize_session": False},
+        )
+        await self._invalidate(task_ids)
+        return {task_id: attempts for task_id, attempts in result.all()}
+
+    async def complete_many(
+        self,
+        completions: Sequence[dict],
+        *,
+        worker_id: str | None,
+    ) -> list[uuid.UUID]:
+        if not completions:
+            return []
+        # Итог записывается только для задач, которые всё ещё выполняет этот воркер: задачу
+        # с истёкшей арендой реапер уже вернул в очередь, и запись затёрла бы чужой результат.
+        # FOR UPDATE держит строки до коммита, а реапер пропускает их через SKIP LOCKED.
+        fence = (Task.worker_id == worker_id, Task.status == TaskStatus.IN_PROGRESS)
+        owned = set(
+            await self.session.scalars(
+                select(Task.id)
+                .where(Task.id.in_([completion["id"] for completion in completions]), *fence)
+                .with_for_update()
+            )
+        )
+        applied = [completion for completion in completions if completion["id"] in owned]
+        if not applied:
+            return []
+        # Bulk UPDATE по первичному ключу: одна инструкция, выполняемая executemany.
+        await self.session.execute(
+            update(Task).where(*fence),
+            applied,
+            execution_options={"synchronize_session": None},
+        )
+        await self._invalidate([completion["id"] for completion in applied])
+        await self._notify([(completion["id"], completion["status"]) for completion in applied])
+        return [completion["id"] for completion in applied]
+
+    async def renew_leases(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        worker_id: str,
+        lease_expires_at: datetime,
+    ) -> int:
+        if not task_ids:
+            return 0
+        # Продлеваем только свои ещё выполняющиеся задачи: отобранную реапером аренду
+        # воркер обратно не забирает.
+        result = await self.session.execute(
+            update(Task)
+            .where(
+                Task.id.in_(task_ids),
+                Task.worker_id == worker_id,
+                Task.status == TaskStatus.IN_PROGRESS,
+            )
+            .values(lease_expires_at=lease_expires_at)
+            .returning(Task.id),
+            execution_options={"synchronize_session": False},
+        )
+        return len(result.scalars().all())
+
+    async def claim_expired_leases(self, *, now: datetime, limit: int) -> list[Task]:
+        # Диапазонное чтение по ix_tasks_in_progress_lease_expires_at с LIMIT: стоимость
+        # зависит от размера пачки, а не от числа строк в таблице. SKIP LOCKED позволяет
+        # запускать несколько реаперов без двойного возврата одной задачи.
+        stmt = (
+            select(Task)
+            .where(
+                Task.status == _status_literal(TaskStatus.IN_PROGRESS),
+                Task.lease_expires_at < now,
+            )
+            .order_by(Task.lease_expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.scalars(stmt)
+        return list(result.all())
+
+    async def delete_many(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        expected_status: TaskStatus | None = None,
+    ) -> int:
+        if not task_ids:
+            return 0
+        stmt = delete(Task).where(Task.id.in_(task_ids))
+        if expected_status is not None:
+            stmt = stmt.where(Task.status == expected_status)
+        result = await self.session.execute(
+            stmt,
+            execution_options={"synchronize_session": "fetch"},
+        )
+        await self._invalidate(task_ids)
+        return result.rowcount or 0
+
+    async def _invalidate(self, task_ids: Sequence[uuid.UUID]) -> None:
+        # Записи только удаляются: следующее чтение после коммита заполнит кэш
+        # актуальным состоянием из БД, а не возможно откатываемым значением сессии.
+        if self.cache is not None:
+            await self.cache.invalidate(task_ids)
+
+    async def _notify(self, events: Sequence[tuple[uuid.UUID, TaskStatus]]) -> None:
+        # NOTIFY уходит подписчикам только при коммите транзакции, так что ожидающие
+        # не увидят переход, который затем откатится.
+        payloads = [
+            json.dumps({"task_id": str(task_id), "status": status.value})
+            for task_id, status in events
+            if status in TERMINAL_TASK_STATUSES
+        ]
+        if not payloads or self.session.get_bind().dialect.name != "postgresql":
+            return
+        await self.session.execute(
+            text(
+                "SELECT pg_notify(:channel, payload) "
+                "FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {"channel": settings.task_events_channel, "payloads": payloads},
+        )
+
+    def _list_statement(
+        self,
+        fields: Sequence[str],
+        *,
+        status: TaskStatus | None,
+        priority: TaskPriority | None,
+        limit: int,
+        offset: int = 0,
+        after: tuple[datetime, uuid.UUID] | None = None,
+        result_filter: dict | None = None,
+    ) -> Select:
+        names = dict.fromkeys(("created_at", "id", *fields))
+        stmt = self._apply_filters(
+            select(*(_LIST_COLUMNS[name].label(name) for name in names)),
+            status=status,
+            priority=priority,
+            result_filter=result_filter,
+        )
+        if after is not None:
+            # Keyset-пагинация: продолжаем строго после последней строки предыдущей страницы.
+            stmt = stmt.where(tuple_(Task.created_at, Task.id) < tuple_(*after))
+        stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+        if offset:
+            stmt = stmt.offset(offset)
+        return stmt
+
+    def _claim_statement(
+        self,
+        task_ids: Sequence[uuid.UUID],
+        *,
+        started_at: datetime,
+        worker_id: str | None,
+        lease_expires_at: datetime | None,
+    ) -> Update:
+        return (
+            update(Task)
+            .where(
+                Task.id.in_(task_ids),
+                Task.status.in_((TaskStatus.NEW, TaskStatus.PENDING)),
+            )
+            .values(
+                status=TaskStatus.IN_PROGRESS,
+                started_at=started_at,
+                attempts=Task.attempts + 1,
+                worker_id=worker_id,
+                lease_expires_at=lease_expires_at,
+            )
+        )
+
     def _apply_filters(
         self,
         stmt: Select,
         *,
         status: TaskStatus | None,
         priority: TaskPriority | None,
+        result_filter: dict | None = None,
     ) -> Select:
         if status is not None:
-            stmt = stmt.where(Task.status == status)
+            stmt = stmt.where(Task.status == _status_literal(status))
         if priority is not None:
             stmt = stmt.where(Task.priority == priority)
+        if result_filter:
+            dialect = self.session.get_bind().dialect.name
+            stmt = stmt.where(_result_condition(result_filter, dialect))
         return stmt
 
+
+def _status_literal(status: TaskStatus) -> BindParameter:
+    # Частичные индексы по статусу применимы, только если планировщик видит значение:
+    # для обобщённого плана подготовленного запроса с параметром они недоступны.
+    return literal(status, Task.status.type, literal_execute=True)
+
+
+def _result_condition(result_filter: dict, dialect: str) -> ColumnElement[bool]:
+    if dialect == "postgresql":
+        # Одно сравнение @> обслуживается GIN-индексом ix_tasks_result. Документ передаётся
+        # строкой с приведением к jsonb, чтобы запрос можно было отрендерить для EXPLAIN.
+        document = literal(json.dumps(result_filter), Text).cast(JSONB)
+        return type_coerce(Task.result, JSONB).contains(document)
+    # В SQLite (тесты) значения сравниваются по JSON-путям.
+    return and_(
+        *(_result_path_condition(path, value) for path, value in _result_leaves(result_filter))
+    )
+
+
+def _result_leaves(result_filter: dict, prefix: tuple[str, ...] = ()) -> list[tuple]:
+    leaves = []
+    for key, value in result_filter.items():
+        path = (*prefix, key)
+        if isinstance(value, dict):
+            leaves.extend(_result_leaves(value, path))
+        else:
+            leaves.append((path, value))
+    return leaves
+
+
+def _result_path_condition(path: tuple[str, ...], value) -> ColumnElement[bool]:
+    # Сверяем и тип JSON-значения, как это делает @>: строка "42" не равна числу 42.
+    json_type = func.json_type(Task.result, "$" + "".join(f".{json.dumps(key)}" for key in path))
+    if isinstance(value, bool):
+        return json_type == ("true" if value else "false")
+    if isinstance(value, (int, float)):
+        return and_(json_type.in_(("integer", "real")), Task.result[path].as_float() == value)
+    return and_(json_type == "text", Task.result[path].as_string() == value)
+
+
+def _plan_rows(plan: str | list) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -1,16 +1,26 @@
 from .task import (
+    TASK_LIST_FIELDS,
+    TaskBatchCreate,
+    TaskBatchItemResult,
+    TaskBatchResult,
     TaskCreate,
     TaskList,
     TaskRead,
     TaskStatusSchema,
+    TaskSummary,
     TaskUpdate,
 )
 
 __all__ = [
+    "TASK_LIST_FIELDS",
+    "TaskBatchCreate",
+    "TaskBatchItemResult",
+    "TaskBatchResult",
     "TaskCreate",
     "TaskList",
     "TaskRead",
     "TaskStatusSchema",
+    "TaskSummary",
     "TaskUpdate",
 ]
 
@@ -5,6 +5,7 @@ from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.core.config import settings
 from app.models import TaskPriority, TaskStatus
 
 
@@ -15,34 +16,60 @@ class TaskBase(BaseModel):
 
 
 class TaskCreate(TaskBase):
-    pass
+    input: dict | None = None
+
+
+class TaskBatchCreate(BaseModel):
+    items: list[TaskCreate] = Field(min_length=1, max_length=settings.max_batch_size)
 
 
 class TaskUpdate(BaseModel):
     status: TaskStatus
 
 
-class TaskRead(TaskBase):
+class TaskSummary(TaskBase):
     id: UUID
     status: TaskStatus
     created_at: datetime
     started_at: datetime | None = None
     finished_at: datetime | None = None
-    result: dict | None = None
     error: str | None = None
+    attempts: int = 0
+    result_size: int | None = None
+    result_offloaded: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Поля, которые можно запросить у GET /tasks через ?fields=.
+TASK_LIST_FIELDS: tuple[str, ...] = tuple(TaskSummary.model_fields)
+
+
+class TaskRead(TaskSummary):
+    input: dict | None = None
+    # Вынесенный во внешнее хранилище результат здесь null: его отдаёт GET /tasks/{id}/result.
+    result: dict | None = None
+
+
 class TaskList(BaseModel):
-    items: list[TaskRead]
-    total: int
+    items: list[TaskSummary]
+    total: int | None = None
     limit: int
     offset: int
+    next_cursor: str | None = None
 
 
 class TaskStatusSchema(BaseModel):
     status: TaskStatus
 
 
+class TaskBatchItemResult(BaseModel):
+    index: int
+    task: TaskRead
+    error: str | None = None
+
 
+class TaskBatchResult(BaseModel):
+    items: list[TaskBatchItemResult]
+    succeeded: int
+    failed: int
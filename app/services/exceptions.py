@@ -13,3 +13,11 @@ class TaskConflictError(TaskServiceError):
 class PublisherUnavailableError(TaskServiceError):
     pass
 
+
+class IdempotencyKeyMismatchError(TaskServiceError):
+    pass
+
+
+
+class InvalidCursorError(TaskServiceError):
+    pass
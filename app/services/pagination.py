@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from app.services.exceptions import InvalidCursorError
+
+
+def encode_cursor(created_at: datetime, task_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(task_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), uuid.UUID(task_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
@@ -1,19 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import uuid
+from collections.abc import Sequence
 from datetime import datetime, timezone
+from typing import Literal, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Task, TaskPriority, TaskStatus
-from app.mq import TaskPublisherProtocol
-from app.repositories import TaskRepository
-from app.schemas import TaskCreate
+from app.core.config import settings
+from app.events import TaskEventHub
+from app.metrics import TASKS_DEDUPLICATED
+from app.models import TERMINAL_TASK_STATUSES, Task, TaskPriority, TaskStatus
+from app.mq import TaskMessage, TaskPublisherProtocol
+from app.repositories import IdempotencyRepository, OutboxRepository, TaskRepository
+from app.schemas import TASK_LIST_FIELDS, TaskCreate, TaskRead
 from app.services.exceptions import (
+    IdempotencyKeyMismatchError,
     PublisherUnavailableError,
     TaskConflictError,
     TaskNotFoundError,
 )
+from app.services.pagination import decode_cursor, encode_cursor
+
+TaskCountMode = Literal["exact", "estimate", "none"]
 
 
 class TaskService:
@@ -22,18 +34,50 @@ class TaskService:
         TaskStatus.FAILED,
         TaskStatus.CANCELLED,
     }
+    PUBLISH_FAILED_ERROR = "Failed to publish task to queue"
 
     def __init__(
         self,
         session: AsyncSession,
         repository: TaskRepository,
         publisher: TaskPublisherProtocol | None,
+        outbox: OutboxRepository | None = None,
+        idempotency: IdempotencyRepository | None = None,
     ) -> None:
         self.session = session
         self.repository = repository
         self.publisher = publisher
+        self.outbox = outbox
+        self.idempotency = idempotency or IdempotencyRepository(session)
 
-    async def create_task(self, payload: TaskCreate) -> Task:
+    async def create_task(
+        self,
+        payload: TaskCreate,
+        *,
+        idempotency_key: str | None = None,
+    ) -> Task:
+        content_hash = _content_hash(payload)
+        if idempotency_key is not None:
+            task = await self._replay(idempotency_key, content_hash)
+            if task is not None:
+                TASKS_DEDUPLICATED.labels(reason="idempotency_key").inc()
+                return task
+        if settings.task_dedup_in_flight:
+            task = await self.repository.find_in_flight(content_hash)
+            if task is not None:
+                if not await self._remember(idempotency_key, task, content_hash):
+                    return await self._replay_concurrent(idempotency_key, content_hash)
+                await self.session.commit()
+                TASKS_DEDUPLICATED.labels(reason="content_hash").inc()
+                return task
+        outbox = self.outbox
+        if outbox is not None:
+            return await self._create_task_via_outbox(
+                payload,
+                outbox,
+                idempotency_key=idempotency_key,
+                content_hash=content_hash,
+            )
         publisher = self.publisher
         if publisher is None:
             raise PublisherUnavailableError("Publisher is not available")
@@ -41,9 +85,15 @@ class TaskService:
             title=payload.title,
             description=payload.description,
             priority=payload.priority,
+            input=payload.input,
+            content_hash=content_hash if settings.task_dedup_in_flight else None,
         )
+        # Ключ записывается до публикации: повтор, пришедший во время неё, ждёт
+        # на уникальном индексе и не отправляет второе сообщение.
+        if not await self._remember(idempotency_key, task, content_hash):
+            return await self._replay_concurrent(idempotency_key, content_hash)
         try:
-            await publisher.publish_task(task.id, task.priority)
+            await publisher.publish_task(TaskMessage.from_task(task))
         except PublisherUnavailableError:
             await self.session.rollback()
             raise
@@ -55,20 +105,95 @@ class TaskService:
         await self.session.refresh(task)
         return task
 
+    async def create_tasks(
+        self,
+        payloads: Sequence[TaskCreate],
+    ) -> list[tuple[Task, str | None]]:
+        outbox = self.outbox
+        if outbox is not None:
+            return await self._create_tasks_via_outbox(payloads, outbox)
+        publisher = self.publisher
+        if publisher is None:
+            raise PublisherUnavailableError("Publisher is not available")
+        tasks = await self.repository.add_many([payload.model_dump() for payload in payloads])
+        # Фиксируем строки до публикации, чтобы воркер гарантированно нашёл задачу в БД.
+        # Если процесс упадёт между этим коммитом и переводом в PENDING/FAILED ниже,
+        # задачи останутся в статусе NEW без сообщения в очереди; их нужно
+        # переопубликовать вручную (или использовать TASK_PUBLISH_MODE=outbox).
+        await self.session.commit()
+        task_ids = [task.id for task in tasks]
+        try:
+            errors = await publisher.publish_tasks([TaskMessage.from_task(task) for task in tasks])
+        except PublisherUnavailableError:
+            # Канал недоступен — ни одно сообщение не ушло, строки можно безопасно удалить.
+            await self.repository.delete_many(task_ids, expected_status=TaskStatus.NEW)
+            await self.session.commit()
+            raise
+        except Exception as exc:
+            await self._mark_publish_failed(task_ids)
+            await self.session.commit()
+            raise PublisherUnavailableError("Failed to publish tasks to queue") from exc
+
+        published_ids = [task.id for task, error in zip(tasks, errors) if error is None]
+        failed_ids = [task.id for task, error in zip(tasks, errors) if error is not None]
+        await self.repository.mark_many_status(
+            published_ids,
+            status=TaskStatus.PENDING,
+            expected_status=TaskStatus.NEW,
+        )
+        # Неподтверждённые задачи не удаляем: брокер мог принять сообщение, даже если
+        # подтверждение не дошло. Статус FAILED оставляет их видимыми для сверки,
+        # а воркер такие задачи пропускает.
+        await self._mark_publish_failed(failed_ids)
+        await self.session.commit()
+        return [
+            (task, None if error is None else self.PUBLISH_FAILED_ERROR)
+            for task, error in zip(tasks, errors)
+        ]
+
     async def list_tasks(
         self,
         *,
         status: TaskStatus | None,
         priority: TaskPriority | None,
         limit: int,
-        offset: int,
-    ) -> tuple[list[Task], int]:
-        return await self.repository.list(
+        offset: int = 0,
+        cursor: str | None = None,
+        count: TaskCountMode = "none",
+        fields: Sequence[str] = TASK_LIST_FIELDS,
+        result_filter: dict | None = None,
+    ) -> tuple[list[dict], int | None, str | None]:
+        after = decode_cursor(cursor) if cursor is not None else None
+        # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница.
+        rows = await self.repository.list(
+            fields=fields,
             status=status,
             priority=priority,
-            limit=limit,
-            offset=offset,
+            limit=limit + 1,
+            offset=0 if after is not None else offset,
+            after=after,
+            result_filter=result_filter,
         )
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        items = [{name: row[name] for name in fields} for row in rows[:limit]]
+
+        total: int | None = None
+        if count == "exact":
+            total = await self.repository.count(
+                status=status,
+                priority=priority,
+                result_filter=result_filter,
+            )
+        elif count == "estimate":
+            total = await self.repository.estimate_count(
+                status=status,
+                priority=priority,
+                result_filter=result_filter,
+            )
+        return items, total, next_cursor
 
     async def get_task(self, task_id: uuid.UUID) -> Task:
         task = await self.repository.get(task_id)
@@ -76,6 +201,67 @@ class TaskService:
             raise TaskNotFoundError
         return task
 
+    async def get_task_view(self, task_id: uuid.UUID) -> TaskRead:
+        cache = self.repository.cache
+        if cache is not None:
+            cached = await cache.get_task(task_id)
+            if cached is not None:
+                return TaskRead.model_validate(cached)
+        task = await self.get_task(task_id)
+        view = TaskRead.model_validate(task)
+        if cache is not None:
+            await cache.set_task(task_id, view.model_dump(mode="json"), task.status)
+        return view
+
+    async def get_task_status(self, task_id: uuid.UUID) -> TaskStatus:
+        cache = self.repository.cache
+        if cache is not None:
+            cached = await cache.get_status(task_id)
+            if cached is not None:
+                return cached
+        # Узкий запрос только по колонке status, без загрузки JSON-результата.
+        task_status = await self.repository.get_status(task_id)
+        if task_status is None:
+            raise TaskNotFoundError
+        if cache is not None:
+            await cache.set_status(task_id, task_status)
+        return task_status
+
+    async def get_task_statuses(
+        self,
+        task_ids: Sequence[uuid.UUID],
+    ) -> dict[uuid.UUID, TaskStatus]:
+        statuses = await self.repository.get_statuses(task_ids)
+        await self.session.rollback()
+        return statuses
+
+    async def wait_for_task(
+        self,
+        task_id: uuid.UUID,
+        *,
+        timeout: float,
+        events: TaskEventHub,
+    ) -> TaskRead:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Подписываемся до проверки статуса, чтобы не пропустить переход между ними.
+        with events.subscribe([task_id]) as subscription:
+            while True:
+                task_status = await self.get_task_status(task_id)
+                # Не держим соединение из пула, пока ждём уведомления.
+                await self.session.rollback()
+                remaining = deadline - loop.time()
+                if task_status in TERMINAL_TASK_STATUSES or remaining <= 0:
+                    break
+                event = await subscription.get(
+                    timeout=min(remaining, settings.task_wait_recheck_interval)
+                )
+                if event is not None and event.status in TERMINAL_TASK_STATUSES:
+                    if self.repository.cache is not None:
+                        await self.repository.cache.invalidate([task_id])
+                    break
+        return await self.get_task_view(task_id)
+
     async def cancel_task(self, task_id: uuid.UUID) -> Task:
         task = await self.repository.get(task_id)
         if task is None:
@@ -92,3 +278,92 @@ class TaskService:
         await self.session.refresh(task)
         return task
 
+    async def _create_task_via_outbox(
+        self,
+        payload: TaskCreate,
+        outbox: OutboxRepository,
+        *,
+        idempotency_key: str | None,
+        content_hash: str,
+    ) -> Task:
+        # Задача и запись outbox фиксируются одной транзакцией; публикацией занимается релей.
+        task = await self.repository.add(
+            title=payload.title,
+            description=payload.description,
+            priority=payload.priority,
+            input=payload.input,
+            status=TaskStatus.PENDING,
+            content_hash=content_hash if settings.task_dedup_in_flight else None,
+        )
+        if not await self._remember(idempotency_key, task, content_hash):
+            return await self._replay_concurrent(idempotency_key, content_hash)
+        await outbox.add(task_id=task.id, priority=task.priority)
+        await self.session.commit()
+        await self.session.refresh(task)
+        return task
+
+    async def _replay(self, idempotency_key: str, request_hash: str) -> Task | None:
+        record = await self.idempotency.get(idempotency_key)
+        if record is None:
+            return None
+        if record.request_hash != request_hash:
+            raise IdempotencyKeyMismatchError(
+                "Idempotency-Key was already used with a different request"
+            )
+        task = await self.repository.get(record.task_id)
+        if task is None:
+            # Задача ушла в архив вместе с партицией: ключ освобождается.
+            await self.idempotency.delete(idempotency_key)
+        return task
+
+    async def _remember(self, idempotency_key: str | None, task: Task, request_hash: str) -> bool:
+        if idempotency_key is None:
+            return True
+        return await self.idempotency.add(
+            key=idempotency_key,
+            task_id=task.id,
+            request_hash=request_hash,
+        )
+
+    async def _replay_concurrent(self, idempotency_key: str | None, request_hash: str) -> Task:
+        # Параллельный запрос с тем же ключом успел закоммитить свою задачу: наша
+        # откатывается, не дойдя до очереди, и клиент получает задачу победителя.
+        await self.session.rollback()
+        task = await self._replay(cast(str, idempotency_key), request_hash)
+        if task is None:
+            raise TaskConflictError("Concurrent request with the same Idempotency-Key")
+        TASKS_DEDUPLICATED.labels(reason="idempotency_key").inc()
+        return task
+
+    async def _create_tasks_via_outbox(
+        self,
+        payloads: Sequence[TaskCreate],
+        outbox: OutboxRepository,
+    ) -> list[tuple[Task, str | None]]:
+        tasks = await self.repository.add_many(
+            [payload.model_dump() for payload in payloads],
+            status=TaskStatus.PENDING,
+        )
+        await outbox.add_many([(task.id, task.priority) for task in tasks])
+        await self.session.commit()
+        return [(task, None) for task in tasks]
+
+    async def _mark_publish_failed(self, task_ids: Sequence[uuid.UUID]) -> None:
+        await self.repository.mark_many_status(
+            task_ids,
+            status=TaskStatus.FAILED,
+            expected_status=TaskStatus.NEW,
+            finished_at=datetime.now(tz=timezone.utc),
+            error=self.PUBLISH_FAILED_ERROR,
+        )
+
+
+def _content_hash(payload: TaskCreate) -> str:
+    # Канонический JSON (сортированные ключи), чтобы порядок ключей в input не менял хеш.
+    document = json.dumps(
+        payload.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
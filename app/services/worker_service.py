@@ -1,13 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import time
 import uuid
-from datetime import datetime, timezone
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import TaskStatus
+from app.core.config import settings
+from app.metrics import TASK_QUEUE_WAIT, TASK_RUN_DURATION
+from app.models import TaskPriority, TaskStatus
+from app.mq.codec import TaskMessage
 from app.repositories import TaskRepository
-from app.workers.processor import TaskProcessor
+
+if TYPE_CHECKING:
+    from app.models import Task
+    from app.storage import BlobStore
+    from app.workers.executors import TaskExecutorRouter
+    from app.workers.processor import TaskProcessor
+    from app.workers.retry import RetryPolicy
+
+
+@dataclass(frozen=True)
+class TaskFailure:
+    task_id: uuid.UUID
+    priority: TaskPriority
+    attempts: int
+    error: str
+    # None — попытки исчерпаны: задача FAILED, сообщение уходит в dead-letter очередь.
+    retry_in: float | None
 
 
 class TaskWorkerService:
@@ -16,50 +41,182 @@ class TaskWorkerService:
         session: AsyncSession,
         repository: TaskRepository,
         processor: TaskProcessor,
+        executor: TaskExecutorRouter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        *,
+        worker_id: str | None = None,
+        lease_ttl: float | None = None,
+        blob_store: BlobStore | None = None,
     ) -> None:
         self.session = session
         self.repository = repository
         self.processor = processor
+        self.executor = executor
+        self.retry_policy = retry_policy
+        self.worker_id = worker_id
+        self.lease_ttl = lease_ttl
+        self.blob_store = blob_store
 
-    async def execute(self, task_id: uuid.UUID) -> None:
-        task = await self.repository.get_for_update(task_id)
-        if task is None:
-            await self.session.commit()
-            return
-        if task.status in {
-            TaskStatus.CANCELLED,
-            TaskStatus.IN_PROGRESS,
-            TaskStatus.COMPLETED,
-            TaskStatus.FAILED,
-        }:
-            await self.session.commit()
-            return
+    async def execute(self, task_id: uuid.UUID) -> TaskFailure | None:
         start_time = datetime.now(tz=timezone.utc)
-        await self.repository.mark_status(
-            task,
-            status=TaskStatus.IN_PROGRESS,
+        task = await self.repository.claim(
+            task_id,
             started_at=start_time,
+            worker_id=self.worker_id,
+            lease_expires_at=self._lease_expires_at(start_time),
         )
         await self.session.commit()
+        if task is None:
+            return None
+        self._observe_queue_wait(task)
         try:
-            result = await self.processor.run(task)
+            outcome: dict | Exception = await self._complete(task)
         except Exception as exc:
-            finish_time = datetime.now(tz=timezone.utc)
-            await self.repository.mark_status(
-                task,
-                status=TaskStatus.FAILED,
-                finished_at=finish_time,
-                error=str(exc),
+            outcome = exc
+        failures = await self._finish([task], [outcome])
+        await self.session.commit()
+        return failures[0] if failures else None
+
+    async def execute_many(self, task_ids: Sequence[uuid.UUID]) -> list[TaskFailure]:
+        return await self.execute_messages([TaskMessage(task_id) for task_id in task_ids])
+
+    async def execute_messages(self, messages: Sequence[TaskMessage]) -> list[TaskFailure]:
+        start_time = datetime.now(tz=timezone.utc)
+        lease_expires_at = self._lease_expires_at(start_time)
+        authoritative = [message for message in messages if message.authoritative]
+        tasks = await self.repository.claim_many(
+            [message.task_id for message in messages if not message.authoritative],
+            started_at=start_time,
+            worker_id=self.worker_id,
+            lease_expires_at=lease_expires_at,
+        )
+        # Задачу из полного сообщения собираем без чтения строки: захват возвращает
+        # только attempts тех задач, которые этот воркер действительно забрал.
+        attempts = await self.repository.claim_attempts(
+            [message.task_id for message in authoritative],
+            started_at=start_time,
+            worker_id=self.worker_id,
+            lease_expires_at=lease_expires_at,
+        )
+        tasks.extend(
+            message.to_task(
+                attempts=attempts[message.task_id],
+                started_at=start_time,
+                worker_id=self.worker_id,
             )
-            await self.session.commit()
-            return
-        finish_time = datetime.now(tz=timezone.utc)
-        await self.repository.mark_status(
-            task,
-            status=TaskStatus.COMPLETED,
-            finished_at=finish_time,
-            result=result,
-            error=None,
+            for message in authoritative
+            if message.task_id in attempts
+        )
+        await self.session.commit()
+        if not tasks:
+            return []
+        for task in tasks:
+            self._observe_queue_wait(task)
+        outcomes = await asyncio.gather(
+            *(self._complete(task) for task in tasks),
+            return_exceptions=True,
         )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+                raise outcome
+        failures = await self._finish(tasks, outcomes)
         await self.session.commit()
+        return failures
+
+    async def _finish(
+        self,
+        tasks: Sequence[Task],
+        outcomes: Sequence[dict | BaseException],
+    ) -> list[TaskFailure]:
+        finish_time = datetime.now(tz=timezone.utc)
+        completions = []
+        failures: dict[uuid.UUID, TaskFailure] = {}
+        for task, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                failure = self._failure(task, cast(Exception, outcome))
+                # Задача ждёт повтора в PENDING: её снова можно захватить или отменить.
+                retry = failure is not None and failure.retry_in is not None
+                if failure is not None:
+                    failures[task.id] = failure
+                completions.append(
+                    {
+                        "id": task.id,
+                        "status": TaskStatus.PENDING if retry else TaskStatus.FAILED,
+                        "finished_at": None if retry else finish_time,
+                        "result": None,
+                        "result_ref": None,
+                        "result_size": None,
+                        "error": str(outcome),
+                    }
+                )
+            else:
+                completions.append(
+                    {
+                        "id": task.id,
+                        "status": TaskStatus.COMPLETED,
+                        "finished_at": finish_time,
+                        "error": None,
+                        **outcome,
+                    }
+                )
+        applied = await self.repository.complete_many(completions, worker_id=self.worker_id)
+        # Задачу, которую реапер успел вернуть в очередь, выполняет другой воркер:
+        # её повтор или dead-letter больше не наша забота.
+        return [failures[task_id] for task_id in applied if task_id in failures]
+
+    def _lease_expires_at(self, now: datetime) -> datetime | None:
+        if self.lease_ttl is None:
+            return None
+        return now + timedelta(seconds=self.lease_ttl)
+
+    def _failure(self, task: Task, exc: Exception) -> TaskFailure | None:
+        if self.retry_policy is None:
+            return None
+        retry_in = None
+        if self.retry_policy.should_retry(task.priority, task.attempts):
+            retry_in = self.retry_policy.delay(task.attempts)
+        return TaskFailure(
+            task_id=task.id,
+            priority=task.priority,
+            attempts=task.attempts,
+            error=str(exc),
+            retry_in=retry_in,
+        )
+
+    async def _complete(self, task: Task) -> dict:
+        result = await self._run(task)
+        data = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        if self.blob_store is None or len(data) <= settings.result_offload_threshold_bytes:
+            return {"result": result, "result_ref": None, "result_size": len(data)}
+        # Крупный результат в строку не кладём: список и карточка задачи остаются лёгкими,
+        # а сам результат отдаётся потоком через GET /tasks/{id}/result.
+        key = f"{task.id}.json"
+        await self.blob_store.put(key, data)
+        return {"result": None, "result_ref": key, "result_size": len(data)}
+
+    async def _run(self, task: Task) -> dict:
+        started = time.perf_counter()
+        try:
+            if self.executor is None:
+                result = await self.processor.run(task)
+            else:
+                result = await self.executor.run(self.processor, task)
+        except Exception:
+            self._observe_run(task, TaskStatus.FAILED, time.perf_counter() - started)
+            raise
+        self._observe_run(task, TaskStatus.COMPLETED, time.perf_counter() - started)
+        return result
+
+    def _observe_queue_wait(self, task: Task) -> None:
+        if task.started_at is None or task.created_at is None:
+            return
+        # SQLite отдаёт naive-datetime, поэтому приводим обе метки к UTC.
+        started_at, created_at = (
+            value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+            for value in (task.started_at, task.created_at)
+        )
+        wait = (started_at - created_at).total_seconds()
+        TASK_QUEUE_WAIT.labels(priority=task.priority.value).observe(max(wait, 0.0))
 
+    def _observe_run(self, task: Task, status: TaskStatus, elapsed: float) -> None:
+        TASK_RUN_DURATION.labels(priority=task.priority.value, status=status.value).observe(elapsed)
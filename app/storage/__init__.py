@@ -0,0 +1,12 @@
+from app.core.config import settings
+
+from .blob import BlobStore, LocalBlobStore
+
+
+def build_blob_store() -> BlobStore | None:
+    if settings.result_storage_backend == "none":
+        return None
+    return LocalBlobStore(settings.result_storage_path)
+
+
+__all__ = ["BlobStore", "LocalBlobStore", "build_blob_store"]
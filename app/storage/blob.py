@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Protocol
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+class BlobStore(Protocol):
+    async def put(self, key: str, data: bytes) -> None:
+        ...
+
+    async def size(self, key: str) -> int | None:
+        ...
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str | Path, chunk_size: int = 64 * 1024) -> None:
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+    async def size(self, key: str) -> int | None:
+        try:
+            stat = await asyncio.to_thread(self._path(key).stat)
+        except FileNotFoundError:
+            return None
+        return stat.st_size
+
+    async def read(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        # end включительно, как в заголовке Range; файл читается кусками в пуле потоков.
+        handle = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await asyncio.to_thread(handle.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(handle.close)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        if not _KEY_PATTERN.match(key) or key.startswith("."):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        # Двухсимвольные подкаталоги, чтобы в одном каталоге не копились миллионы файлов.
+        return self.root / key[:2] / key
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Пишем во временный файл и атомарно переименовываем: читатель не увидит половину.
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -1,5 +1,5 @@
+from .executors import TaskExecutorRouter
 from .processor import TaskProcessor
 from .worker import QueueWorker
 
-__all__ = ["TaskProcessor", "QueueWorker"]
-
+__all__ = ["TaskExecutorRouter", "TaskProcessor", "QueueWorker"]
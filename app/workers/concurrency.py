@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from app.core.config import settings
+
+
+# AIMD-лимит параллелизма: растёт на 1 за каждое «окно» из limit успешных быстрых задач
+# и умножается на backoff_ratio при ошибке БД или превышении целевой задержки.
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial: int | None = None,
+        min_limit: int | None = None,
+        max_limit: int | None = None,
+        latency_target: float | None = None,
+        backoff_ratio: float | None = None,
+        on_change: Callable[[int], None] | None = None,
+    ) -> None:
+        self.min_limit = min_limit or settings.worker_min_concurrency
+        self.max_limit = max(max_limit or settings.worker_max_concurrency, self.min_limit)
+        initial = initial or settings.worker_concurrency
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.latency_target = latency_target or settings.worker_latency_target_ms / 1000
+        self.backoff_ratio = backoff_ratio or settings.worker_backoff_ratio
+        self.on_change = on_change
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        asyncio.get_running_loop().create_task(self._notify())
+
+    def record(self, latency: float, *, ok: bool) -> None:
+        if not ok or latency > self.latency_target:
+            self._successes = 0
+            self._set_limit(int(self.limit * self.backoff_ratio))
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            self._set_limit(self.limit + 1)
+
+    def _set_limit(self, limit: int) -> None:
+        limit = min(max(limit, self.min_limit), self.max_limit)
+        if limit == self.limit:
+            return
+        self.limit = limit
+        if self.on_change is not None:
+            self.on_change(limit)
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
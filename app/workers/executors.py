@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal
+
+from app.core.config import settings
+from app.models import Task, TaskPriority
+from app.workers.processor import TaskProcessor, task_input
+
+ExecutorMode = Literal["inline", "thread", "process"]
+EXECUTOR_MODES: tuple[ExecutorMode, ...] = ("inline", "thread", "process")
+
+
+def encode_payload(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_payload(raw: bytes) -> dict:
+    return json.loads(raw)
+
+
+def _process_in_child(processor: TaskProcessor, raw: bytes) -> bytes:
+    # Выполняется в дочернем процессе: вход и результат передаются компактным JSON,
+    # а не pickle ORM-объекта Task.
+    return encode_payload(processor.process(decode_payload(raw)))
+
+
+class TaskExecutorRouter:
+    def __init__(
+        self,
+        default: ExecutorMode | None = None,
+        by_priority: dict[str, str] | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        self.default = self._validate(default or settings.worker_executor)
+        by_priority = by_priority if by_priority is not None else settings.worker_executor_by_priority
+        self.by_priority = {
+            TaskPriority(priority): self._validate(mode) for priority, mode in by_priority.items()
+        }
+        self.max_workers = max_workers or settings.worker_executor_max_workers
+        self._pools: dict[ExecutorMode, Executor] = {}
+
+    def mode_for(self, processor: TaskProcessor, task: Task) -> ExecutorMode:
+        if processor.executor is not None:
+            return processor.executor
+        return self.by_priority.get(task.priority, self.default)
+
+    async def run(self, processor: TaskProcessor, task: Task) -> dict:
+        mode = self.mode_for(processor, task)
+        if mode == "inline":
+            return await processor.run(task)
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(mode)
+        if mode == "thread":
+            return await loop.run_in_executor(pool, processor.process, task_input(task))
+        raw = await loop.run_in_executor(
+            pool,
+            _process_in_child,
+            processor,
+            encode_payload(task_input(task)),
+        )
+        return decode_payload(raw)
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._pools.clear()
+
+    def _get_pool(self, mode: ExecutorMode) -> Executor:
+        pool = self._pools.get(mode)
+        if pool is None:
+            if mode == "thread":
+                pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="task-executor")
+            else:
+                pool = ProcessPoolExecutor(self.max_workers)
+            self._pools[mode] = pool
+        return pool
+
+    @staticmethod
+    def _validate(mode: str) -> ExecutorMode:
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode: {mode}")
+        return mode  # type: ignore[return-value]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from app.db import async_session_factory
+from app.mq import OutboxRelay, TaskQueuePublisher
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    publisher = TaskQueuePublisher()
+    await publisher.connect()
+    relay = OutboxRelay(async_session_factory, publisher)
+    # По SIGTERM/SIGINT дорабатываем текущую пачку и выходим, а не обрываем её посередине.
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, relay.stop)
+    logger.info("Starting outbox relay")
+    try:
+        await relay.run()
+    finally:
+        await publisher.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Outbox relay shutdown requested")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from app.db import engine
+from app.workers.partitions import TaskPartitionMaintainer
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    maintainer = TaskPartitionMaintainer(engine)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, maintainer.stop)
+    logger.info("Starting task partition maintenance")
+    try:
+        await maintainer.run()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
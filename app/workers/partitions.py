@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO
+
+from pydantic_core import to_json
+from sqlalchemy import MetaData, Select, Table, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.metrics import TASK_PARTITIONS
+from app.models import TERMINAL_TASK_STATUSES, Task, TaskIdempotencyKey
+from app.storage import BlobStore, build_blob_store
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_PATTERN = re.compile(r"^tasks_p(\d{4})(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"tasks_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> datetime | None:
+    match = _PARTITION_PATTERN.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def months_to_create(now: datetime, ahead: int) -> list[datetime]:
+    current = month_start(now)
+    return [add_months(current, offset) for offset in range(ahead + 1)]
+
+
+def is_expired(month: datetime, now: datetime, retention_days: int) -> bool:
+    # Партиция уходит в архив, только когда срок хранения истёк для всех её строк.
+    return add_months(month, 1) <= now - timedelta(days=retention_days)
+
+
+@dataclass(frozen=True)
+class TaskPartition:
+    name: str
+    month: datetime
+    attached: bool
+    detach_pending: bool
+
+
+class TaskPartitionMaintainer:
+    # Только PostgreSQL 14+: DETACH PARTITION CONCURRENTLY не блокирует чтение и запись
+    # в tasks, а устаревшие строки уходят вместе с партицией, без DELETE и вакуума.
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        archive_path: str | Path | None = None,
+        retention_days: int | None = None,
+        months_ahead: int | None = None,
+        interval: float | None = None,
+        batch_size: int = 1000,
+        idempotency_key_retention_hours: int | None = None,
+        blob_store: BlobStore | None = None,
+    ) -> None:
+        self.engine = engine
+        self.archive_path = Path(archive_path or settings.task_archive_path)
+        self.retention_days = retention_days or settings.task_retention_days
+        self.months_ahead = (
+            settings.task_partition_months_ahead if months_ahead is None else months_ahead
+        )
+        self.interval = interval or settings.partition_maintenance_interval
+        self.batch_size = batch_size
+        self.idempotency_key_retention_hours = (
+            idempotency_key_retention_hours or settings.idempotency_key_retention_hours
+        )
+        self.blob_store = blob_store or build_blob_store()
+        self._stopping = asyncio.Event()
+
+    async def run_once(self, now: datetime | None = None) -> int:
+        if self.engine.dialect.name != "postgresql":
+            return 0
+        now = now or datetime.now(tz=timezone.utc)
+        created = await self.ensure_partitions(now)
+        archived = await self.archive_expired(now)
+        purged = await self.purge_idempotency_keys(now)
+        if purged:
+            logger.info("Purged %s expired idempotency keys", purged)
+        if created or archived:
+            logger.info("Task partitions maintained: created %s, archived %s", created, archived)
+        return len(created) + len(archived)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception as exc:
+                logger.exception("Partition maintenance iteration failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def ensure_partitions(self, now: datetime) -> list[str]:
+        existing = {partition.name for partition in await self.partitions()}
+        created: list[str] = []
+        for month in months_to_create(now, self.months_ahead):
+            name = partition_name(month)
+            if name in existing:
+                continue
+            # Пустая таблица присоединяется под SHARE UPDATE EXCLUSIVE: вставки и чтения
+            # tasks не ждут, а проверка границ пустой партиции мгновенна. Индексы
+            # родителя PostgreSQL создаёт на ней сам.
+            async with self.engine.begin() as conn:
+                await conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                await conn.execute(text(f'CREATE TABLE "{name}" (LIKE tasks INCLUDING DEFAULTS)'))
+                await conn.execute(
+                    text(
+                        f'ALTER TABLE tasks ATTACH PARTITION "{name}" FOR VALUES '
+                        f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    )
+                )
+            TASK_PARTITIONS.labels(action="created").inc()
+            created.append(name)
+        return created
+
+    async def archive_expired(self, now: datetime) -> list[str]:
+        archived: list[str] = []
+        for partition in await self.partitions():
+            if not is_expired(partition.month, now, self.retention_days):
+                continue
+            if partition.attached and not partition.detach_pending:
+                if await self._has_active_tasks(partition.name):
+                    logger.warning(
+                        "Partition %s is past retention but still has unfinished tasks",
+                        partition.name,
+                    )
+                    continue
+            await self._detach(partition)
+            path = await self._export(partition.name)
+            # Блобы удаляются до DROP TABLE: прерванный проход доархивирует партицию
+            # и повторит удаление, а отсутствующий блоб удаляется без ошибки.
+            blobs = await self._delete_blobs(partition.name)
+            async with self.engine.begin() as conn:
+                await conn.execute(text(f'DROP TABLE "{partition.name}"'))
+            TASK_PARTITIONS.labels(action="archived").inc()
+            logger.info(
+                "Archived partition %s to %s, deleted %s result blobs", partition.name, path, blobs
+            )
+            archived.append(partition.name)
+        return archived
+
+    async def purge_idempotency_keys(self, now: datetime) -> int:
+        cutoff = now - timedelta(hours=self.idempotency_key_retention_hours)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                delete(TaskIdempotencyKey).where(TaskIdempotencyKey.created_at < cutoff)
+            )
+        return result.rowcount or 0
+
+    async def partitions(self) -> list[TaskPartition]:
+        # Вместе с присоединёнными находим и отсоединённые, но не удалённые партиции:
+        # прерванный проход доархивирует их в следующий раз.
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT c.relname, i.inhrelid IS NOT NULL, coalesce(i.inhdetachpending, false) "
+                    "FROM pg_class c "
+                    "LEFT JOIN pg_inherits i "
+                    "ON i.inhrelid = c.oid AND i.inhparent = 'tasks'::regclass "
+                    "WHERE c.relkind = 'r' AND c.relname ~ '^tasks_p[0-9]{6}$' "
+                    "AND pg_table_is_visible(c.oid) "
+                    "ORDER BY c.relname"
+                )
+            )
+            rows = result.all()
+        return [
+            TaskPartition(name, month, attached, detach_pending)
+            for name, attached, detach_pending in rows
+            if (month := partition_month(name)) is not None
+        ]
+
+    async def _has_active_tasks(self, name: str) -> bool:
+        statuses = ", ".join(f"'{status.value}'" for status in TERMINAL_TASK_STATUSES)
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(f'SELECT EXISTS (SELECT 1 FROM "{name}" WHERE status NOT IN ({statuses}))')
+            )
+            return bool(result.scalar_one())
+
+    async def _detach(self, partition: TaskPartition) -> None:
+        if not partition.attached:
+            return
+        # CONCURRENTLY нельзя выполнять внутри транзакции; прерванное отсоединение
+        # завершается через FINALIZE.
+        mode = "FINALIZE" if partition.detach_pending else "CONCURRENTLY"
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(
+                text(f'ALTER TABLE tasks DETACH PARTITION "{partition.name}" {mode}')
+            )
+
+    async def _export(self, name: str) -> Path:
+        await asyncio.to_thread(self.archive_path.mkdir, parents=True, exist_ok=True)
+        path = self.archive_path / f"{name}.jsonl.gz"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        handle = await asyncio.to_thread(gzip.open, tmp_path, "wb")
+        try:
+            async with self.engine.connect() as conn:
+                await self._stream_rows(conn, select(_partition_table(name)), handle)
+        finally:
+            await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(os.replace, tmp_path, path)
+        return path
+
+    async def _delete_blobs(self, name: str) -> int:
+        if self.blob_store is None:
+            return 0
+        # Вынесенные результаты уходят вместе с партицией: их ключи сохранены в архиве,
+        # а без строк блобы стали бы недостижимыми.
+        table = _partition_table(name)
+        deleted = 0
+        async with self.engine.connect() as conn:
+            result = await conn.stream(
+                select(table.c.result_ref).where(table.c.result_ref.is_not(None))
+            )
+            async for keys in result.scalars().partitions(self.batch_size):
+                await asyncio.gather(*(self.blob_store.delete(key) for key in keys))
+                deleted += len(keys)
+        return deleted
+
+    async def _stream_rows(self, conn: AsyncConnection, stmt: Select, handle: IO[bytes]) -> None:
+        # Серверный курсор: в памяти держится одна пачка строк, а не вся партиция.
+        result = await conn.stream(stmt)
+        async for rows in result.mappings().partitions(self.batch_size):
+            chunk = b"".join(to_json(dict(row)) + b"\n" for row in rows)
+            await asyncio.to_thread(handle.write, chunk)
+
+
+def _partition_table(name: str) -> Table:
+    # Та же схема, что у tasks, но под именем партиции: колонки JSON и enum
+    # декодируются типами модели.
+    return Task.__table__.to_metadata(MetaData(), name=name)
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from typing import TYPE_CHECKING
 
 from app.models import Task, TaskPriority
 
+if TYPE_CHECKING:
+    from app.workers.executors import ExecutorMode
+
+
+def task_input(task: Task) -> dict:
+    return {
+        "id": str(task.id),
+        "title": task.title,
+        "description": task.description,
+        "priority": task.priority.value,
+        "input": task.input,
+    }
+
 
 class TaskProcessor:
     DURATION_MAP = {
@@ -11,13 +26,23 @@ class TaskProcessor:
         TaskPriority.MEDIUM: 0.1,
         TaskPriority.LOW: 0.15,
     }
+    # Режим исполнения, закреплённый за процессором; None — решает конфигурация воркера.
+    executor: ExecutorMode | None = None
 
     async def run(self, task: Task) -> dict:
         delay = self.DURATION_MAP.get(task.priority, 0.1)
         await asyncio.sleep(delay)
+        return self._build_result(task_input(task))
+
+    def process(self, data: dict) -> dict:
+        # Синхронная точка входа для пулов потоков и процессов: получает task_input(task).
+        delay = self.DURATION_MAP.get(TaskPriority(data["priority"]), 0.1)
+        time.sleep(delay)
+        return self._build_result(data)
+
+    def _build_result(self, data: dict) -> dict:
         return {
-            "summary": f"Task {task.id} processed",
-            "title": task.title,
-            "priority": task.priority.value,
+            "summary": f"Task {data['id']} processed",
+            "title": data["title"],
+            "priority": data["priority"],
         }
-
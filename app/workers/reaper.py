@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.metrics import LEASES_RECLAIMED
+from app.models import Task, TaskStatus
+from app.mq import TaskMessage, TaskPublisherProtocol
+from app.repositories import TaskRepository
+from app.workers.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseReaper:
+    LEASE_EXPIRED_ERROR = "Worker lease expired"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: TaskPublisherProtocol,
+        retry_policy: RetryPolicy | None = None,
+        batch_size: int | None = None,
+        interval: float | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.batch_size = batch_size or settings.reaper_batch_size
+        self.interval = interval or settings.reaper_interval
+        self._stopping = asyncio.Event()
+
+    async def run_once(self) -> int:
+        now = datetime.now(tz=timezone.utc)
+        async with self.session_factory() as session:
+            repository = TaskRepository(session)
+            tasks = await repository.claim_expired_leases(now=now, limit=self.batch_size)
+            if not tasks:
+                await session.commit()
+                return 0
+            # Оборвавшийся запуск уже учтён в attempts, поэтому задача, которая роняет
+            # воркеры, не будет возвращаться бесконечно.
+            requeue: list[Task] = []
+            exhausted: list[uuid.UUID] = []
+            for task in tasks:
+                if self.retry_policy.should_retry(task.priority, task.attempts):
+                    requeue.append(task)
+                else:
+                    exhausted.append(task.id)
+            try:
+                errors = await self.publisher.publish_tasks(
+                    [TaskMessage.from_task(task) for task in requeue]
+                )
+            except Exception as exc:
+                logger.warning("Lease reaper failed to republish tasks: %s", exc)
+                errors = [exc] * len(requeue)
+            # Строки заблокированы до коммита: доставка, пришедшая раньше, дождётся
+            # блокировки в claim и увидит уже PENDING. Неопубликованные задачи остаются
+            # с истёкшей арендой и будут возвращены на следующем проходе.
+            requeued = [task.id for task, error in zip(requeue, errors) if error is None]
+            await repository.mark_many_status(
+                requeued,
+                status=TaskStatus.PENDING,
+                expected_status=TaskStatus.IN_PROGRESS,
+            )
+            await repository.mark_many_status(
+                exhausted,
+                status=TaskStatus.FAILED,
+                expected_status=TaskStatus.IN_PROGRESS,
+                finished_at=now,
+                error=self.LEASE_EXPIRED_ERROR,
+            )
+            await session.commit()
+        LEASES_RECLAIMED.labels(outcome="requeued").inc(len(requeued))
+        LEASES_RECLAIMED.labels(outcome="failed").inc(len(exhausted))
+        if requeued or exhausted:
+            logger.info(
+                "Reclaimed expired leases: %s requeued, %s failed", len(requeued), len(exhausted)
+            )
+        return len(tasks)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                reclaimed = await self.run_once()
+            except Exception as exc:
+                logger.exception("Lease reaper iteration failed: %s", exc)
+                reclaimed = 0
+            if reclaimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self) -> None:
+        self._stopping.set()
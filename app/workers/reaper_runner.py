@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from app.db import async_session_factory
+from app.mq import TaskQueuePublisher
+from app.workers.reaper import LeaseReaper
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    publisher = TaskQueuePublisher()
+    await publisher.connect()
+    reaper = LeaseReaper(async_session_factory, publisher)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, reaper.stop)
+    logger.info("Starting lease reaper")
+    try:
+        await reaper.run()
+    finally:
+        await publisher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Callable, Mapping
+
+from app.core.config import settings
+from app.models import TaskPriority
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: Mapping[str, int] | None = None,
+        base_delay: float | None = None,
+        max_delay: float | None = None,
+        jitter: float | None = None,
+        random_fn: Callable[[], float] = random.random,
+    ) -> None:
+        if max_attempts is None:
+            max_attempts = settings.task_retry_max_attempts
+        if base_delay is None:
+            base_delay = settings.task_retry_base_delay_ms / 1000
+        if max_delay is None:
+            max_delay = settings.task_retry_max_delay_ms / 1000
+        self._max_attempts = {
+            priority: max(int(max_attempts.get(priority.value, 1)), 1) for priority in TaskPriority
+        }
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = settings.task_retry_jitter if jitter is None else jitter
+        self.random_fn = random_fn
+
+    def max_attempts(self, priority: TaskPriority) -> int:
+        return self._max_attempts[priority]
+
+    def should_retry(self, priority: TaskPriority, attempts: int) -> bool:
+        return attempts < self.max_attempts(priority)
+
+    def delay(self, attempts: int) -> float:
+        # Экспонента от номера завершившейся попытки, срезанная сверху; jitter уменьшает
+        # задержку на случайную долю, чтобы одновременно упавшие задачи не вернулись пачкой.
+        delay = min(self.base_delay * 2 ** max(attempts - 1, 0), self.max_delay)
+        return delay * (1 - self.jitter * self.random_fn())
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import logging
 
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.workers.supervisor import WorkerSupervisor
 from app.workers.worker import QueueWorker
 
 
@@ -11,14 +16,31 @@ logger = logging.getLogger(__name__)
 
 
 async def main() -> None:
+    if settings.worker_metrics_port is not None:
+        start_http_server(settings.worker_metrics_port)
     worker = QueueWorker()
     logger.info("Starting task worker")
-    await worker.start()
+    await worker.run_until_signalled()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Task queue worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.worker_processes,
+        help="number of worker processes; more than one starts the supervisor",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    try:
+    args = parse_args()
+    if settings.broker_backend == "memory":
+        raise SystemExit("BROKER_BACKEND=memory runs the worker inside the API process")
+    if args.processes > 1:
+        logger.info("Starting worker supervisor with %s processes", args.processes)
+        WorkerSupervisor(args.processes).run()
+    else:
         asyncio.run(main())
-    except KeyboardInterrupt:
-        logger.info("Worker shutdown requested")
-
+        logger.info("Worker stopped")
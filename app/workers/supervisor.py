@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from collections.abc import Callable
+from multiprocessing.context import SpawnProcess
+from multiprocessing.sharedctypes import SynchronizedArray
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _run_child(index: int, counters: SynchronizedArray) -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_child_main(index, counters))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _child_main(index: int, counters: SynchronizedArray) -> None:
+    # Импорт внутри дочернего процесса: каждый ребёнок создаёт собственные
+    # AMQP-подключение и движок БД, ничего не наследуя от супервизора.
+    from prometheus_client import start_http_server
+
+    from app.workers.worker import QueueWorker
+
+    # Каждый процесс экспортирует свои метрики на отдельном порту: base + index.
+    if settings.worker_metrics_port is not None:
+        start_http_server(settings.worker_metrics_port + index)
+    # Счётчик перезапущенного процесса продолжает значение предыдущего, чтобы общий
+    # итог супервизора не уменьшался и скорость не уходила в минус.
+    offset = counters[index]
+    worker = QueueWorker()
+    runner = asyncio.create_task(worker.run_until_signalled())
+    logger.info("Worker process %s started", index)
+    try:
+        while not runner.done():
+            counters[index] = offset + worker.processed
+            await asyncio.wait({runner}, timeout=1)
+    finally:
+        counters[index] = offset + worker.processed
+    runner.result()
+
+
+class WorkerSupervisor:
+    # Запас сверх WORKER_SHUTDOWN_TIMEOUT: ребёнок тратит весь таймаут на drain, и
+    # родитель не должен убивать его в момент завершения.
+    SHUTDOWN_MARGIN = 5.0
+
+    def __init__(
+        self,
+        processes: int,
+        restart_delay: float | None = None,
+        stats_interval: float | None = None,
+        shutdown_timeout: float | None = None,
+        target: Callable[[int, SynchronizedArray], None] = _run_child,
+    ) -> None:
+        self.processes = processes
+        self.restart_delay = restart_delay or settings.worker_restart_delay
+        self.stats_interval = stats_interval or settings.worker_stats_interval
+        self.shutdown_timeout = shutdown_timeout or settings.worker_shutdown_timeout
+        self.target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._counters = self._context.Array("q", processes)
+        self._children: list[SpawnProcess | None] = [None] * processes
+        self._restarts = [0] * processes
+        self._stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for index in range(self.processes):
+            self._spawn(index)
+        last_stats = time.monotonic()
+        last_counts = list(self._counters)
+        while not self._stopping:
+            time.sleep(min(self.restart_delay, 1.0))
+            self._restart_exited()
+            now = time.monotonic()
+            if now - last_stats >= self.stats_interval:
+                last_counts = self._log_stats(last_counts, now - last_stats)
+                last_stats = now
+        self._shutdown()
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    def _request_stop(self, signum: int, frame: object) -> None:
+        logger.info("Supervisor received signal %s, draining workers", signum)
+        self.stop()
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=self.target,
+            args=(index, self._counters),
+            name=f"task-worker-{index}",
+        )
+        process.start()
+        self._children[index] = process
+
+    def _restart_exited(self) -> None:
+        for index, process in enumerate(self._children):
+            if process is None or process.is_alive() or self._stopping:
+                continue
+            self._restarts[index] += 1
+            logger.warning(
+                "Worker process %s exited with code %s, restarting (restart #%s)",
+                index,
+                process.exitcode,
+                self._restarts[index],
+            )
+            self._spawn(index)
+
+    def _log_stats(self, last_counts: list[int], elapsed: float) -> list[int]:
+        counts = list(self._counters)
+        rates = [(current - previous) / elapsed for current, previous in zip(counts, last_counts)]
+        logger.info(
+            "Workers processed %s tasks total, %.1f tasks/s; per process: %s",
+            sum(counts),
+            sum(rates),
+            ", ".join(f"#{index}={rate:.1f}/s" for index, rate in enumerate(rates)),
+        )
+        return counts
+
+    def _shutdown(self) -> None:
+        # SIGTERM даёт детям доработать текущие задачи; не успевших завершаем принудительно.
+        children = [process for process in self._children if process is not None]
+        for process in children:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout + self.SHUTDOWN_MARGIN
+        for process in children:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Worker process %s did not stop in time, killing", process.name)
+                process.kill()
+                process.join()
+        logger.info("Supervisor stopped, %s tasks processed", sum(self._counters))
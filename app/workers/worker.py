@@ -1,18 +1,34 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import os
+import signal
+import socket
+import time
 import uuid
+from collections.abc import Coroutine, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any
 
-import aio_pika
-from aio_pika import IncomingMessage
 import logging
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.cache import TaskCache
 from app.core.config import settings
 from app.db import async_session_factory
+from app.metrics import WORKER_CONCURRENCY_LIMIT, WORKER_IN_FLIGHT
+from app.mq.codec import TaskMessage, decode_task_message
+from app.mq.consumer import RabbitMQTaskConsumer, TaskConsumerProtocol, TaskDelivery
+from app.models import TaskPriority
 from app.repositories import TaskRepository
-from app.services.worker_service import TaskWorkerService
+from app.services.worker_service import TaskFailure, TaskWorkerService
+from app.storage import build_blob_store
+from app.workers.concurrency import AdaptiveConcurrencyLimiter
+from app.workers.executors import TaskExecutorRouter
+from app.workers.scheduling import WeightedPriorityScheduler
 from app.workers.processor import TaskProcessor
+from app.workers.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -24,59 +40,328 @@ class QueueWorker:
         url: str | None = None,
         concurrency: int | None = None,
         prefetch_count: int | None = None,
+        batch_size: int | None = None,
+        batch_timeout_ms: int | None = None,
+        adaptive_concurrency: bool | None = None,
+        cache: TaskCache | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        consumer: TaskConsumerProtocol | None = None,
+        topology: str | None = None,
     ) -> None:
         self.queue_name = queue_name or settings.rabbitmq_queue
         self.url = url or settings.rabbitmq_url
         self.concurrency = concurrency or settings.worker_concurrency
         self.prefetch_count = prefetch_count or settings.worker_prefetch_count
+        self.batch_size = batch_size or settings.worker_batch_size
+        self.batch_timeout = (batch_timeout_ms or settings.worker_batch_timeout_ms) / 1000
+        # Кэш передаётся, только если он общий с API (например, внешний backend):
+        # in-memory кэш процесса воркера API не увидит.
+        self.cache = cache
+        self.session_factory = session_factory or async_session_factory
+        self.topology = topology or settings.rabbitmq_queue_topology
+        self.consumer = consumer or RabbitMQTaskConsumer(self.queue_name, self.url, self.topology)
         self.processor = TaskProcessor()
-        self._connection: aio_pika.RobustConnection | None = None
-        self._channel: aio_pika.RobustChannel | None = None
+        self.executor = TaskExecutorRouter()
+        self.retry_policy = RetryPolicy()
+        self.blob_store = build_blob_store()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_ttl = settings.worker_lease_ttl
+        self.lease_renew_interval = settings.worker_lease_renew_interval
+        self.processed = 0
+        if adaptive_concurrency is None:
+            adaptive_concurrency = settings.worker_adaptive_concurrency
+        self.limiter: AdaptiveConcurrencyLimiter | None = None
+        if adaptive_concurrency:
+            self.limiter = AdaptiveConcurrencyLimiter(
+                initial=self.concurrency,
+                on_change=self._on_limit_change,
+            )
+        self._consumer: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+        self._qos_update: asyncio.Task | None = None
+        self._leased: dict[uuid.UUID, int] = {}
+        self._lease_renewer: asyncio.Task | None = None
+        self._draining = False
+        WORKER_CONCURRENCY_LIMIT.set(self.limiter.limit if self.limiter else self.concurrency)
 
     async def start(self) -> None:
-        self._connection = await aio_pika.connect_robust(self.url)
-        self._channel = await self._connection.channel()
-        await self._channel.set_qos(prefetch_count=self.prefetch_count)
-        queue = await self._channel.declare_queue(
-            self.queue_name,
-            durable=True,
-            arguments={"x-max-priority": settings.rabbitmq_max_priority},
-        )
-        semaphore = asyncio.Semaphore(self.concurrency)
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
+        await self.consumer.connect()
+        self._lease_renewer = asyncio.create_task(self._renew_leases())
+        # В режиме батчинга брокер должен отдавать хотя бы целую пачку неподтверждённых доставок.
+        await self.consumer.set_prefetch(self._prefetch_for(self.concurrency))
+        if self.batch_size > 1:
+            self._consumer = asyncio.create_task(self._consume_batches())
+        else:
+            self._consumer = asyncio.create_task(self._consume())
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            if not self._draining:
+                raise
+
+    async def run_until_signalled(self) -> None:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        consumer = asyncio.create_task(self.start())
+        stopper = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({consumer, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopper.cancel()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(sig)
+        if stop.is_set():
+            logger.info("Shutdown requested, draining %s in-flight tasks", len(self._in_flight))
+        await self.drain()
+        await asyncio.gather(consumer, return_exceptions=True)
+        if not consumer.cancelled() and consumer.exception() is not None:
+            raise consumer.exception()  # type: ignore[misc]
+
+    async def drain(self, timeout: float | None = None) -> None:
+        timeout = settings.worker_shutdown_timeout if timeout is None else timeout
+        self._draining = True
+        # Сначала перестаём принимать доставки: ещё не начатые сообщения брокер
+        # переотдаст другим воркерам после закрытия канала.
+        if self._consumer is not None and not self._consumer.done():
+            self._consumer.cancel()
+            await asyncio.gather(self._consumer, return_exceptions=True)
+        if self._in_flight:
+            _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+            if pending:
+                logger.warning(
+                    "%s tasks did not finish within %.1fs; their messages will be redelivered",
+                    len(pending),
+                    timeout,
+                )
+        await self.close()
+
+    async def _consume(self) -> None:
+        semaphore: asyncio.Semaphore | AdaptiveConcurrencyLimiter
+        semaphore = self.limiter or asyncio.Semaphore(self.concurrency)
+        deliveries, consumer_tags = await self._subscribe()
+        try:
+            while True:
+                message = await deliveries.get()
                 await semaphore.acquire()
-                asyncio.create_task(self._process_message(message, semaphore))
+                self._track(self._process_message(message, semaphore))
+        finally:
+            for consumer_tag in consumer_tags:
+                await self.consumer.cancel(consumer_tag)
+
+    async def _subscribe(
+        self,
+    ) -> tuple[asyncio.Queue[TaskDelivery] | WeightedPriorityScheduler, list[str]]:
+        if self.topology != "per_priority":
+            deliveries: asyncio.Queue[TaskDelivery] = asyncio.Queue()
+            return deliveries, [await self.consumer.consume(deliveries.put)]
+        # Каждая очередь приоритета получает свой prefetch, а порядок обработки
+        # буферизованных доставок решает взвешенный планировщик.
+        scheduler = WeightedPriorityScheduler()
+        consumer_tags = [
+            await self.consumer.consume(scheduler.callback_for(priority), priority=priority)
+            for priority in TaskPriority
+        ]
+        return scheduler, consumer_tags
+
+    def _track(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._in_flight.add(task)
+        WORKER_IN_FLIGHT.inc()
+        task.add_done_callback(self._untrack)
+        return task
+
+    def _untrack(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        WORKER_IN_FLIGHT.dec()
 
     async def close(self) -> None:
-        if self._channel and not self._channel.is_closed:
-            await self._channel.close()
-        if self._connection and not self._connection.is_closed:
-            await self._connection.close()
+        # Аренду продлеваем до конца drain: останавливаем только после in-flight задач.
+        if self._lease_renewer is not None:
+            self._lease_renewer.cancel()
+            await asyncio.gather(self._lease_renewer, return_exceptions=True)
+        await self.consumer.close()
+        await asyncio.to_thread(self.executor.shutdown)
 
     async def _process_message(
         self,
-        message: IncomingMessage,
-        semaphore: asyncio.Semaphore,
+        message: TaskDelivery,
+        semaphore: asyncio.Semaphore | AdaptiveConcurrencyLimiter,
     ) -> None:
         try:
-            async with message.process(requeue=False):
+            # Ошибки выполнения задачи сервис превращает в повтор или FAILED; наружу выходят
+            # только сбои инфраструктуры (БД, брокер), и тогда доставка возвращается в очередь:
+            # подтверждение оставило бы задачу в PENDING навсегда.
+            async with message.process(requeue=True):
                 try:
-                    payload = json.loads(message.body.decode("utf-8"))
-                    task_id = uuid.UUID(payload["task_id"])
-                except (ValueError, KeyError) as exc:
+                    task_message = decode_task_message(message.body, message.content_type)
+                except ValueError as exc:
                     logger.error("Invalid task payload: %s", exc)
                     return
-                await self._handle_task(task_id)
+                started = time.perf_counter()
+                ok = False
+                try:
+                    await self._handle_task(task_message)
+                    ok = True
+                finally:
+                    if self.limiter is not None:
+                        self.limiter.record(time.perf_counter() - started, ok=ok)
+                self.processed += 1
+        except Exception as exc:
+            logger.exception("Worker failed to execute task, message requeued: %s", exc)
         finally:
             semaphore.release()
 
-    async def _handle_task(self, task_id: uuid.UUID) -> None:
+    async def _consume_batches(self) -> None:
+        deliveries, consumer_tags = await self._subscribe()
+        # Пачки обрабатываются последовательно: multi-ack подтверждает все доставки канала
+        # с тегом не больше последнего, поэтому параллельная пачка не должна их перекрывать.
         try:
-            async with async_session_factory() as session:
-                repo = TaskRepository(session)
-                service = TaskWorkerService(session, repo, self.processor)
-                await service.execute(task_id)
+            while True:
+                batch = await self._collect_batch(deliveries)
+                # shield: отмена потребителя при drain не должна обрывать начатую пачку.
+                await asyncio.shield(self._track(self._process_batch(batch)))
+        finally:
+            for consumer_tag in consumer_tags:
+                await self.consumer.cancel(consumer_tag)
+
+    async def _collect_batch(
+        self,
+        deliveries: asyncio.Queue[TaskDelivery] | WeightedPriorityScheduler,
+    ) -> list[TaskDelivery]:
+        batch = [await deliveries.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(deliveries.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _process_batch(self, batch: list[TaskDelivery]) -> None:
+        task_messages: dict[uuid.UUID, TaskMessage] = {}
+        decoded: list[TaskDelivery] = []
+        for message in batch:
+            try:
+                task_message = decode_task_message(message.body, message.content_type)
+            except ValueError as exc:
+                logger.error("Invalid task payload: %s", exc)
+                continue
+            decoded.append(message)
+            task_messages.setdefault(task_message.task_id, task_message)
+        task_ids = list(task_messages)
+        try:
+            async with self.session_factory() as session:
+                repo = TaskRepository(session, cache=self.cache)
+                service = self._service(session, repo)
+                with self._holding_leases(task_ids):
+                    failures = await service.execute_messages(list(task_messages.values()))
+            await self._reschedule(failures)
         except Exception as exc:
-            logger.exception("Worker failed to execute task %s: %s", task_id, exc)
+            # Сбой инфраструктуры: задачи пачки не доведены до конца, поэтому их доставки
+            # возвращаются в очередь, а подтверждаются только нераспознанные сообщения.
+            logger.exception(
+                "Worker failed to execute batch of %s tasks, messages requeued: %s",
+                len(task_ids),
+                exc,
+            )
+            for message in batch:
+                if message in decoded:
+                    await message.reject(requeue=True)
+                else:
+                    await message.ack()
+            return
+        self.processed += len(task_ids)
+        if self.topology == "per_priority":
+            # Планировщик выдаёт доставки не по порядку тегов: multi-ack подтвердил бы
+            # и ещё не обработанные сообщения других приоритетов из его буфера.
+            for message in batch:
+                await message.ack()
+            return
+        await max(batch, key=lambda message: message.delivery_tag).ack(multiple=True)
+
+    async def _handle_task(self, message: TaskMessage) -> None:
+        async with self.session_factory() as session:
+            repo = TaskRepository(session, cache=self.cache)
+            service = self._service(session, repo)
+            with self._holding_leases([message.task_id]):
+                failures = await service.execute_messages([message])
+        await self._reschedule(failures)
+
+    def _service(self, session: AsyncSession, repository: TaskRepository) -> TaskWorkerService:
+        return TaskWorkerService(
+            session,
+            repository,
+            self.processor,
+            self.executor,
+            self.retry_policy,
+            worker_id=self.worker_id,
+            lease_ttl=self.lease_ttl,
+            blob_store=self.blob_store,
+        )
+
+    @contextmanager
+    def _holding_leases(self, task_ids: list[uuid.UUID]) -> Iterator[None]:
+        # Счётчик, а не множество: дубликат доставки может выполняться параллельно.
+        for task_id in task_ids:
+            self._leased[task_id] = self._leased.get(task_id, 0) + 1
+        try:
+            yield
+        finally:
+            for task_id in task_ids:
+                if self._leased[task_id] == 1:
+                    del self._leased[task_id]
+                else:
+                    self._leased[task_id] -= 1
+
+    async def _renew_leases(self) -> None:
+        # Одним UPDATE на все выполняющиеся задачи воркера раз в интервал.
+        while True:
+            await asyncio.sleep(self.lease_renew_interval)
+            if not self._leased:
+                continue
+            try:
+                async with self.session_factory() as session:
+                    await TaskRepository(session).renew_leases(
+                        list(self._leased),
+                        worker_id=self.worker_id,
+                        lease_expires_at=datetime.now(tz=timezone.utc)
+                        + timedelta(seconds=self.lease_ttl),
+                    )
+                    await session.commit()
+            except Exception as exc:
+                logger.exception("Failed to renew task leases: %s", exc)
+
+    async def _reschedule(self, failures: list[TaskFailure]) -> None:
+        # Повтор публикуется до подтверждения исходной доставки: при падении воркера
+        # между ними сообщение вернётся из рабочей очереди, и задача выполнится ещё раз.
+        for failure in failures:
+            try:
+                if failure.retry_in is None:
+                    await self.consumer.dead_letter(
+                        failure.task_id, failure.priority, failure.attempts, failure.error
+                    )
+                else:
+                    await self.consumer.schedule_retry(
+                        failure.task_id, failure.priority, failure.attempts, failure.retry_in
+                    )
+            except Exception as exc:
+                logger.exception("Failed to reschedule task %s: %s", failure.task_id, exc)
+
+    def _prefetch_for(self, limit: int) -> int:
+        if self.limiter is not None:
+            return max(limit, self.batch_size)
+        return max(self.prefetch_count, self.batch_size)
+
+    def _on_limit_change(self, limit: int) -> None:
+        logger.info("Adaptive concurrency limit changed to %s", limit)
+        WORKER_CONCURRENCY_LIMIT.set(limit)
+        self._qos_update = asyncio.create_task(
+            self.consumer.set_prefetch(self._prefetch_for(limit))
+        )
 
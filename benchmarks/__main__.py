@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.pipeline import BenchmarkConfig, PipelineBenchmark, parse_mix
+from benchmarks.report import compare, format_summary
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run(args: argparse.Namespace) -> int:
+    config = BenchmarkConfig(
+        rate=args.rate,
+        duration=args.duration,
+        database_url=args.database_url,
+        operation_mix=parse_mix(args.mix),
+        priority_mix=parse_mix(args.priorities),
+        description_size=args.description_size,
+        worker_concurrency=args.worker_concurrency,
+        worker_batch_size=args.worker_batch_size,
+        processing_scale=args.processing_scale,
+        cache=not args.no_cache,
+        seed=args.seed,
+    )
+    results = asyncio.run(PipelineBenchmark(config).run())
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": asdict(config),
+        **results,
+    }
+    print(format_summary(report))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    regressions = compare(baseline, current, args.threshold)
+    print(f"baseline {baseline.get('commit')} -> current {current.get('commit')}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Нагрузить API и воркер и записать результаты")
+    run.add_argument("--rate", type=float, default=50.0, help="Запросов к API в секунду")
+    run.add_argument("--duration", type=float, default=10.0, help="Длительность нагрузки, с")
+    run.add_argument("--database-url", default=None, help="По умолчанию временный SQLite")
+    run.add_argument("--mix", default="create=0.5,status=0.3,get=0.1,list=0.1")
+    run.add_argument("--priorities", default="HIGH=0.2,MEDIUM=0.5,LOW=0.3")
+    run.add_argument("--description-size", type=int, default=256)
+    run.add_argument("--worker-concurrency", type=int, default=10)
+    run.add_argument("--worker-batch-size", type=int, default=1)
+    run.add_argument(
+        "--processing-scale",
+        type=float,
+        default=1.0,
+        help="Множитель имитации работы процессора; 0 — без задержек",
+    )
+    run.add_argument("--no-cache", action="store_true")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", "-o", default=None, help="Путь для JSON с результатами")
+    run.set_defaults(handler=_run)
+
+    cmp = commands.add_parser("compare", help="Сравнить два JSON с результатами")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.1, help="Допустимое ухудшение, доля")
+    cmp.set_defaults(handler=_compare)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api import api_router
+from app.api.deps import get_async_session
+from app.cache import TaskCache
+from app.cache.backend import InMemoryCacheBackend
+from app.db import Base
+from app.events import TaskEventHub
+from app.models import TERMINAL_TASK_STATUSES, Task
+from app.mq import InMemoryTaskBroker
+from app.workers.processor import TaskProcessor
+from app.workers.worker import QueueWorker
+from benchmarks.report import summarize
+
+OPERATIONS = ("create", "status", "get", "list")
+
+
+@dataclass
+class BenchmarkConfig:
+    rate: float = 50.0
+    duration: float = 10.0
+    database_url: str | None = None
+    operation_mix: dict[str, float] = field(
+        default_factory=lambda: {"create": 0.5, "status": 0.3, "get": 0.1, "list": 0.1}
+    )
+    priority_mix: dict[str, float] = field(
+        default_factory=lambda: {"HIGH": 0.2, "MEDIUM": 0.5, "LOW": 0.3}
+    )
+    description_size: int = 256
+    worker_concurrency: int = 10
+    worker_batch_size: int = 1
+    processing_scale: float = 1.0
+    cache: bool = True
+    drain_timeout: float = 60.0
+    seed: int = 0
+
+
+class ScaledTaskProcessor(TaskProcessor):
+    # Масштаб 0 убирает имитацию работы и оставляет чистые накладные расходы конвейера.
+    def __init__(self, scale: float) -> None:
+        self.DURATION_MAP = {
+            priority: delay * scale for priority, delay in TaskProcessor.DURATION_MAP.items()
+        }
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class PipelineBenchmark:
+    def __init__(self, config: BenchmarkConfig) -> None:
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.latencies: dict[str, list[float]] = {name: [] for name in OPERATIONS}
+        self.errors: dict[str, int] = {name: 0 for name in OPERATIONS}
+        self.created: list[uuid.UUID] = []
+        self.broker = InMemoryTaskBroker()
+        self._tmpdir: tempfile.TemporaryDirectory | None = None
+
+    async def run(self) -> dict:
+        database_url = self.config.database_url
+        if database_url is None:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            database_url = f"sqlite+aiosqlite:///{Path(self._tmpdir.name) / 'bench.db'}"
+        engine = create_async_engine(database_url)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+            return await self._run(session_factory)
+        finally:
+            await engine.dispose()
+            if self._tmpdir is not None:
+                self._tmpdir.cleanup()
+
+    async def _run(self, session_factory: async_sessionmaker[AsyncSession]) -> dict:
+        app = self._build_app(session_factory)
+        worker = QueueWorker(
+            concurrency=self.config.worker_concurrency,
+            batch_size=self.config.worker_batch_size,
+            session_factory=session_factory,
+            consumer=self.broker,
+        )
+        worker.processor = ScaledTaskProcessor(self.config.processing_scale)
+        consumer = asyncio.create_task(worker.start())
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await self._generate_load(client)
+            elapsed = time.perf_counter() - started
+        pipeline_started = time.perf_counter()
+        pipeline, stuck = await self._wait_for_pipeline(session_factory)
+        pipeline_elapsed = elapsed + (time.perf_counter() - pipeline_started)
+        await worker.drain()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return {
+            "api": {
+                name: summarize(self.latencies[name], self.errors[name], elapsed)
+                for name in OPERATIONS
+                if self.latencies[name] or self.errors[name]
+            },
+            "pipeline": summarize(pipeline, stuck, pipeline_elapsed),
+        }
+
+    def _build_app(self, session_factory: async_sessionmaker[AsyncSession]) -> FastAPI:
+        app = FastAPI()
+        app.include_router(api_router)
+
+        async def _get_session():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_async_session] = _get_session
+        app.state.publisher = self.broker
+        app.state.task_events = TaskEventHub()
+        if self.config.cache:
+            app.state.task_cache = TaskCache(InMemoryCacheBackend(10_000), ttl=1.0)
+        return app
+
+    async def _generate_load(self, client: AsyncClient) -> None:
+        # Открытая модель нагрузки: запросы уходят по расписанию, не дожидаясь ответов,
+        # иначе медленный сервер занижал бы собственную нагрузку.
+        interval = 1 / self.config.rate
+        total = int(self.config.rate * self.config.duration)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        requests: list[asyncio.Task] = []
+        for index in range(total):
+            delay = started + index * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            operation = self._choose(self.config.operation_mix)
+            if operation != "create" and not self.created:
+                operation = "create"
+            requests.append(asyncio.create_task(self._request(client, operation)))
+        await asyncio.gather(*requests)
+
+    async def _request(self, client: AsyncClient, operation: str) -> None:
+        started = time.perf_counter()
+        if operation == "create":
+            response = await client.post("/api/v1/tasks", json=self._task_payload())
+        elif operation == "status":
+            response = await client.get(f"/api/v1/tasks/{self.random.choice(self.created)}/status")
+        elif operation == "get":
+            response = await client.get(f"/api/v1/tasks/{self.random.choice(self.created)}")
+        else:
+            response = await client.get("/api/v1/tasks", params={"limit": 20})
+        latency = time.perf_counter() - started
+        if response.status_code >= 400:
+            self.errors[operation] += 1
+            return
+        self.latencies[operation].append(latency)
+        if operation == "create":
+            self.created.append(uuid.UUID(response.json()["id"]))
+
+    def _task_payload(self) -> dict:
+        return {
+            "title": f"bench-{len(self.created)}",
+            "description": "x" * self.config.description_size,
+            "priority": self._choose(self.config.priority_mix),
+        }
+
+    def _choose(self, mix: dict[str, float]) -> str:
+        names = list(mix)
+        return self.random.choices(names, weights=[mix[name] for name in names])[0]
+
+    async def _wait_for_pipeline(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ) -> tuple[list[float], int]:
+        deadline = time.perf_counter() + self.config.drain_timeout
+        while True:
+            async with session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(Task.status, Task.created_at, Task.finished_at).where(
+                            Task.id.in_(self.created)
+                        )
+                    )
+                ).all()
+            done = [row for row in rows if row.status in TERMINAL_TASK_STATUSES and row.finished_at]
+            if len(done) == len(self.created) or time.perf_counter() > deadline:
+                break
+            await asyncio.sleep(0.1)
+        latencies = [
+            (row.finished_at.replace(tzinfo=None) - row.created_at.replace(tzinfo=None)).total_seconds()
+            for row in done
+        ]
+        return latencies, len(self.created) - len(done)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import math
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    regressions: list[str] = []
+    sections = {
+        **{f"api.{name}": stats for name, stats in current["api"].items()},
+        "pipeline": current["pipeline"],
+    }
+    base_sections = {
+        **{f"api.{name}": stats for name, stats in baseline["api"].items()},
+        "pipeline": baseline["pipeline"],
+    }
+    for name, stats in sections.items():
+        base = base_sections.get(name)
+        if base is None:
+            continue
+        for key in ("p95", "p99"):
+            if base.get(key) and stats.get(key) and stats[key] > base[key] * (1 + threshold):
+                regressions.append(
+                    f"{name} {key}: {base[key] * 1000:.1f}ms -> {stats[key] * 1000:.1f}ms"
+                )
+        if base.get("throughput") and stats["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name} throughput: {base['throughput']:.1f}/s -> {stats['throughput']:.1f}/s"
+            )
+    return regressions
+
+
+def format_summary(results: dict) -> str:
+    lines = [f"{'section':<22}{'count':>8}{'err':>6}{'rps':>10}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}"]
+    rows = [*((f"api.{name}", stats) for name, stats in results["api"].items())]
+    rows.append(("pipeline", results["pipeline"]))
+    for name, stats in rows:
+        lines.append(
+            f"{name:<22}{stats['count']:>8}{stats['errors']:>6}{stats['throughput']:>10.1f}"
+            + "".join(
+                f"{(stats[key] or 0) * 1000:>9.1f}" for key in ("p50", "p95", "p99")
+            )
+        )
+    return "\n".join(lines)
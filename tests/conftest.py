@@ -26,8 +26,13 @@ class DummyPublisher(TaskPublisherProtocol):
     async def close(self) -> None:
         return None
 
-    async def publish_task(self, task_id, priority) -> None:
-        self.messages.append({"task_id": task_id, "priority": priority})
+    async def publish_task(self, message) -> None:
+        self.messages.append({"task_id": message.task_id, "priority": message.priority})
+
+    async def publish_tasks(self, messages) -> list[BaseException | None]:
+        for message in messages:
+            self.messages.append({"task_id": message.task_id, "priority": message.priority})
+        return [None] * len(messages)
 
 
 @pytest.fixture
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from benchmarks.pipeline import BenchmarkConfig, PipelineBenchmark
+from benchmarks.report import compare, percentile
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) is None
+
+
+def test_compare_flags_regressions() -> None:
+    stats = {"count": 10, "errors": 0, "throughput": 100.0, "p50": 0.01, "p95": 0.02, "p99": 0.03}
+    baseline = {"api": {"create": stats}, "pipeline": stats}
+    slower = {**stats, "p99": 0.05}
+    current = {"api": {"create": slower}, "pipeline": stats}
+    assert compare(baseline, baseline, 0.1) == []
+    assert compare(baseline, current, 0.1) == ["api.create p99: 30.0ms -> 50.0ms"]
+
+
+async def test_pipeline_benchmark_smoke() -> None:
+    config = BenchmarkConfig(rate=50, duration=0.2, processing_scale=0, drain_timeout=10)
+    results = await PipelineBenchmark(config).run()
+    created = results["api"]["create"]["count"]
+    assert created > 0
+    assert results["pipeline"]["count"] == created
+    assert results["pipeline"]["errors"] == 0
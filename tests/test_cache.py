@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import InMemoryCacheBackend, TaskCache
+from app.models import Task, TaskStatus
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_evicts_lru_and_expires() -> None:
+    backend = InMemoryCacheBackend(max_entries=2)
+    await backend.set("a", 1, ttl=None)
+    await backend.set("b", 2, ttl=None)
+    assert await backend.get("a") == 1
+    await backend.set("c", 3, ttl=None)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+
+    await backend.set("short", 4, ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await backend.get("short") is None
+
+
+@pytest.mark.asyncio
+async def test_status_is_served_from_cache_and_invalidated_on_cancel(
+    client: AsyncClient,
+    application: FastAPI,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    cache = TaskCache(InMemoryCacheBackend(max_entries=100), ttl=60)
+    application.state.task_cache = cache
+    response = await client.post("/api/v1/tasks", json={"title": "Cached task"})
+    task_id = response.json()["id"]
+
+    assert (await client.get(f"/api/v1/tasks/{task_id}/status")).json()["status"] == "PENDING"
+    assert (await client.get(f"/api/v1/tasks/{task_id}")).json()["status"] == "PENDING"
+
+    # Изменение в обход репозитория не видно, пока запись в кэше жива.
+    async with session_factory() as session:
+        await session.execute(
+            update(Task).where(Task.id == uuid.UUID(task_id)).values(status=TaskStatus.IN_PROGRESS)
+        )
+        await session.commit()
+    assert (await client.get(f"/api/v1/tasks/{task_id}/status")).json()["status"] == "PENDING"
+
+    cancel_response = await client.delete(f"/api/v1/tasks/{task_id}")
+    assert cancel_response.status_code == 200
+    assert (await client.get(f"/api/v1/tasks/{task_id}/status")).json()["status"] == "CANCELLED"
+    assert (await client.get(f"/api/v1/tasks/{task_id}")).json()["status"] == "CANCELLED"
+    assert await cache.get_status(uuid.UUID(task_id)) == TaskStatus.CANCELLED
+    assert cache._ttl_for(TaskStatus.CANCELLED) is None
+
+
+@pytest.mark.asyncio
+async def test_status_of_missing_task_is_not_found(
+    client: AsyncClient,
+    application: FastAPI,
+) -> None:
+    application.state.task_cache = TaskCache(InMemoryCacheBackend(max_entries=10))
+    response = await client.get(f"/api/v1/tasks/{uuid.uuid4()}/status")
+    assert response.status_code == 404
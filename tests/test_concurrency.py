@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.workers.concurrency import AdaptiveConcurrencyLimiter
+
+
+def make_limiter(changes: list[int]) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        initial=4,
+        min_limit=2,
+        max_limit=6,
+        latency_target=0.5,
+        backoff_ratio=0.5,
+        on_change=changes.append,
+    )
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_additively_and_backs_off_multiplicatively() -> None:
+    changes: list[int] = []
+    limiter = make_limiter(changes)
+
+    for _ in range(4):
+        limiter.record(0.1, ok=True)
+    assert limiter.limit == 5
+
+    limiter.record(0.1, ok=False)
+    assert limiter.limit == 2
+
+    limiter.record(2.0, ok=True)
+    assert limiter.limit == 2
+
+    for _ in range(20):
+        limiter.record(0.1, ok=True)
+    assert limiter.limit == 6
+    assert changes == [5, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_acquire_respects_current_limit() -> None:
+    limiter = make_limiter([])
+    limiter.record(0.1, ok=False)
+    assert limiter.limit == 2
+
+    await limiter.acquire()
+    await limiter.acquire()
+    blocked = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    limiter.release()
+    await asyncio.wait_for(blocked, timeout=1)
+    assert limiter.in_flight == 2
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.api.deps import get_task_service
+from app.events import TaskEvent, TaskEventHub
+from app.models import TaskStatus
+
+
+@pytest.fixture
+def events(application: FastAPI) -> TaskEventHub:
+    hub = TaskEventHub()
+    application.state.task_events = hub
+    return hub
+
+
+async def create_task(client: AsyncClient) -> str:
+    response = await client.post("/api/v1/tasks", json={"title": "Awaited task"})
+    return response.json()["id"]
+
+
+def parse_events(body: str) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_to_matching_subscribers() -> None:
+    hub = TaskEventHub()
+    task_id, other_id = uuid.uuid4(), uuid.uuid4()
+    with hub.subscribe([task_id]) as subscription, hub.subscribe() as wildcard:
+        hub.publish(TaskEvent(other_id, TaskStatus.COMPLETED))
+        hub.publish(TaskEvent(task_id, TaskStatus.FAILED))
+        assert await subscription.get(timeout=0.1) == TaskEvent(task_id, TaskStatus.FAILED)
+        assert await subscription.get(timeout=0.01) is None
+        assert (await wildcard.get(timeout=0.1)).task_id == other_id
+    assert hub._by_task == {} and hub._wildcard == set()
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_current_state_on_timeout(
+    client: AsyncClient,
+    events: TaskEventHub,
+) -> None:
+    task_id = await create_task(client)
+    response = await client.get(f"/api/v1/tasks/{task_id}/wait?timeout=0.05")
+    assert response.status_code == 200
+    assert response.json()["status"] == "PENDING"
+
+
+@pytest.mark.asyncio
+async def test_wait_unblocks_on_terminal_event(
+    client: AsyncClient,
+    events: TaskEventHub,
+) -> None:
+    task_id = await create_task(client)
+    waiter = asyncio.create_task(client.get(f"/api/v1/tasks/{task_id}/wait?timeout=10"))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    await client.delete(f"/api/v1/tasks/{task_id}")
+    events.publish(TaskEvent(uuid.UUID(task_id), TaskStatus.CANCELLED))
+    response = await asyncio.wait_for(waiter, timeout=2)
+    assert response.json()["status"] == "CANCELLED"
+
+
+@pytest.mark.asyncio
+async def test_wait_for_missing_task_is_not_found(
+    client: AsyncClient,
+    events: TaskEventHub,
+) -> None:
+    response = await client.get(f"/api/v1/tasks/{uuid.uuid4()}/wait?timeout=0")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_event_stream_ends_when_all_tasks_are_terminal(
+    client: AsyncClient,
+    events: TaskEventHub,
+) -> None:
+    finished_id = await create_task(client)
+    await client.delete(f"/api/v1/tasks/{finished_id}")
+    pending_id = await create_task(client)
+
+    stream = asyncio.create_task(
+        client.get(f"/api/v1/tasks/events?task_id={finished_id}&task_id={pending_id}")
+    )
+    await asyncio.sleep(0.05)
+    events.publish(TaskEvent(uuid.UUID(pending_id), TaskStatus.COMPLETED))
+    response = await asyncio.wait_for(stream, timeout=2)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    received = {(event["task_id"], event["status"]) for event in parse_events(response.text)}
+    assert (finished_id, "CANCELLED") in received
+    assert (pending_id, "PENDING") in received
+    assert (pending_id, "COMPLETED") in received
+
+
+@pytest.mark.asyncio
+async def test_event_stream_releases_subscription_when_snapshot_fails(
+    client: AsyncClient,
+    application: FastAPI,
+    events: TaskEventHub,
+) -> None:
+    class FailingService:
+        async def get_task_statuses(self, task_ids):
+            raise RuntimeError("database is unavailable")
+
+    application.dependency_overrides[get_task_service] = FailingService
+    with pytest.raises(RuntimeError):
+        await client.get(f"/api/v1/tasks/events?task_id={uuid.uuid4()}")
+
+    assert events._by_task == {} and events._wildcard == set()
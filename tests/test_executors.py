@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from app.models import Task, TaskPriority, TaskStatus
+from app.workers.executors import TaskExecutorRouter, decode_payload, encode_payload
+from app.workers.processor import TaskProcessor
+
+
+class ProcessOnlyProcessor(TaskProcessor):
+    executor = "process"
+
+
+def make_task(priority: TaskPriority) -> Task:
+    return Task(id=uuid.uuid4(), title="CPU task", priority=priority, status=TaskStatus.PENDING)
+
+
+def test_payload_roundtrip_is_compact() -> None:
+    raw = encode_payload({"title": "Отчёт", "priority": "HIGH"})
+    assert raw == '{"title":"Отчёт","priority":"HIGH"}'.encode("utf-8")
+    assert decode_payload(raw) == {"title": "Отчёт", "priority": "HIGH"}
+
+
+def test_router_selects_mode_by_processor_and_priority() -> None:
+    router = TaskExecutorRouter(default="inline", by_priority={"LOW": "thread"})
+    assert router.mode_for(TaskProcessor(), make_task(TaskPriority.HIGH)) == "inline"
+    assert router.mode_for(TaskProcessor(), make_task(TaskPriority.LOW)) == "thread"
+    assert router.mode_for(ProcessOnlyProcessor(), make_task(TaskPriority.LOW)) == "process"
+
+    with pytest.raises(ValueError):
+        TaskExecutorRouter(default="gpu", by_priority={})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+async def test_executor_modes_return_same_result(mode: str) -> None:
+    router = TaskExecutorRouter(default=mode, by_priority={}, max_workers=1)
+    task = make_task(TaskPriority.HIGH)
+    try:
+        result = await router.run(TaskProcessor(), task)
+    finally:
+        router.shutdown()
+    assert result == {
+        "summary": f"Task {task.id} processed",
+        "title": "CPU task",
+        "priority": "HIGH",
+    }
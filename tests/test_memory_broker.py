@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Task, TaskPriority, TaskStatus
+from app.mq import InMemoryTaskBroker, TaskMessage, decode_task_message
+from app.repositories import TaskRepository
+from app.workers.scheduling import WeightedPriorityScheduler
+from app.workers.worker import QueueWorker
+
+
+def task_id_of(delivery) -> uuid.UUID:
+    return decode_task_message(delivery.body, delivery.content_type).task_id
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_delivers_by_priority_then_fifo() -> None:
+    broker = InMemoryTaskBroker(prefetch_count=10)
+    low, medium, high, high_later = (uuid.uuid4() for _ in range(4))
+    await broker.publish_task(TaskMessage(low, TaskPriority.LOW))
+    await broker.publish_tasks(
+        [
+            TaskMessage(medium, TaskPriority.MEDIUM),
+            TaskMessage(high, TaskPriority.HIGH),
+            TaskMessage(high_later, TaskPriority.HIGH),
+        ]
+    )
+
+    deliveries: asyncio.Queue = asyncio.Queue()
+    consumer_tag = await broker.consume(deliveries.put)
+    received = [task_id_of(await asyncio.wait_for(deliveries.get(), 1)) for _ in range(4)]
+    await broker.cancel(consumer_tag)
+
+    assert received == [high, high_later, medium, low]
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_tags_follow_delivery_order() -> None:
+    broker = InMemoryTaskBroker(prefetch_count=2)
+    await broker.publish_tasks(
+        [
+            TaskMessage(uuid.uuid4(), TaskPriority.LOW),
+            TaskMessage(uuid.uuid4(), TaskPriority.LOW),
+            TaskMessage(uuid.uuid4(), TaskPriority.HIGH),
+        ]
+    )
+
+    deliveries: asyncio.Queue = asyncio.Queue()
+    await broker.consume(deliveries.put)
+    await asyncio.sleep(0.01)
+    first, second = deliveries.get_nowait(), deliveries.get_nowait()
+    assert [first.delivery_tag, second.delivery_tag] == [1, 2]
+
+    # Подтверждение первой доставки не должно задеть вторую и ещё не выданную третью.
+    await first.ack(multiple=True)
+    await asyncio.sleep(0.01)
+    assert not second.settled and broker.unacked == 2 and broker.pending == 0
+    third = deliveries.get_nowait()
+    assert third.delivery_tag == 3
+
+    await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_respects_prefetch_and_multi_ack() -> None:
+    broker = InMemoryTaskBroker(prefetch_count=2)
+    await broker.publish_tasks(
+        [TaskMessage(uuid.uuid4(), TaskPriority.MEDIUM) for _ in range(5)]
+    )
+
+    deliveries: asyncio.Queue = asyncio.Queue()
+    await broker.consume(deliveries.put)
+    await asyncio.sleep(0.01)
+    assert deliveries.qsize() == 2 and broker.unacked == 2
+
+    first, second = deliveries.get_nowait(), deliveries.get_nowait()
+    await second.ack(multiple=True)
+    await asyncio.sleep(0.01)
+    assert first.settled and broker.unacked == 2 and broker.pending == 1
+
+    await broker.close()
+    assert broker.unacked == 0 and broker.pending == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_close_requeues_unacked() -> None:
+    broker = InMemoryTaskBroker(prefetch_count=1)
+    task_id = uuid.uuid4()
+    await broker.publish_task(TaskMessage(task_id, TaskPriority.HIGH))
+
+    deliveries: asyncio.Queue = asyncio.Queue()
+    await broker.consume(deliveries.put)
+    await asyncio.wait_for(deliveries.get(), 1)
+    await broker.close()
+
+    redelivered: asyncio.Queue = asyncio.Queue()
+    await broker.consume(redelivered.put)
+    assert task_id_of(await asyncio.wait_for(redelivered.get(), 1)) == task_id
+    await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_consumes_from_memory_broker(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        tasks = await TaskRepository(session).add_many(
+            [{"title": f"task {index}", "priority": TaskPriority.HIGH} for index in range(3)],
+            status=TaskStatus.PENDING,
+        )
+        await session.commit()
+    broker = InMemoryTaskBroker()
+    await broker.publish_tasks([TaskMessage.from_task(task) for task in tasks])
+
+    # Общее соединение StaticPool не выдержит параллельных сессий, поэтому по одной задаче.
+    worker = QueueWorker(concurrency=1, consumer=broker, session_factory=session_factory)
+    consumer = asyncio.create_task(worker.start())
+    for _ in range(100):
+        if worker.processed == len(tasks):
+            break
+        await asyncio.sleep(0.05)
+    await worker.drain(timeout=1)
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert worker.processed == len(tasks)
+    assert broker.pending == 0 and broker.unacked == 0
+    async with session_factory() as session:
+        for task in tasks:
+            assert (await session.get(Task, task.id)).status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_scheduler_interleaves_by_weight() -> None:
+    scheduler = WeightedPriorityScheduler(weights={"HIGH": 6, "MEDIUM": 3, "LOW": 1}, aging=0)
+    for priority in TaskPriority:
+        for index in range(20):
+            scheduler.put_nowait(priority, f"{priority.value}-{index}")
+
+    served = [(await scheduler.get()).split("-")[0] for _ in range(10)]
+
+    assert served.count("HIGH") == 6 and served.count("MEDIUM") == 3 and served.count("LOW") == 1
+    assert served[0] == "HIGH"
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_aged_delivery_first() -> None:
+    now = [0.0]
+    scheduler = WeightedPriorityScheduler(
+        weights={"HIGH": 100, "MEDIUM": 1, "LOW": 1},
+        aging=5,
+        clock=lambda: now[0],
+    )
+    scheduler.put_nowait(TaskPriority.LOW, "low")
+    now[0] = 1.0
+    for index in range(5):
+        scheduler.put_nowait(TaskPriority.HIGH, f"high-{index}")
+
+    assert await scheduler.get() == "high-0"
+    now[0] = 6.0
+    assert await scheduler.get() == "low"
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_consumes_per_priority_queues(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        tasks = await TaskRepository(session).add_many(
+            [{"title": priority.value, "priority": priority} for priority in TaskPriority],
+            status=TaskStatus.PENDING,
+        )
+        await session.commit()
+    broker = InMemoryTaskBroker(topology="per_priority")
+    await broker.publish_tasks([TaskMessage.from_task(task) for task in tasks])
+    assert {key: queue.qsize() for key, queue in broker._queues.items()} == {
+        priority: 1 for priority in TaskPriority
+    }
+
+    worker = QueueWorker(
+        concurrency=1,
+        batch_size=2,
+        batch_timeout_ms=20,
+        consumer=broker,
+        topology="per_priority",
+        session_factory=session_factory,
+    )
+    consumer = asyncio.create_task(worker.start())
+    for _ in range(100):
+        if worker.processed == len(tasks):
+            break
+        await asyncio.sleep(0.05)
+    await worker.drain(timeout=1)
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert worker.processed == len(tasks)
+    assert broker.pending == 0 and broker.unacked == 0
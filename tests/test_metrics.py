@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.metrics.http import instrument_app, metrics_router
+
+
+@pytest.fixture
+async def metrics_client(application: FastAPI) -> AsyncGenerator[AsyncClient, None]:
+    instrument_app(application)
+    application.include_router(metrics_router)
+    transport = ASGITransport(app=application)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency(metrics_client: AsyncClient) -> None:
+    response = await metrics_client.post("/api/v1/tasks", json={"title": "Measured task"})
+    task_id = response.json()["id"]
+    await metrics_client.get(f"/api/v1/tasks/{task_id}")
+
+    metrics = await metrics_client.get("/metrics")
+    assert metrics.status_code == 200
+    body = metrics.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/api/v1/tasks/{task_id}",'
+        'status="200"}' in body
+    )
+    assert 'route="/api/v1/tasks",status="201"' in body
+    assert task_id not in body
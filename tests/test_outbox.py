@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import TaskOutbox, TaskPriority, TaskStatus
+from app.mq import OutboxRelay
+from app.repositories import OutboxRepository, TaskRepository
+from app.schemas import TaskCreate
+from app.services.task_service import TaskService
+from tests.conftest import DummyPublisher
+
+
+def make_service(session: AsyncSession) -> TaskService:
+    return TaskService(
+        session=session,
+        repository=TaskRepository(session),
+        publisher=None,
+        outbox=OutboxRepository(session),
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_task_writes_outbox_without_publishing(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        task = await make_service(session).create_task(
+            TaskCreate(title="Outbox task", priority=TaskPriority.HIGH)
+        )
+        assert task.status == TaskStatus.PENDING
+
+    async with session_factory() as session:
+        entries = (await session.scalars(select(TaskOutbox))).all()
+        assert [(entry.task_id, entry.priority) for entry in entries] == [
+            (task.id, TaskPriority.HIGH)
+        ]
+
+
+@pytest.mark.asyncio
+async def test_create_task_with_idempotency_key_writes_outbox_once(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    payload = TaskCreate(title="Outbox task", priority=TaskPriority.LOW)
+    task_ids = []
+    for _ in range(2):
+        async with session_factory() as session:
+            task = await make_service(session).create_task(payload, idempotency_key="retry-1")
+            task_ids.append(task.id)
+
+    assert task_ids[0] == task_ids[1]
+    async with session_factory() as session:
+        entries = (await session.scalars(select(TaskOutbox))).all()
+        assert [entry.task_id for entry in entries] == [task_ids[0]]
+
+
+@pytest.mark.asyncio
+async def test_relay_drains_outbox_in_batches(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        results = await make_service(session).create_tasks(
+            [TaskCreate(title=f"Outbox task {index}") for index in range(5)]
+        )
+    task_ids = [task.id for task, _ in results]
+
+    publisher = DummyPublisher()
+    relay = OutboxRelay(session_factory, publisher, batch_size=3)
+    assert await relay.run_once() == 3
+    assert await relay.run_once() == 2
+    assert await relay.run_once() == 0
+    assert [message["task_id"] for message in publisher.messages] == task_ids
+
+    async with session_factory() as session:
+        remaining = await session.scalar(select(func.count(TaskOutbox.id)))
+        assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_unconfirmed_entries(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        await make_service(session).create_tasks(
+            [TaskCreate(title=f"Outbox task {index}") for index in range(2)]
+        )
+
+    publisher = DummyPublisher()
+
+    async def nack_second(tasks):
+        return [None, RuntimeError("nack")][: len(tasks)]
+
+    publisher.publish_tasks = nack_second
+    relay = OutboxRelay(session_factory, publisher)
+    assert await relay.run_once() == 1
+
+    async with session_factory() as session:
+        remaining = await session.scalar(select(func.count(TaskOutbox.id)))
+        assert remaining == 1
+
+
+@pytest.mark.asyncio
+async def test_relay_run_exits_after_stop(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    relay = OutboxRelay(session_factory, DummyPublisher(), poll_interval=10)
+    runner = asyncio.create_task(relay.run())
+    await asyncio.sleep(0)
+    relay.stop()
+    await asyncio.wait_for(runner, timeout=1)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import MetaData, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateTable
+
+from app.models import Task, TaskIdempotencyKey, TaskPriority, TaskStatus
+from app.storage import LocalBlobStore
+from app.workers.partitions import (
+    TaskPartitionMaintainer,
+    is_expired,
+    months_to_create,
+    partition_month,
+    partition_name,
+)
+
+
+def test_partition_months_roll_over_year_and_respect_retention() -> None:
+    now = datetime(2025, 11, 20, 12, tzinfo=timezone.utc)
+
+    months = months_to_create(now, ahead=3)
+
+    assert [partition_name(month) for month in months] == [
+        "tasks_p202511",
+        "tasks_p202512",
+        "tasks_p202601",
+        "tasks_p202602",
+    ]
+    assert partition_month("tasks_p202601") == months[2]
+    assert partition_month("tasks_unpartitioned") is None
+    # Октябрьская партиция целиком старше 30 дней только после 30 ноября.
+    october = partition_month("tasks_p202510")
+    assert not is_expired(october, now, retention_days=30)
+    assert is_expired(october, datetime(2025, 12, 1, tzinfo=timezone.utc), retention_days=30)
+
+
+@pytest.mark.asyncio
+async def test_export_streams_partition_rows_to_gzip(engine: AsyncEngine, tmp_path: Path) -> None:
+    partition = Task.__table__.to_metadata(MetaData(), name="tasks_p202401")
+    async with engine.begin() as conn:
+        await conn.execute(CreateTable(partition))
+        await conn.execute(
+            insert(partition),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "title": f"Old task {index}",
+                    "priority": TaskPriority.LOW,
+                    "status": TaskStatus.COMPLETED,
+                    "created_at": datetime(2024, 1, 5, tzinfo=timezone.utc),
+                    "result": {"index": index},
+                    "attempts": 1,
+                }
+                for index in range(5)
+            ],
+        )
+
+    maintainer = TaskPartitionMaintainer(engine, archive_path=tmp_path, batch_size=2)
+    path = await maintainer._export("tasks_p202401")
+
+    assert path == tmp_path / "tasks_p202401.jsonl.gz"
+    with gzip.open(path, "rt") as handle:
+        rows = [json.loads(line) for line in handle]
+    assert sorted(row["result"]["index"] for row in rows) == [0, 1, 2, 3, 4]
+    assert {row["status"] for row in rows} == {"COMPLETED"}
+    assert list(tmp_path.iterdir()) == [path]
+    # Задание работает только с PostgreSQL: на других диалектах проход ничего не делает.
+    assert await maintainer.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_archiving_deletes_offloaded_result_blobs(
+    engine: AsyncEngine, tmp_path: Path
+) -> None:
+    blob_store = LocalBlobStore(tmp_path / "results")
+    partition = Task.__table__.to_metadata(MetaData(), name="tasks_p202401")
+    task_ids = [uuid.uuid4() for _ in range(3)]
+    async with engine.begin() as conn:
+        await conn.execute(CreateTable(partition))
+        await conn.execute(
+            insert(partition),
+            [
+                {
+                    "id": task_id,
+                    "title": "Old task",
+                    "priority": TaskPriority.LOW,
+                    "status": TaskStatus.COMPLETED,
+                    "created_at": datetime(2024, 1, 5, tzinfo=timezone.utc),
+                    "result_ref": None if index == 0 else f"{task_id}.json",
+                    "attempts": 1,
+                }
+                for index, task_id in enumerate(task_ids)
+            ],
+        )
+    for task_id in task_ids[1:]:
+        await blob_store.put(f"{task_id}.json", b"{}")
+    # Ещё не архивированная задача из другой партиции свой блоб сохраняет.
+    kept = f"{uuid.uuid4()}.json"
+    await blob_store.put(kept, b"{}")
+
+    maintainer = TaskPartitionMaintainer(
+        engine, archive_path=tmp_path / "archive", batch_size=1, blob_store=blob_store
+    )
+    assert await maintainer._delete_blobs("tasks_p202401") == 2
+    # Повтор после прерванного прохода не падает на уже удалённых блобах.
+    assert await maintainer._delete_blobs("tasks_p202401") == 2
+
+    for task_id in task_ids[1:]:
+        assert await blob_store.size(f"{task_id}.json") is None
+    assert await blob_store.size(kept) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_idempotency_keys_are_purged(engine: AsyncEngine, tmp_path: Path) -> None:
+    now = datetime(2025, 12, 10, 12, 0, tzinfo=timezone.utc)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(TaskIdempotencyKey),
+            [
+                {
+                    "key": key,
+                    "task_id": uuid.uuid4(),
+                    "request_hash": "0" * 64,
+                    "created_at": created_at,
+                }
+                for key, created_at in (
+                    ("stale", datetime(2025, 12, 9, 11, 0, tzinfo=timezone.utc)),
+                    ("fresh", datetime(2025, 12, 9, 13, 0, tzinfo=timezone.utc)),
+                )
+            ],
+        )
+
+    maintainer = TaskPartitionMaintainer(
+        engine,
+        archive_path=tmp_path,
+        idempotency_key_retention_hours=24,
+    )
+    assert await maintainer.purge_idempotency_keys(now) == 1
+
+    async with engine.connect() as conn:
+        keys = (await conn.execute(select(TaskIdempotencyKey.key))).scalars().all()
+    assert keys == ["fresh"]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import TaskPriority
+from app.mq import TaskMessage, TaskQueuePublisher, decode_task_message, encode_task_message
+from app.mq.codec import CONTENT_TYPES, MSGPACK_CONTENT_TYPE
+
+
+class FakeExchange:
+    def __init__(self, channel: FakeChannel) -> None:
+        self.channel = channel
+
+    async def publish(self, message, routing_key: str) -> None:
+        channel = self.channel
+        channel.in_flight += 1
+        channel.peak = max(channel.peak, channel.in_flight)
+        channel.publisher.peak = max(channel.publisher.peak, channel.publisher.stats.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if message.priority == TaskQueuePublisher.PRIORITY_MAP[TaskPriority.LOW]:
+                raise RuntimeError("nack")
+        finally:
+            channel.in_flight -= 1
+        channel.published.append(routing_key)
+
+
+class FakeChannel:
+    def __init__(self, publisher: TaskQueuePublisher) -> None:
+        self.publisher = publisher
+        self.default_exchange = FakeExchange(self)
+        self.published: list[str] = []
+        self.in_flight = 0
+        self.peak = 0
+        self.is_closed = False
+
+
+def make_publisher(window: int, channels: int) -> tuple[TaskQueuePublisher, list[FakeChannel]]:
+    publisher = TaskQueuePublisher(publish_window=window, channels=channels, topology="single")
+    publisher.peak = 0
+    fakes = [FakeChannel(publisher) for _ in range(channels)]
+    publisher._channels = fakes
+    publisher._channel_load = [0] * channels
+    return publisher, fakes
+
+
+@pytest.mark.asyncio
+async def test_publisher_spreads_load_and_bounds_in_flight() -> None:
+    publisher, channels = make_publisher(window=8, channels=4)
+
+    await asyncio.gather(
+        *(
+            publisher.publish_task(TaskMessage(uuid.uuid4(), TaskPriority.HIGH))
+            for _ in range(40)
+        )
+    )
+
+    assert publisher.peak <= 8
+    assert all(len(channel.published) == 10 for channel in channels)
+    assert all(channel.peak <= 2 for channel in channels)
+    assert publisher.stats.confirmed == 40 and publisher.stats.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_publish_tasks_reports_per_message_confirms() -> None:
+    publisher, _ = make_publisher(window=4, channels=2)
+    tasks = [
+        TaskMessage(uuid.uuid4(), TaskPriority.HIGH),
+        TaskMessage(uuid.uuid4(), TaskPriority.LOW),
+    ] * 5
+
+    results = await publisher.publish_tasks(tasks)
+
+    assert [result is None for result in results] == [True, False] * 5
+    assert publisher.stats.published == 10
+    assert publisher.stats.confirmed == 5 and publisher.stats.failed == 5
+    assert publisher.stats.confirm_rate == 0.5
+
+
+@pytest.mark.parametrize("message_format", ["json", "msgpack"])
+def test_task_message_round_trips_through_both_formats(message_format: str) -> None:
+    message = TaskMessage(
+        task_id=uuid.uuid4(),
+        priority=TaskPriority.HIGH,
+        title="Report",
+        description=None,
+        input={"rows": [1, 2, 3], "name": "отчёт"},
+        created_at=datetime(2025, 11, 30, 12, 0, 0, 123456, tzinfo=timezone.utc),
+    )
+
+    body = encode_task_message(message, message_format)
+
+    assert decode_task_message(body, CONTENT_TYPES[message_format]) == message
+    assert message.authoritative
+
+
+def test_task_message_msgpack_is_smaller_and_legacy_json_is_partial() -> None:
+    message = TaskMessage(uuid.uuid4(), TaskPriority.LOW, "Title", "Text", {"n": 1}, datetime.now())
+    assert len(encode_task_message(message, "msgpack")) < len(encode_task_message(message, "json"))
+
+    task_id = uuid.uuid4()
+    legacy = decode_task_message(json.dumps({"task_id": str(task_id)}).encode(), None)
+    assert legacy == TaskMessage(task_id) and not legacy.authoritative
+
+    with pytest.raises(ValueError):
+        decode_task_message(b"\x93\x01\x02\x03", MSGPACK_CONTENT_TYPE)
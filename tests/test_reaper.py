@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Task, TaskPriority, TaskStatus
+from app.repositories import TaskRepository
+from app.services.worker_service import TaskWorkerService
+from app.workers.processor import TaskProcessor
+from app.workers.reaper import LeaseReaper
+from app.workers.retry import RetryPolicy
+from tests.conftest import DummyPublisher
+
+
+async def claim_with_lease(
+    session_factory: async_sessionmaker[AsyncSession],
+    titles: list[str],
+    *,
+    worker_id: str,
+    expires_in: float,
+) -> list[uuid.UUID]:
+    now = datetime.now(tz=timezone.utc)
+    async with session_factory() as session:
+        repository = TaskRepository(session)
+        tasks = await repository.add_many(
+            [{"title": title, "priority": TaskPriority.HIGH} for title in titles],
+            status=TaskStatus.PENDING,
+        )
+        claimed = await repository.claim_many(
+            [task.id for task in tasks],
+            started_at=now,
+            worker_id=worker_id,
+            lease_expires_at=now + timedelta(seconds=expires_in),
+        )
+        await session.commit()
+    return [task.id for task in claimed]
+
+
+@pytest.mark.asyncio
+async def test_claim_records_worker_and_lease(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        (task,) = await TaskRepository(session).add_many(
+            [{"title": "leased", "priority": TaskPriority.LOW}], status=TaskStatus.PENDING
+        )
+        await session.commit()
+
+    async with session_factory() as session:
+        service = TaskWorkerService(
+            session, TaskRepository(session), TaskProcessor(), worker_id="w1", lease_ttl=30
+        )
+        claimed = await service.repository.claim(
+            task.id,
+            started_at=datetime.now(tz=timezone.utc),
+            worker_id=service.worker_id,
+            lease_expires_at=service._lease_expires_at(datetime.now(tz=timezone.utc)),
+        )
+        await session.commit()
+    assert claimed.worker_id == "w1" and claimed.attempts == 1
+    assert claimed.lease_expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_renew_leases_only_touches_own_in_progress_tasks(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    mine = await claim_with_lease(session_factory, ["a", "b"], worker_id="me", expires_in=1)
+    theirs = await claim_with_lease(session_factory, ["c"], worker_id="other", expires_in=1)
+    later = datetime.now(tz=timezone.utc) + timedelta(minutes=5)
+
+    async with session_factory() as session:
+        renewed = await TaskRepository(session).renew_leases(
+            [*mine, *theirs], worker_id="me", lease_expires_at=later
+        )
+        await session.commit()
+    assert renewed == 2
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_expired_and_fails_exhausted(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    expired = await claim_with_lease(session_factory, ["x", "y"], worker_id="dead", expires_in=-5)
+    alive = await claim_with_lease(session_factory, ["z"], worker_id="alive", expires_in=60)
+    exhausted = await claim_with_lease(session_factory, ["poison"], worker_id="dead", expires_in=-5)
+    async with session_factory() as session:
+        task = await session.get(Task, exhausted[0])
+        task.attempts = 5
+        await session.commit()
+
+    publisher = DummyPublisher()
+    reaper = LeaseReaper(
+        session_factory,
+        publisher,
+        retry_policy=RetryPolicy(max_attempts={"HIGH": 5}),
+        batch_size=10,
+    )
+    assert await reaper.run_once() == 3
+    assert await reaper.run_once() == 0
+
+    assert sorted(message["task_id"] for message in publisher.messages) == sorted(expired)
+    async with session_factory() as session:
+        for task_id in expired:
+            assert (await session.get(Task, task_id)).status == TaskStatus.PENDING
+        assert (await session.get(Task, alive[0])).status == TaskStatus.IN_PROGRESS
+        poison = await session.get(Task, exhausted[0])
+        assert poison.status == TaskStatus.FAILED
+        assert poison.error == LeaseReaper.LEASE_EXPIRED_ERROR
+
+
+class ReclaimedMidRunProcessor(TaskProcessor):
+    # Пока первый воркер выполняет задачу, реапер возвращает её в очередь,
+    # и второй воркер успевает выполнить её до конца.
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], *, fail: bool) -> None:
+        self.session_factory = session_factory
+        self.fail = fail
+
+    async def run(self, task: Task) -> dict:
+        reaper = LeaseReaper(self.session_factory, DummyPublisher(), batch_size=10)
+        assert await reaper.run_once() == 1
+        async with self.session_factory() as session:
+            service = TaskWorkerService(
+                session, TaskRepository(session), TaskProcessor(), worker_id="w2", lease_ttl=60
+            )
+            assert await service.execute_many([task.id]) == []
+        if self.fail:
+            raise RuntimeError("stale run failed")
+        return {"stale": True}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail", [False, True])
+async def test_stale_worker_does_not_overwrite_reclaimed_task(
+    session_factory: async_sessionmaker[AsyncSession],
+    fail: bool,
+) -> None:
+    async with session_factory() as session:
+        (task,) = await TaskRepository(session).add_many(
+            [{"title": "slow", "priority": TaskPriority.HIGH}], status=TaskStatus.PENDING
+        )
+        await session.commit()
+
+    async with session_factory() as session:
+        service = TaskWorkerService(
+            session,
+            TaskRepository(session),
+            ReclaimedMidRunProcessor(session_factory, fail=fail),
+            retry_policy=RetryPolicy(max_attempts={"HIGH": 5}),
+            worker_id="w1",
+            lease_ttl=-5,
+        )
+        assert await service.execute(task.id) is None
+
+    async with session_factory() as session:
+        stored = await session.get(Task, task.id)
+    assert stored.status == TaskStatus.COMPLETED
+    assert stored.worker_id == "w2" and stored.attempts == 2
+    assert stored.result["title"] == "slow" and stored.error is None
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models import Task, TaskPriority, TaskStatus
+from app.repositories import TaskRepository
+from app.services.worker_service import TaskWorkerService
+from app.storage import LocalBlobStore
+from app.workers.processor import TaskProcessor
+
+
+class LargeResultProcessor(TaskProcessor):
+    async def run(self, task: Task) -> dict:
+        return {"title": task.title, "rows": ["x" * 100] * 20}
+
+
+async def run_task(session_factory, blob_store, title: str) -> Task:
+    async with session_factory() as session:
+        (task,) = await TaskRepository(session).add_many(
+            [{"title": title, "priority": TaskPriority.HIGH}], status=TaskStatus.PENDING
+        )
+        await session.commit()
+    async with session_factory() as session:
+        service = TaskWorkerService(
+            session, TaskRepository(session), LargeResultProcessor(), blob_store=blob_store
+        )
+        await service.execute(task.id)
+    async with session_factory() as session:
+        return await session.get(Task, task.id)
+
+
+@pytest.mark.asyncio
+async def test_local_blob_store_reads_ranges(tmp_path) -> None:
+    store = LocalBlobStore(tmp_path, chunk_size=4)
+    await store.put("abc.json", b"0123456789")
+
+    assert await store.size("abc.json") == 10
+    assert b"".join([chunk async for chunk in store.read("abc.json")]) == b"0123456789"
+    assert b"".join([chunk async for chunk in store.read("abc.json", 3, 8)]) == b"345678"
+    await store.delete("abc.json")
+    assert await store.size("abc.json") is None
+    with pytest.raises(ValueError):
+        await store.put("../escape", b"")
+
+
+@pytest.mark.asyncio
+async def test_large_result_is_offloaded_and_streamed(
+    session_factory: async_sessionmaker[AsyncSession],
+    application,
+    client: AsyncClient,
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "result_offload_threshold_bytes", 512)
+    store = LocalBlobStore(tmp_path)
+    application.state.blob_store = store
+    task = await run_task(session_factory, store, "large")
+
+    assert task.status == TaskStatus.COMPLETED
+    assert task.result is None and task.result_ref == f"{task.id}.json"
+    expected = json.dumps({"title": "large", "rows": ["x" * 100] * 20}, separators=(",", ":"))
+    expected = expected.encode()
+    assert task.result_size == len(expected)
+
+    card = (await client.get(f"/api/v1/tasks/{task.id}")).json()
+    assert card["result"] is None
+    assert card["result_offloaded"] is True and card["result_size"] == len(expected)
+
+    full = await client.get(f"/api/v1/tasks/{task.id}/result")
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content == expected
+
+    partial = await client.get(f"/api/v1/tasks/{task.id}/result", headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 0-9/{len(expected)}"
+    assert partial.content == expected[:10]
+
+    suffix = await client.get(f"/api/v1/tasks/{task.id}/result", headers={"Range": "bytes=-5"})
+    assert suffix.status_code == 206 and suffix.content == expected[-5:]
+
+    unsatisfiable = await client.get(
+        f"/api/v1/tasks/{task.id}/result", headers={"Range": f"bytes={len(expected)}-"}
+    )
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(expected)}"
+
+
+@pytest.mark.asyncio
+async def test_small_result_stays_inline_and_list_omits_results(
+    session_factory: async_sessionmaker[AsyncSession],
+    client: AsyncClient,
+    tmp_path,
+) -> None:
+    task = await run_task(session_factory, LocalBlobStore(tmp_path), "small")
+    assert task.result_ref is None and task.result is not None
+    assert not any(tmp_path.iterdir())
+
+    response = await client.get(f"/api/v1/tasks/{task.id}/result")
+    assert response.status_code == 200 and response.json() == task.result
+
+    items = (await client.get("/api/v1/tasks")).json()["items"]
+    assert items[0]["id"] == str(task.id) and "result" not in items[0]
+
+
+@pytest.mark.asyncio
+async def test_result_endpoint_404_before_completion(client: AsyncClient) -> None:
+    created = (await client.post("/api/v1/tasks", json={"title": "pending"})).json()
+    response = await client.get(f"/api/v1/tasks/{created['id']}/result")
+    assert response.status_code == 404
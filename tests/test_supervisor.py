@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import logging
+import signal
+import sys
+import time
+
+import pytest
+
+from app.workers import supervisor as supervisor_module
+from app.workers.supervisor import WorkerSupervisor
+
+# Цели дочерних процессов объявлены на уровне модуля: spawn импортирует их по имени.
+READY = -1
+
+
+def _exit_with_error(index: int, counters) -> None:
+    counters[index] += 5
+    sys.exit(3)
+
+
+def _drain_on_sigterm(index: int, counters) -> None:
+    def handle(signum: int, frame: object) -> None:
+        # Имитация drain: дольше shutdown_timeout, но в пределах запаса супервизора.
+        time.sleep(0.5)
+        counters[index] = 42
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, handle)
+    counters[index] = READY
+    while True:
+        time.sleep(0.05)
+
+
+def _ignore_sigterm(index: int, counters) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    counters[index] = READY
+    while True:
+        time.sleep(0.05)
+
+
+def _wait_for(condition, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.05)
+
+
+def test_exited_child_is_restarted_and_keeps_its_count() -> None:
+    supervisor = WorkerSupervisor(1, shutdown_timeout=1, target=_exit_with_error)
+    supervisor._spawn(0)
+    first = supervisor._children[0]
+    first.join(30)
+    assert first.exitcode == 3
+
+    supervisor._restart_exited()
+    second = supervisor._children[0]
+    assert second is not first
+    assert supervisor._restarts == [1]
+    second.join(30)
+    assert list(supervisor._counters) == [10]
+
+
+def test_shutdown_propagates_sigterm_and_waits_past_drain_timeout() -> None:
+    supervisor = WorkerSupervisor(1, shutdown_timeout=0.2, target=_drain_on_sigterm)
+    supervisor._spawn(0)
+    _wait_for(lambda: supervisor._counters[0] == READY)
+
+    supervisor._shutdown()
+
+    assert supervisor._children[0].exitcode == 0
+    assert list(supervisor._counters) == [42]
+
+
+def test_shutdown_kills_child_that_ignores_sigterm() -> None:
+    supervisor = WorkerSupervisor(1, shutdown_timeout=0.2, target=_ignore_sigterm)
+    supervisor.SHUTDOWN_MARGIN = 0.1
+    supervisor._spawn(0)
+    _wait_for(lambda: supervisor._counters[0] == READY)
+
+    supervisor._shutdown()
+
+    assert supervisor._children[0].exitcode == -signal.SIGKILL
+
+
+def test_log_stats_reports_totals_and_rates(caplog: pytest.LogCaptureFixture) -> None:
+    supervisor = WorkerSupervisor(2, shutdown_timeout=1)
+    supervisor._counters[0] = 30
+    supervisor._counters[1] = 50
+
+    with caplog.at_level(logging.INFO, logger=supervisor_module.__name__):
+        counts = supervisor._log_stats([10, 50], elapsed=2.0)
+
+    assert counts == [30, 50]
+    assert "80 tasks total, 10.0 tasks/s" in caplog.text
+    assert "#0=10.0/s, #1=0.0/s" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_restarted_child_counts_on_top_of_previous_value(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    class FakeWorker:
+        def __init__(self) -> None:
+            self.processed = 0
+
+        async def run_until_signalled(self) -> None:
+            self.processed = 3
+
+    monkeypatch.setattr("app.workers.worker.QueueWorker", FakeWorker)
+    monkeypatch.setattr(supervisor_module.settings, "worker_metrics_port", None)
+    counters = [0, 7]
+
+    await supervisor_module._child_main(1, counters)
+
+    assert counters == [0, 10]
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Select, event, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db import Base
+from app.models import Task, TaskPriority, TaskStatus
+from app.repositories import TaskRepository
+from app.repositories.task_repository import _plan_rows, _result_condition
+from app.schemas import TASK_LIST_FIELDS
+
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL")
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_plan_rows_parses_explain_json() -> None:
+    plan = '[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}]'
+    assert _plan_rows(plan) == 42
+    assert _plan_rows([{"Plan": {"Plan Rows": 7.0}}]) == 7
+
+
+def test_result_condition_uses_jsonb_containment_on_postgres() -> None:
+    condition = _result_condition({"stats": {"rows": 42}}, "postgresql")
+    compiled = condition.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    assert str(compiled) == """tasks.result @> CAST('{"stats": {"rows": 42}}' AS JSONB)"""
+
+
+@pytest.fixture
+async def pg_session_factory():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def pg_migrated_session_factory():
+    # Схема из миграций, как в проде: tasks партиционирована, а индексы присоединены
+    # к индексам родителя. create_all строит обычную таблицу, и планы на ней другие.
+    if not POSTGRES_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(POSTGRES_URL)
+    await _reset_schema(engine)
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "alembic",
+        "upgrade",
+        "head",
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "DATABASE_URL": POSTGRES_URL},
+    )
+    assert await process.wait() == 0
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await _reset_schema(engine)
+    await engine.dispose()
+
+
+async def _reset_schema(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+
+
+async def _explain(session: AsyncSession, stmt: Select) -> dict:
+    # EXPLAIN получает тот же SQL и те же параметры драйвера, что и запрос из репозитория:
+    # bind-параметры остаются параметрами, а статус подставлен через literal_execute.
+    conn = await session.connection()
+    executed: list[tuple] = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany) -> None:
+        executed.append((statement, parameters))
+
+    event.listen(conn.sync_engine, "before_cursor_execute", capture)
+    try:
+        await conn.execute(stmt)
+    finally:
+        event.remove(conn.sync_engine, "before_cursor_execute", capture)
+    statement, parameters = executed[-1]
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_estimate_count_on_postgres(pg_session_factory) -> None:
+    async with pg_session_factory() as session:
+        repository = TaskRepository(session)
+        await repository.add_many(
+            [{"title": f"Task {index}", "priority": TaskPriority.HIGH} for index in range(20)]
+        )
+        await session.commit()
+        await session.execute(text("ANALYZE tasks"))
+
+        unfiltered = await repository.estimate_count(status=None, priority=None)
+        filtered = await repository.estimate_count(
+            status=TaskStatus.NEW,
+            priority=TaskPriority.HIGH,
+        )
+        assert unfiltered == 20
+        assert filtered >= 1
+
+
+def _plan_nodes(plan: dict) -> list[dict]:
+    return [plan, *(node for child in plan.get("Plans", []) for node in _plan_nodes(child))]
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [None, TaskStatus.PENDING, TaskStatus.COMPLETED])
+@pytest.mark.parametrize("priority", [None, TaskPriority.HIGH])
+async def test_list_filters_use_index_scans_on_postgres(
+    pg_migrated_session_factory,
+    status: TaskStatus | None,
+    priority: TaskPriority | None,
+) -> None:
+    async with pg_migrated_session_factory() as session:
+        repository = TaskRepository(session)
+        # Как в проде: почти все строки завершены, активных — небольшая доля.
+        for index, task_status in enumerate([TaskStatus.COMPLETED] * 19 + [TaskStatus.PENDING]):
+            await repository.add_many(
+                [
+                    {"title": f"Task {index}-{row}", "priority": list(TaskPriority)[row % 3]}
+                    for row in range(250)
+                ],
+                status=task_status,
+            )
+        await session.commit()
+        await session.execute(text("ANALYZE tasks"))
+
+        stmt = repository._list_statement(
+            TASK_LIST_FIELDS,
+            status=status,
+            priority=priority,
+            limit=21,
+        )
+        plan = await _explain(session, stmt)
+
+    node_types = {node["Node Type"] for node in _plan_nodes(plan)}
+    assert node_types & {"Index Scan", "Index Only Scan"}, node_types
+    assert not node_types & {"Seq Scan", "Sort"}, node_types
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_result_filter_uses_gin_index_on_postgres(pg_migrated_session_factory) -> None:
+    async with pg_migrated_session_factory() as session:
+        repository = TaskRepository(session)
+        tasks = await repository.add_many(
+            [{"title": f"Task {index}", "priority": TaskPriority.LOW} for index in range(2000)],
+            status=TaskStatus.COMPLETED,
+        )
+        for index, task in enumerate(tasks):
+            task.result = {"kind": "report" if index == 0 else "export", "rows": index}
+        report_id = tasks[0].id
+        await session.commit()
+        await session.execute(text("ANALYZE tasks"))
+
+        result_filter = {"kind": "report"}
+        rows = await repository.list(
+            fields=("id",),
+            status=None,
+            priority=None,
+            limit=10,
+            result_filter=result_filter,
+        )
+        assert [row["id"] for row in rows] == [report_id]
+
+        stmt = repository._apply_filters(
+            select(Task.id),
+            status=None,
+            priority=None,
+            result_filter=result_filter,
+        )
+        plan = await _explain(session, stmt)
+
+    # Сканируются индексы партиций, присоединённые к ix_tasks_result.
+    index_names = {node.get("Index Name") or "" for node in _plan_nodes(plan)}
+    assert any(name.endswith("_result") for name in index_names), index_names
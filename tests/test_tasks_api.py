@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import uuid
+
 import pytest
+from fastapi import FastAPI
 from httpx import AsyncClient
+from sqlalchemy import update
 
-from app.models import TaskPriority
+from app.core.config import settings
+from app.models import Task, TaskPriority
+from app.services.exceptions import PublisherUnavailableError
 
 
 @pytest.mark.asyncio
@@ -12,6 +18,7 @@ async def test_create_and_get_task(client: AsyncClient) -> None:
         "title": "Test task",
         "description": "Process payload",
         "priority": TaskPriority.HIGH.value,
+        "input": {"month": "2025-11"},
     }
     create_response = await client.post("/api/v1/tasks", json=payload)
     assert create_response.status_code == 201
@@ -24,6 +31,7 @@ async def test_create_and_get_task(client: AsyncClient) -> None:
     fetched = get_response.json()
     assert fetched["title"] == payload["title"]
     assert fetched["priority"] == TaskPriority.HIGH.value
+    assert fetched["input"] == payload["input"]
 
 
 @pytest.mark.asyncio
@@ -33,7 +41,7 @@ async def test_list_tasks_with_filters(client: AsyncClient) -> None:
         response = await client.post("/api/v1/tasks", json=payload)
         assert response.status_code == 201
 
-    list_response = await client.get("/api/v1/tasks?priority=HIGH&limit=2&offset=0")
+    list_response = await client.get("/api/v1/tasks?priority=HIGH&limit=2&offset=0&count=exact")
     assert list_response.status_code == 200
     data = list_response.json()
     assert data["total"] >= 1
@@ -56,3 +64,234 @@ async def test_cancel_task(client: AsyncClient) -> None:
     assert status_response.status_code == 200
     assert status_response.json()["status"] == "CANCELLED"
 
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_batch(client: AsyncClient) -> None:
+    payload = {
+        "items": [
+            {"title": f"Batch task {index}", "priority": TaskPriority.LOW.value}
+            for index in range(5)
+        ]
+    }
+    response = await client.post("/api/v1/tasks/batch", json=payload)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["succeeded"] == 5
+    assert data["failed"] == 0
+    assert [item["index"] for item in data["items"]] == list(range(5))
+    assert all(item["task"]["status"] == "PENDING" for item in data["items"])
+
+    task_id = data["items"][0]["task"]["id"]
+    get_response = await client.get(f"/api/v1/tasks/{task_id}")
+    assert get_response.status_code == 200
+    assert get_response.json()["status"] == "PENDING"
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_batch_partial_failure(
+    client: AsyncClient,
+    application: FastAPI,
+) -> None:
+    publisher = application.state.publisher
+
+    async def flaky_publish_tasks(tasks):
+        return [None if index % 2 == 0 else RuntimeError("nack") for index in range(len(tasks))]
+
+    publisher.publish_tasks = flaky_publish_tasks
+    payload = {"items": [{"title": f"Flaky task {index}"} for index in range(4)]}
+    response = await client.post("/api/v1/tasks/batch", json=payload)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 2
+    failed = [item for item in data["items"] if item["error"] is not None]
+    assert [item["index"] for item in failed] == [1, 3]
+    assert all(item["task"]["status"] == "FAILED" for item in failed)
+
+    list_response = await client.get("/api/v1/tasks?status=FAILED&count=exact")
+    assert list_response.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_batch_broker_unavailable(
+    client: AsyncClient,
+    application: FastAPI,
+) -> None:
+    publisher = application.state.publisher
+
+    async def unavailable_publish_tasks(tasks):
+        raise PublisherUnavailableError("RabbitMQ channel is not available")
+
+    publisher.publish_tasks = unavailable_publish_tasks
+    payload = {"items": [{"title": f"Lost task {index}"} for index in range(3)]}
+    response = await client.post("/api/v1/tasks/batch", json=payload)
+    assert response.status_code == 503
+
+    list_response = await client.get("/api/v1/tasks?count=exact")
+    assert list_response.json()["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_cursor(client: AsyncClient) -> None:
+    payload = {"items": [{"title": f"Paged task {index}"} for index in range(5)]}
+    response = await client.post("/api/v1/tasks/batch", json=payload)
+    assert response.status_code == 201
+
+    seen: list[str] = []
+    cursor = None
+    for _ in range(10):
+        url = "/api/v1/tasks?limit=2"
+        if cursor is not None:
+            url += f"&cursor={cursor}"
+        page = (await client.get(url)).json()
+        assert page["total"] is None
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    else:
+        pytest.fail("cursor pagination did not terminate")
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_invalid_cursor(client: AsyncClient) -> None:
+    response = await client.get("/api/v1/tasks?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_estimated_count(client: AsyncClient) -> None:
+    for index in range(3):
+        response = await client.post("/api/v1/tasks", json={"title": f"Counted task {index}"})
+        assert response.status_code == 201
+
+    # На SQLite оценка откатывается к точному count(*).
+    response = await client.get("/api/v1/tasks?count=estimate&limit=1")
+    assert response.status_code == 200
+    assert response.json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_matches_task_read(client: AsyncClient) -> None:
+    response = await client.post("/api/v1/tasks", json={"title": "Listed task"})
+    created = response.json()
+
+    page = (await client.get("/api/v1/tasks")).json()
+    fetched = (await client.get(f"/api/v1/tasks/{created['id']}")).json()
+    fetched.pop("result")
+    fetched.pop("input")
+    assert page["items"] == [fetched]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_sparse_fields(client: AsyncClient) -> None:
+    payload = {"items": [{"title": f"Sparse task {index}"} for index in range(3)]}
+    response = await client.post("/api/v1/tasks/batch", json=payload)
+    assert response.status_code == 201
+
+    page = (await client.get("/api/v1/tasks?fields=id,status,result_offloaded&limit=2")).json()
+    assert [set(item) for item in page["items"]] == [{"id", "status", "result_offloaded"}] * 2
+    assert all(item["result_offloaded"] is False for item in page["items"])
+
+    # Курсор строится и тогда, когда created_at не запрошен.
+    rest = (await client.get(f"/api/v1/tasks?fields=title&cursor={page['next_cursor']}")).json()
+    assert [set(item) for item in rest["items"]] == [{"title"}]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_unknown_fields(client: AsyncClient) -> None:
+    response = await client.get("/api/v1/tasks?fields=id,result")
+    assert response.status_code == 400
+    assert "result" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_filtered_by_result(client: AsyncClient, session_factory) -> None:
+    results = [
+        {"kind": "report", "stats": {"rows": 42}},
+        {"kind": "report", "stats": {"rows": 7}},
+        {"kind": "export", "stats": {"rows": 42}},
+    ]
+    task_ids = []
+    for index, result in enumerate(results):
+        response = await client.post(
+            "/api/v1/tasks",
+            json={"title": f"Result task {index}", "priority": TaskPriority.LOW.value},
+        )
+        task_ids.append(uuid.UUID(response.json()["id"]))
+    async with session_factory() as session:
+        await session.execute(
+            update(Task),
+            [{"id": task_id, "result": result} for task_id, result in zip(task_ids, results)],
+        )
+        await session.commit()
+
+    page = (await client.get("/api/v1/tasks?result.kind=report&count=exact")).json()
+    assert page["total"] == 2
+    assert {item["id"] for item in page["items"]} == {str(task_id) for task_id in task_ids[:2]}
+
+    page = (await client.get("/api/v1/tasks?result.kind=report&result.stats.rows=42")).json()
+    assert [item["id"] for item in page["items"]] == [str(task_ids[0])]
+
+    page = (await client.get('/api/v1/tasks?result.stats.rows="42"')).json()
+    assert page["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_with_conflicting_result_filter(client: AsyncClient) -> None:
+    response = await client.get("/api/v1/tasks?result.stats=1&result.stats.rows=2")
+    assert response.status_code == 400
+    assert "result.stats.rows" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_create_task_with_idempotency_key_is_replayed(
+    client: AsyncClient,
+    application: FastAPI,
+) -> None:
+    payload = {"title": "Idempotent task", "priority": TaskPriority.HIGH.value}
+    headers = {"Idempotency-Key": "order-42"}
+
+    first = await client.post("/api/v1/tasks", json=payload, headers=headers)
+    retry = await client.post("/api/v1/tasks", json=payload, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert len(application.state.publisher.messages) == 1
+
+    other = await client.post(
+        "/api/v1/tasks",
+        json=payload,
+        headers={"Idempotency-Key": "order-43"},
+    )
+    assert other.json()["id"] != first.json()["id"]
+
+    mismatch = await client.post(
+        "/api/v1/tasks",
+        json={**payload, "title": "Another task"},
+        headers=headers,
+    )
+    assert mismatch.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_tasks_are_deduplicated(
+    client: AsyncClient,
+    application: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "task_dedup_in_flight", True)
+    payload = {"title": "Report", "priority": TaskPriority.LOW.value, "input": {"a": 1, "b": 2}}
+
+    first = (await client.post("/api/v1/tasks", json=payload)).json()
+    reordered = {**payload, "input": {"b": 2, "a": 1}}
+    duplicate = (await client.post("/api/v1/tasks", json=reordered)).json()
+    assert duplicate["id"] == first["id"]
+    assert len(application.state.publisher.messages) == 1
+
+    await client.delete(f"/api/v1/tasks/{first['id']}")
+    fresh = (await client.post("/api/v1/tasks", json=payload)).json()
+    assert fresh["id"] != first["id"]
+    assert len(application.state.publisher.messages) == 2
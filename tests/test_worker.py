@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Task, TaskPriority, TaskStatus
+from app.mq import InMemoryTaskBroker, TaskMessage
+from app.repositories import TaskRepository
+from app.services.worker_service import TaskWorkerService
+from app.workers.processor import TaskProcessor
+from app.workers.retry import RetryPolicy
+from app.workers.worker import QueueWorker
+
+
+class FakeMessage:
+    def __init__(self, delivery_tag: int, body: bytes) -> None:
+        self.delivery_tag = delivery_tag
+        self.body = body
+        self.content_type = "application/json"
+        self.acks: list[bool] = []
+        self.rejects: list[bool] = []
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.acks.append(multiple)
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.rejects.append(requeue)
+
+
+class FailingProcessor(TaskProcessor):
+    async def run(self, task: Task) -> dict:
+        if task.title == "boom":
+            raise RuntimeError("processing failed")
+        return await super().run(task)
+
+
+async def create_tasks(session_factory, titles: list[str]) -> list[uuid.UUID]:
+    async with session_factory() as session:
+        tasks = await TaskRepository(session).add_many(
+            [{"title": title, "priority": TaskPriority.HIGH} for title in titles],
+            status=TaskStatus.PENDING,
+        )
+        await session.commit()
+        return [task.id for task in tasks]
+
+
+@pytest.mark.asyncio
+async def test_execute_many_claims_and_completes_in_bulk(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    task_ids = await create_tasks(session_factory, ["ok", "boom", "ok too"])
+
+    async with session_factory() as session:
+        service = TaskWorkerService(session, TaskRepository(session), FailingProcessor())
+        await service.execute_many(task_ids)
+
+    async with session_factory() as session:
+        tasks = {task_id: await session.get(Task, task_id) for task_id in task_ids}
+    assert tasks[task_ids[0]].status == TaskStatus.COMPLETED
+    assert tasks[task_ids[0]].result["title"] == "ok"
+    assert tasks[task_ids[1]].status == TaskStatus.FAILED
+    assert tasks[task_ids[1]].error == "processing failed"
+    assert all(task.started_at and task.finished_at for task in tasks.values())
+
+    async with session_factory() as session:
+        repository = TaskRepository(session)
+        claimed = await repository.claim_many(task_ids, started_at=tasks[task_ids[0]].started_at)
+    assert claimed == []
+
+
+@pytest.mark.asyncio
+async def test_worker_collects_batch_and_multi_acks(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    task_ids = await create_tasks(session_factory, ["first", "second"])
+    messages = [
+        FakeMessage(1, json.dumps({"task_id": str(task_ids[0])}).encode()),
+        FakeMessage(2, b"not json"),
+        FakeMessage(3, json.dumps({"task_id": str(task_ids[1])}).encode()),
+    ]
+    deliveries: asyncio.Queue = asyncio.Queue()
+    for message in messages:
+        deliveries.put_nowait(message)
+
+    worker = QueueWorker(batch_size=10, batch_timeout_ms=20, session_factory=session_factory)
+    batch = await worker._collect_batch(deliveries)
+    assert batch == messages
+
+    await worker._process_batch(batch)
+    assert messages[2].acks == [True]
+    assert messages[0].acks == [] and messages[1].acks == []
+
+    async with session_factory() as session:
+        for task_id in task_ids:
+            assert (await session.get(Task, task_id)).status == TaskStatus.COMPLETED
+
+
+class FlakySessionFactory:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], failures: int) -> None:
+        self.session_factory = session_factory
+        self.failures = failures
+
+    def __call__(self) -> AsyncSession:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is unavailable")
+        return self.session_factory()
+
+
+@pytest.mark.asyncio
+async def test_batch_is_requeued_when_session_cannot_be_opened(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["unlucky"])
+    messages = [
+        FakeMessage(1, json.dumps({"task_id": str(task_id)}).encode()),
+        FakeMessage(2, b"not json"),
+    ]
+    worker = QueueWorker(
+        batch_size=10, session_factory=FlakySessionFactory(session_factory, failures=1)
+    )
+
+    await worker._process_batch(messages)
+
+    assert messages[0].rejects == [True] and messages[0].acks == []
+    assert messages[1].acks == [False] and messages[1].rejects == []
+    assert worker.processed == 0
+    async with session_factory() as session:
+        assert (await session.get(Task, task_id)).status == TaskStatus.PENDING
+
+    await worker._process_batch(messages[:1])
+    assert messages[0].acks == [True]
+    async with session_factory() as session:
+        assert (await session.get(Task, task_id)).status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_requeues_delivery_on_infrastructure_failure(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["unlucky"])
+    broker = InMemoryTaskBroker()
+    await broker.publish_task(TaskMessage(task_id, TaskPriority.HIGH))
+
+    worker = QueueWorker(
+        concurrency=1,
+        consumer=broker,
+        session_factory=FlakySessionFactory(session_factory, failures=1),
+    )
+    consumer = asyncio.create_task(worker.start())
+    for _ in range(100):
+        if worker.processed == 1:
+            break
+        await asyncio.sleep(0.02)
+    await worker.drain(timeout=1)
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert worker.processed == 1
+    assert broker.pending == 0 and broker.unacked == 0
+    async with session_factory() as session:
+        task = await session.get(Task, task_id)
+    assert task.status == TaskStatus.COMPLETED and task.attempts == 1
+
+
+class CountingProcessor(TaskProcessor):
+    def __init__(self) -> None:
+        self.runs: list[uuid.UUID] = []
+
+    async def run(self, task: Task) -> dict:
+        self.runs.append(task.id)
+        return await super().run(task)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_deliveries_execute_exactly_once(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["duplicated"])
+    processor = CountingProcessor()
+
+    async def deliver() -> None:
+        async with session_factory() as session:
+            service = TaskWorkerService(session, TaskRepository(session), processor)
+            await service.execute(task_id)
+
+    await asyncio.gather(*(deliver() for _ in range(5)))
+    await deliver()
+
+    assert processor.runs == [task_id]
+    async with session_factory() as session:
+        task = await session.get(Task, task_id)
+    assert task.status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_drain_stops_consumer_and_waits_for_in_flight() -> None:
+    worker = QueueWorker()
+    finished: list[str] = []
+
+    async def job(name: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        finished.append(name)
+
+    worker._consumer = asyncio.create_task(asyncio.sleep(3600))
+    worker._track(job("quick", 0.01))
+    worker._track(job("slow", 3600))
+
+    await asyncio.wait_for(worker.drain(timeout=0.1), timeout=1)
+    assert worker._consumer.cancelled()
+    assert finished == ["quick"]
+    assert len(worker._in_flight) == 1
+    for task in worker._in_flight:
+        task.cancel()
+
+
+class FlakyProcessor(TaskProcessor):
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.runs = 0
+
+    async def run(self, task: Task) -> dict:
+        self.runs += 1
+        if self.runs <= self.failures:
+            raise RuntimeError(f"transient failure {self.runs}")
+        return {"runs": self.runs}
+
+
+def test_retry_policy_backoff_is_capped_and_jittered() -> None:
+    policy = RetryPolicy(
+        max_attempts={"HIGH": 3}, base_delay=1.0, max_delay=5.0, jitter=0.5, random_fn=lambda: 1.0
+    )
+    assert [policy.delay(attempt) for attempt in (1, 2, 3, 4)] == [0.5, 1.0, 2.0, 2.5]
+    assert policy.should_retry(TaskPriority.HIGH, 2)
+    assert not policy.should_retry(TaskPriority.HIGH, 3)
+    assert policy.max_attempts(TaskPriority.LOW) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_retried_then_dead_lettered(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["boom"])
+    policy = RetryPolicy(max_attempts={"HIGH": 2}, base_delay=1.0, max_delay=1.0, jitter=0)
+
+    async with session_factory() as session:
+        repository = TaskRepository(session)
+        service = TaskWorkerService(session, repository, FailingProcessor(), None, policy)
+        first = await service.execute(task_id)
+    assert first is not None and first.retry_in == 1.0 and first.attempts == 1
+    async with session_factory() as session:
+        task = await session.get(Task, task_id)
+        assert task.status == TaskStatus.PENDING and task.error == "processing failed"
+
+    async with session_factory() as session:
+        repository = TaskRepository(session)
+        service = TaskWorkerService(session, repository, FailingProcessor(), None, policy)
+        (second,) = await service.execute_many([task_id])
+    assert second.retry_in is None and second.attempts == 2
+    async with session_factory() as session:
+        task = await session.get(Task, task_id)
+        assert task.status == TaskStatus.FAILED and task.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_retries_through_broker_until_success(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["flaky"])
+    broker = InMemoryTaskBroker()
+    await broker.publish_task(TaskMessage(task_id, TaskPriority.HIGH))
+
+    worker = QueueWorker(concurrency=1, consumer=broker, session_factory=session_factory)
+    worker.processor = FlakyProcessor(failures=2)
+    worker.retry_policy = RetryPolicy(max_attempts={"HIGH": 3}, base_delay=0.01, jitter=0)
+    consumer = asyncio.create_task(worker.start())
+    for _ in range(100):
+        if worker.processed == 3:
+            break
+        await asyncio.sleep(0.02)
+    await worker.drain(timeout=1)
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    assert broker.dead_letters == []
+    async with session_factory() as session:
+        task = await session.get(Task, task_id)
+    assert task.status == TaskStatus.COMPLETED
+    assert task.attempts == 3 and task.result == {"runs": 3}
+
+
+@pytest.mark.asyncio
+async def test_queue_worker_dead_letters_exhausted_task(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    (task_id,) = await create_tasks(session_factory, ["boom"])
+    broker = InMemoryTaskBroker()
+    await broker.publish_task(TaskMessage(task_id, TaskPriority.HIGH))
+
+    worker = QueueWorker(concurrency=1, consumer=broker, session_factory=session_factory)
+    worker.processor = FailingProcessor()
+    worker.retry_policy = RetryPolicy(max_attempts={"HIGH": 1})
+    await worker._handle_task(TaskMessage(task_id))
+
+    assert broker.scheduled_retries == 0
+    (dead,) = [json.loads(body) for body in broker.dead_letters]
+    assert dead == {
+        "task_id": str(task_id),
+        "priority": "HIGH",
+        "attempts": 1,
+        "error": "processing failed",
+    }
+
+
+class EchoInputProcessor(TaskProcessor):
+    async def run(self, task: Task) -> dict:
+        return {"title": task.title, "input": task.input}
+
+
+@pytest.mark.asyncio
+async def test_authoritative_message_runs_without_reading_task_row(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    async with session_factory() as session:
+        (task,) = await TaskRepository(session).add_many(
+            [{"title": "from message", "priority": TaskPriority.HIGH, "input": {"n": 7}}],
+            status=TaskStatus.PENDING,
+        )
+        await session.commit()
+        message = TaskMessage.from_task(task)
+
+    broker = InMemoryTaskBroker(message_format="msgpack")
+    await broker.publish_task(message)
+    worker = QueueWorker(concurrency=1, consumer=broker, session_factory=session_factory)
+    worker.processor = EchoInputProcessor()
+    consumer = asyncio.create_task(worker.start())
+    for _ in range(100):
+        if worker.processed == 1:
+            break
+        await asyncio.sleep(0.02)
+    await worker.drain(timeout=1)
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    async with session_factory() as session:
+        stored = await session.get(Task, task.id)
+        assert stored.status == TaskStatus.COMPLETED and stored.attempts == 1
+        assert stored.result == {"title": "from message", "input": {"n": 7}}
+        # Повторная доставка уже завершённой задачи не захватывается и не выполняется.
+        service = TaskWorkerService(session, TaskRepository(session), EchoInputProcessor())
+        assert await service.execute_messages([message]) == []